@@ -3,6 +3,8 @@ import logging
 import os
 import shutil
 import base64
+import threading
+import time
 import redis
 
 from datetime import datetime
@@ -30,7 +32,7 @@ from open_webui.env import (
     get_secret,
     log,
 )
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, MIGRATIONS_AT_HEAD
 from open_webui.utils.redis import get_redis_connection
 
 
@@ -65,7 +67,8 @@ def run_migrations():
         log.exception(f"Error running migrations: {e}")
 
 
-run_migrations()
+if not MIGRATIONS_AT_HEAD:
+    run_migrations()
 
 
 class Config(Base):
@@ -257,8 +260,21 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Holds the PersistentConfig values of the app.
+
+    With Redis configured, every change is written to Redis and announced on
+    the config channel. Each worker subscribes to that channel and applies
+    the announced values to its in-memory state, so reads are plain attribute
+    lookups. While the subscription is not established, reads fall back to
+    fetching the value from Redis.
+    """
+
+    REDIS_CHANNEL = "open-webui:config"
+
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    _subscribed: Optional[threading.Event] = None
 
     def __init__(
         self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
@@ -269,10 +285,73 @@ class AppConfig:
                 "_redis",
                 get_redis_connection(redis_url, redis_sentinels, decode_responses=True),
             )
+            super().__setattr__("_subscribed", threading.Event())
+            threading.Thread(
+                target=self._listen, name="config-subscriber", daemon=True
+            ).start()
+
+    def _apply(self, key, value):
+        if key in self._state and self._state[key].value != value:
+            self._state[key].value = value
+            log.info(f"Updated {key} from Redis: {value}")
+
+    def _sync(self):
+        keys = list(self._state.keys())
+        if not keys:
+            return
+
+        redis_values = self._redis.mget([f"open-webui:config:{key}" for key in keys])
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
+            try:
+                self._apply(key, json.loads(redis_value))
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.REDIS_CHANNEL)
+                # Changes made while not subscribed were missed, so catch up
+                # before serving reads from memory
+                self._sync()
+                self._subscribed.set()
+
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                        self._apply(data["key"], data["value"])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        log.error(f"Invalid config message: {message['data']}")
+            except Exception as e:
+                log.warning(f"Config subscription to Redis lost: {e}")
+            finally:
+                self._subscribed.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
+
+            # Keys registered after the initial sync still need the value
+            # another worker may have set
+            if self._subscribed is not None and self._subscribed.is_set():
+                try:
+                    redis_value = self._redis.get(f"open-webui:config:{key}")
+                    if redis_value is not None:
+                        self._apply(key, json.loads(redis_value))
+                except Exception as e:
+                    log.error(f"Error reading {key} from Redis: {e}")
         else:
             self._state[key].value = value
             self._state[key].save()
@@ -280,25 +359,23 @@ class AppConfig:
             if self._redis:
                 redis_key = f"open-webui:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._redis.publish(
+                    self.REDIS_CHANNEL,
+                    json.dumps({"key": key, "value": self._state[key].value}),
+                )
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
+        # Without a live subscription, check Redis for an updated value
+        if self._redis and not self._subscribed.is_set():
             redis_key = f"open-webui:config:{key}"
             redis_value = self._redis.get(redis_key)
 
             if redis_value is not None:
                 try:
-                    decoded_value = json.loads(redis_value)
-
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
-
+                    self._apply(key, json.loads(redis_value))
                 except json.JSONDecodeError:
                     log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
 
@@ -762,6 +839,16 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Local copies of S3/GCS/Azure files are kept in UPLOAD_DIR and evicted least
+# recently used first once they exceed this size in MB (0 disables eviction)
+STORAGE_LOCAL_CACHE_MAX_SIZE = int(
+    os.environ.get("STORAGE_LOCAL_CACHE_MAX_SIZE", "2048")
+)
+
+# Storage calls (and batches of deletes) run at once per process, which is also
+# the size of the connection pool of the S3/GCS/Azure clients
+STORAGE_MAX_CONCURRENCY = int(os.environ.get("STORAGE_MAX_CONCURRENCY", "16"))
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1731,6 +1818,27 @@ SSL_ASSERT_FINGERPRINT = os.environ.get("SSL_ASSERT_FINGERPRINT", None)
 ELASTICSEARCH_INDEX_PREFIX = os.environ.get(
     "ELASTICSEARCH_INDEX_PREFIX", "open_webui_collections"
 )
+# Local
+LOCAL_VECTOR_DB_PATH = os.environ.get(
+    "LOCAL_VECTOR_DB_PATH", f"{DATA_DIR}/vector_db/local"
+)
+# "int8" stores vectors with scalar quantization, a quarter of the float32 size
+LOCAL_VECTOR_DB_QUANTIZATION = os.environ.get(
+    "LOCAL_VECTOR_DB_QUANTIZATION", ""
+).lower()
+LOCAL_VECTOR_DB_SEGMENT_ROWS = int(
+    os.environ.get("LOCAL_VECTOR_DB_SEGMENT_ROWS", "16384")
+)
+# Collections with at least this many rows are searched through an HNSW graph
+# when hnswlib is installed, 0 always uses exact search
+LOCAL_VECTOR_DB_HNSW_THRESHOLD = int(
+    os.environ.get("LOCAL_VECTOR_DB_HNSW_THRESHOLD", "50000")
+)
+# Share of deleted rows after which a collection is compacted in the background
+LOCAL_VECTOR_DB_COMPACTION_RATIO = float(
+    os.environ.get("LOCAL_VECTOR_DB_COMPACTION_RATIO", "0.3")
+)
+
 # Pgvector
 PGVECTOR_DB_URL = os.environ.get("PGVECTOR_DB_URL", DATABASE_URL)
 if VECTOR_DB == "pgvector" and not PGVECTOR_DB_URL.startswith("postgres"):
@@ -1847,6 +1955,20 @@ RAG_FULL_CONTEXT = PersistentConfig(
     os.getenv("RAG_FULL_CONTEXT", "False").lower() == "true",
 )
 
+# Start retrieving for the last user message while retrieval queries are
+# still being generated, and merge both result sets
+ENABLE_RAG_SPECULATIVE_RETRIEVAL = (
+    os.environ.get("ENABLE_RAG_SPECULATIVE_RETRIEVAL", "False").lower() == "true"
+)
+
+# Seconds to wait for generated queries before using the speculative results
+RAG_SPECULATIVE_RETRIEVAL_DEADLINE = float(
+    os.environ.get("RAG_SPECULATIVE_RETRIEVAL_DEADLINE", "3")
+)
+
+# Size of the thread pool shared by all chat retrievals
+RAG_RETRIEVAL_MAX_WORKERS = int(os.environ.get("RAG_RETRIEVAL_MAX_WORKERS", "8"))
+
 RAG_FILE_MAX_COUNT = PersistentConfig(
     "RAG_FILE_MAX_COUNT",
     "rag.file.max_count",
@@ -1904,6 +2026,18 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+RAG_REINDEX_CONCURRENCY = int(os.environ.get("RAG_REINDEX_CONCURRENCY", "4"))
+
+RAG_REINDEX_CHECKPOINT_DIR = os.environ.get(
+    "RAG_REINDEX_CHECKPOINT_DIR", f"{CACHE_DIR}/reindex"
+)
+
+# Number of chunks embedded and inserted together while streaming a document
+RAG_INGEST_BATCH_SIZE = int(os.environ.get("RAG_INGEST_BATCH_SIZE", "128"))
+
+# Number of extracted pages buffered ahead of the embedding step
+RAG_INGEST_QUEUE_SIZE = int(os.environ.get("RAG_INGEST_QUEUE_SIZE", "4"))
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2097,6 +2231,18 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Seconds search engine results are reused for the same engine and query
+WEB_SEARCH_CACHE_TTL = int(os.environ.get("WEB_SEARCH_CACHE_TTL", "3600"))
+
+# Seconds fetched pages are reused before being revalidated with the site;
+# pages nobody asked for in that time are removed
+WEB_LOADER_CACHE_TTL = int(os.environ.get("WEB_LOADER_CACHE_TTL", "86400"))
+
+WEB_LOADER_CACHE_DIR = os.environ.get("WEB_LOADER_CACHE_DIR", f"{CACHE_DIR}/web")
+
+# Disk budget (MB) of the fetched page cache, 0 for no limit
+WEB_LOADER_CACHE_MAX_SIZE = int(os.environ.get("WEB_LOADER_CACHE_MAX_SIZE", "512"))
+
 
 SEARXNG_QUERY_URL = PersistentConfig(
     "SEARXNG_QUERY_URL",
@@ -2468,6 +2614,12 @@ COMFYUI_WORKFLOW_NODES = PersistentConfig(
     [],
 )
 
+# Prompts each instance keeps queued on a ComfyUI server at once; further
+# image requests wait for one of them to finish
+COMFYUI_MAX_CONCURRENT_PROMPTS = int(
+    os.environ.get("COMFYUI_MAX_CONCURRENT_PROMPTS", "4")
+)
+
 IMAGES_OPENAI_API_BASE_URL = PersistentConfig(
     "IMAGES_OPENAI_API_BASE_URL",
     "image_generation.openai.api_base_url",
@@ -2504,6 +2656,22 @@ IMAGE_GENERATION_MODEL = PersistentConfig(
     os.getenv("IMAGE_GENERATION_MODEL", ""),
 )
 
+# Identical image requests with a fixed seed (same engine, model, prompt, size,
+# steps, seed, ...) reuse the images generated for the first one; requests
+# without a seed always generate new images
+ENABLE_IMAGE_GENERATION_CACHE = (
+    os.environ.get("ENABLE_IMAGE_GENERATION_CACHE", "True").lower() == "true"
+)
+
+# Disk budget (MB) of the generated image cache, 0 for no limit
+IMAGE_GENERATION_CACHE_MAX_SIZE = int(
+    os.environ.get("IMAGE_GENERATION_CACHE_MAX_SIZE", "1024")
+)
+
+# Seconds generated images are reused before they are generated again, 0 to
+# keep them until evicted
+IMAGE_GENERATION_CACHE_TTL = int(os.environ.get("IMAGE_GENERATION_CACHE_TTL", "604800"))
+
 ####################################
 # Audio
 ####################################
@@ -2527,6 +2695,16 @@ WHISPER_VAD_FILTER = PersistentConfig(
     os.getenv("WHISPER_VAD_FILTER", "False").lower() == "true",
 )
 
+# Chunks of audio the local whisper model transcribes at once (across all
+# requests), each with its share of the CPU threads
+WHISPER_WORKERS = int(
+    os.environ.get("WHISPER_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // 2))))
+)
+
+# Longest chunk (seconds) transcribed in one piece; longer recordings are split
+# at pauses and their chunks transcribed in parallel
+WHISPER_CHUNK_DURATION = int(os.environ.get("WHISPER_CHUNK_DURATION", "30"))
+
 
 # Add Deepgram configuration
 DEEPGRAM_API_KEY = PersistentConfig(
@@ -2634,6 +2812,13 @@ AUDIO_TTS_AZURE_SPEECH_OUTPUT_FORMAT = PersistentConfig(
     ),
 )
 
+# Disk budget (MB) of the synthesized speech cache, 0 for no limit
+AUDIO_TTS_CACHE_MAX_SIZE = int(os.environ.get("AUDIO_TTS_CACHE_MAX_SIZE", "1024"))
+
+# Seconds synthesized speech is reused before it is synthesized again, 0 to
+# keep it until evicted
+AUDIO_TTS_CACHE_TTL = int(os.environ.get("AUDIO_TTS_CACHE_TTL", "2592000"))
+
 
 ####################################
 # LDAP
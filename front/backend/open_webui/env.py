@@ -104,13 +104,15 @@ if USE_CUDA.lower() == "true":
 else:
     DEVICE_TYPE = "cpu"
 
-try:
-    import torch
+# MPS only exists on macOS; skip importing torch everywhere else
+if sys.platform == "darwin":
+    try:
+        import torch
 
-    if torch.backends.mps.is_available() and torch.backends.mps.is_built():
-        DEVICE_TYPE = "mps"
-except Exception:
-    pass
+        if torch.backends.mps.is_available() and torch.backends.mps.is_built():
+            DEVICE_TYPE = "mps"
+    except Exception:
+        pass
 
 ####################################
 # LOGGING
@@ -405,6 +407,44 @@ BYPASS_MODEL_ACCESS_CONTROL = (
     os.environ.get("BYPASS_MODEL_ACCESS_CONTROL", "False").lower() == "true"
 )
 
+# Seconds an authenticated user is served from memory instead of the database
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+try:
+    USER_CACHE_TTL = int(USER_CACHE_TTL)
+except ValueError:
+    USER_CACHE_TTL = 10
+
+# Seconds between batched writes of the users' last active timestamps
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "30"
+)
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = int(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except ValueError:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 30
+
+# Seconds a user's group memberships are served from memory for access checks
+GROUP_MEMBERSHIP_CACHE_TTL = os.environ.get("GROUP_MEMBERSHIP_CACHE_TTL", "10")
+try:
+    GROUP_MEMBERSHIP_CACHE_TTL = int(GROUP_MEMBERSHIP_CACHE_TTL)
+except ValueError:
+    GROUP_MEMBERSHIP_CACHE_TTL = 10
+
+# Seconds before the provider model lists of the model catalog are refreshed
+# in the background
+MODEL_CATALOG_TTL = os.environ.get("MODEL_CATALOG_TTL", "60")
+try:
+    MODEL_CATALOG_TTL = int(MODEL_CATALOG_TTL)
+except ValueError:
+    MODEL_CATALOG_TTL = 60
+
+# Rate limits as "<requests>/<seconds>" per client IP, shared across workers
+# through Redis when REDIS_URL is set
+TICKET_SUBMIT_RATE_LIMIT = os.environ.get("TICKET_SUBMIT_RATE_LIMIT", "5/3600")
+A2A_RATE_LIMIT = os.environ.get("A2A_RATE_LIMIT", "60/60")
+EMBED_CHAT_RATE_LIMIT = os.environ.get("EMBED_CHAT_RATE_LIMIT", "30/60")
+FETCH_WELL_KNOWN_RATE_LIMIT = os.environ.get("FETCH_WELL_KNOWN_RATE_LIMIT", "30/60")
+
 ####################################
 # WEBUI_SECRET_KEY
 ####################################
@@ -488,6 +528,65 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = 10
 
+# Default timeout for each pipeline filter call; a filter can override it
+# with a "timeout" (seconds) in its pipeline metadata
+AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER = os.environ.get(
+    "AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER", ""
+)
+
+if AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER == "":
+    AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER = AIOHTTP_CLIENT_TIMEOUT
+else:
+    try:
+        AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER = int(
+            AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER
+        )
+    except Exception:
+        AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER = AIOHTTP_CLIENT_TIMEOUT
+
+# How long a fetched tool server OpenAPI spec is served before it is
+# revalidated in the background
+TOOL_SERVER_SPEC_CACHE_TTL = os.environ.get("TOOL_SERVER_SPEC_CACHE_TTL", "300")
+try:
+    TOOL_SERVER_SPEC_CACHE_TTL = int(TOOL_SERVER_SPEC_CACHE_TTL)
+except ValueError:
+    TOOL_SERVER_SPEC_CACHE_TTL = 300
+
+####################################
+# FILE PROCESSING
+####################################
+
+# Uploaded files are extracted, transcribed and embedded by a pool of
+# workers in every process, claiming jobs from the file_job table
+FILE_PROCESSING_WORKERS = os.environ.get("FILE_PROCESSING_WORKERS", "2")
+try:
+    FILE_PROCESSING_WORKERS = int(FILE_PROCESSING_WORKERS)
+except ValueError:
+    FILE_PROCESSING_WORKERS = 2
+
+# Files of a single user processed at the same time, across all workers
+FILE_PROCESSING_MAX_JOBS_PER_USER = os.environ.get(
+    "FILE_PROCESSING_MAX_JOBS_PER_USER", "2"
+)
+try:
+    FILE_PROCESSING_MAX_JOBS_PER_USER = int(FILE_PROCESSING_MAX_JOBS_PER_USER)
+except ValueError:
+    FILE_PROCESSING_MAX_JOBS_PER_USER = 2
+
+FILE_PROCESSING_MAX_ATTEMPTS = os.environ.get("FILE_PROCESSING_MAX_ATTEMPTS", "3")
+try:
+    FILE_PROCESSING_MAX_ATTEMPTS = int(FILE_PROCESSING_MAX_ATTEMPTS)
+except ValueError:
+    FILE_PROCESSING_MAX_ATTEMPTS = 3
+
+# Seconds a worker holds a job without a heartbeat before another worker
+# takes it over
+FILE_PROCESSING_LEASE_TIMEOUT = os.environ.get("FILE_PROCESSING_LEASE_TIMEOUT", "60")
+try:
+    FILE_PROCESSING_LEASE_TIMEOUT = int(FILE_PROCESSING_LEASE_TIMEOUT)
+except ValueError:
+    FILE_PROCESSING_LEASE_TIMEOUT = 60
+
 ####################################
 # OFFLINE_MODE
 ####################################
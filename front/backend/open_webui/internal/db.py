@@ -1,5 +1,6 @@
 import json
 import logging
+import re
 from contextlib import contextmanager
 from typing import Any, Optional
 
@@ -15,7 +16,7 @@ from open_webui.env import (
     DATABASE_POOL_TIMEOUT,
 )
 from peewee_migrate import Router
-from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy import Dialect, create_engine, MetaData, text, types
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -72,9 +73,6 @@ def handle_peewee_migration(DATABASE_URL):
         assert db.is_closed(), "Database connection is still open."
 
 
-handle_peewee_migration(DATABASE_URL)
-
-
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 if "sqlite" in SQLALCHEMY_DATABASE_URL:
     engine = create_engine(
@@ -97,6 +95,75 @@ else:
         )
 
 
+PEEWEE_MIGRATIONS_DIR = OPEN_WEBUI_DIR / "internal" / "migrations"
+ALEMBIC_VERSIONS_DIR = OPEN_WEBUI_DIR / "migrations" / "versions"
+
+
+def get_peewee_migration_names() -> set[str]:
+    return {
+        path.stem
+        for path in PEEWEE_MIGRATIONS_DIR.glob("*.py")
+        if not path.name.startswith("__")
+    }
+
+
+def get_alembic_heads() -> set[str]:
+    """Reads the head revisions from the migration scripts without importing them."""
+    revisions = set()
+    down_revisions = set()
+    for path in ALEMBIC_VERSIONS_DIR.glob("*.py"):
+        source = path.read_text()
+        revision = re.search(
+            r"^revision(?:\s*:[^=]*)?\s*=\s*[\"']([^\"']+)[\"']", source, re.M
+        )
+        down_revision = re.search(
+            r"^down_revision(?:\s*:[^=]*)?\s*=(.*)$", source, re.M
+        )
+        if revision:
+            revisions.add(revision.group(1))
+        if down_revision:
+            down_revisions.update(
+                re.findall(r"[\"']([^\"']+)[\"']", down_revision.group(1))
+            )
+    return revisions - down_revisions
+
+
+def is_database_at_head() -> bool:
+    """
+    Checks with two cheap queries whether every peewee and alembic migration
+    has already been applied, so that starting an up-to-date instance skips
+    both migration runners. Any doubt means the migrations run as usual.
+    """
+    try:
+        heads = get_alembic_heads()
+        if len(heads) != 1:
+            return False
+
+        with engine.connect() as connection:
+            applied = {
+                row[0]
+                for row in connection.execute(text("SELECT name FROM migratehistory"))
+            }
+            versions = {
+                row[0]
+                for row in connection.execute(
+                    text("SELECT version_num FROM alembic_version")
+                )
+            }
+    except Exception as e:
+        log.debug(f"Could not check the database migrations: {e}")
+        return False
+
+    return get_peewee_migration_names() <= applied and versions == heads
+
+
+MIGRATIONS_AT_HEAD = is_database_at_head()
+if MIGRATIONS_AT_HEAD:
+    log.info("Database is up to date, skipping migrations")
+else:
+    handle_peewee_migration(DATABASE_URL)
+
+
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
 )
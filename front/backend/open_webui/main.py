@@ -1,3 +1,8 @@
+from open_webui.utils.startup import start_import_profiling, log_startup_report
+
+# Started before any other import so that the whole import tree is profiled
+start_import_profiling()
+
 import asyncio
 import inspect
 import json
@@ -11,6 +16,7 @@ import random
 import uuid
 
 from contextlib import asynccontextmanager
+from functools import partial
 from urllib.parse import urlencode, parse_qs, urlparse
 from pydantic import BaseModel
 from sqlalchemy import text
@@ -83,10 +89,13 @@ from open_webui.routers import (
     embed,
 )
 
+from open_webui.retrieval.web.cache import close_web_page_session
+from open_webui.routers.pipelines import close_pipelines_session
 from open_webui.routers.retrieval import (
     get_embedding_function,
     get_ef,
     get_rf,
+    LazyModel,
 )
 
 from open_webui.internal.db import Session, engine
@@ -359,6 +368,7 @@ from open_webui.env import (
 
 
 from open_webui.utils.models import (
+    MODEL_CATALOG,
     get_all_models,
     get_all_base_models,
     check_model_access,
@@ -370,6 +380,9 @@ from open_webui.utils.chat import (
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
 from open_webui.utils.access_control import has_access
+from open_webui.utils.tools import TOOL_SERVER_SPEC_CACHE
+from open_webui.utils.file_jobs import FILE_PROCESSING_QUEUE
+from open_webui.utils.plugin import PluginModuleCache
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -377,6 +390,7 @@ from open_webui.utils.auth import (
     decode_token,
     get_admin_user,
     get_verified_user,
+    periodic_user_last_active_flush,
 )
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
@@ -441,8 +455,30 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_user_last_active_flush())
+
+    # Warm up the model catalog so the first /api/models does not wait on it
+    MODEL_CATALOG.schedule_refresh(Request({"type": "http", "app": app}))
+
+    # Load the local embedding and reranking models once the server is up,
+    # instead of blocking startup on them
+    for model in [app.state.ef, app.state.rf]:
+        if isinstance(model, LazyModel):
+            asyncio.create_task(asyncio.to_thread(model.load))
+
+    # Process uploaded files in the background, resuming the queued jobs
+    FILE_PROCESSING_QUEUE.start(app)
+
+    log_startup_report()
     yield
 
+    await FILE_PROCESSING_QUEUE.stop()
+
+    Users.flush_user_last_active()
+    await TOOL_SERVER_SPEC_CACHE.close()
+    await close_pipelines_session()
+    await close_web_page_session()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -599,8 +635,8 @@ app.state.AUTH_TRUSTED_NAME_HEADER = WEBUI_AUTH_TRUSTED_NAME_HEADER
 app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 
 app.state.USER_COUNT = None
-app.state.TOOLS = {}
-app.state.FUNCTIONS = {}
+app.state.TOOLS = PluginModuleCache("tool")
+app.state.FUNCTIONS = PluginModuleCache("function")
 
 ########################################
 #
@@ -704,16 +740,30 @@ app.state.YOUTUBE_LOADER_TRANSLATION = None
 
 
 try:
-    app.state.ef = get_ef(
-        app.state.config.RAG_EMBEDDING_ENGINE,
-        app.state.config.RAG_EMBEDDING_MODEL,
-        RAG_EMBEDDING_MODEL_AUTO_UPDATE,
-    )
+    # Local models are loaded on first use or by the warm-up in lifespan
+    if (
+        app.state.config.RAG_EMBEDDING_ENGINE == ""
+        and app.state.config.RAG_EMBEDDING_MODEL
+    ):
+        app.state.ef = LazyModel(
+            "embedding",
+            partial(
+                get_ef,
+                app.state.config.RAG_EMBEDDING_ENGINE,
+                app.state.config.RAG_EMBEDDING_MODEL,
+                RAG_EMBEDDING_MODEL_AUTO_UPDATE,
+            ),
+        )
 
-    app.state.rf = get_rf(
-        app.state.config.RAG_RERANKING_MODEL,
-        RAG_RERANKING_MODEL_AUTO_UPDATE,
-    )
+    if app.state.config.RAG_RERANKING_MODEL:
+        app.state.rf = LazyModel(
+            "reranking",
+            partial(
+                get_rf,
+                app.state.config.RAG_RERANKING_MODEL,
+                RAG_RERANKING_MODEL_AUTO_UPDATE,
+            ),
+        )
 except Exception as e:
     log.error(f"Error updating models: {e}")
     pass
@@ -1017,32 +1067,8 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
-        filtered_models = []
-        for model in models:
-            # Skip filtering for agent models - they're always accessible if enabled
-            if model.get("owned_by") == "a2a-agent":
-                filtered_models.append(model)
-                continue
-
-            if model.get("arena"):
-                if has_access(
-                    user.id,
-                    type="read",
-                    access_control=model.get("info", {})
-                    .get("meta", {})
-                    .get("access_control", {}),
-                ):
-                    filtered_models.append(model)
-                continue
-
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
-
-        return filtered_models
+        model_ids = MODEL_CATALOG.get_visible_model_ids(user)
+        return [model for model in models if model["id"] in model_ids]
 
     all_models = await get_all_models(request, user=user)
 
@@ -1052,12 +1078,16 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
         if "pipeline" in model and model["pipeline"].get("type", None) == "filter":
             continue
 
+        # The catalog snapshot is shared, so the tags are set on a copy
+        model = {**model}
         try:
             model_tags = [
                 tag.get("name")
                 for tag in model.get("info", {}).get("meta", {}).get("tags", [])
             ]
             tags = [tag.get("name") for tag in model.get("tags", [])]
+            if model.get("owned_by") == "a2a-agent":
+                tags.append("a2a")
 
             tags = list(set(model_tags + tags))
             model["tags"] = [{"name": tag} for tag in tags]
@@ -1068,39 +1098,6 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
 
         models.append(model)
 
-    # Add A2A agent models if enabled
-    from open_webui.models.agents import Agents
-    enable_a2a = getattr(request.app.state.config, "ENABLE_A2A_AGENTS", True)
-    if enable_a2a:
-        try:
-            agents = Agents.get_agents()
-            for agent in agents:
-                model_id = f"agent:{agent.id}"
-                agent_model = {
-                    "id": model_id,
-                    "name": agent.name,
-                    "object": "model",
-                    "created": agent.created_at,
-                    "owned_by": "a2a-agent",
-                    "agent": {
-                        "id": agent.id,
-                        "description": agent.description,
-                        "endpoint": agent.endpoint or agent.url,
-                        "capabilities": agent.capabilities,
-                        "skills": agent.skills,
-                    },
-                    "info": {
-                        "meta": {
-                            "description": agent.description,
-                            "capabilities": agent.capabilities,
-                        }
-                    },
-                    "tags": [{"name": "agent"}, {"name": "a2a"}]
-                }
-                models.append(agent_model)
-        except Exception as e:
-            log.debug(f"Error loading A2A agents: {e}")
-
     model_order_list = request.app.state.config.MODEL_ORDER_LIST
     if model_order_list:
         model_order_dict = {model_id: i for i, model_id in enumerate(model_order_list)}
@@ -1131,8 +1128,7 @@ async def chat_completion(
     form_data: dict,
     user=Depends(get_verified_user),
 ):
-    if not request.app.state.MODELS:
-        await get_all_models(request, user=user)
+    await get_all_models(request, user=user)
 
     model_item = form_data.pop("model_item", {})
     tasks = form_data.pop("background_tasks", None)
@@ -1146,14 +1142,14 @@ async def chat_completion(
             log.info(f"[CHAT] Available models in cache: {list(request.app.state.MODELS.keys()) if request.app.state.MODELS else 'None'}")
 
             # If the model id isn't present in the cached MODELS dict, try to
-            # refresh models when it's an A2A agent (they may have been just
-            # registered via the settings UI) before failing.
+            # patch in the agents when it's an A2A agent (they may have been
+            # just registered via the settings UI) before failing.
             if model_id not in request.app.state.MODELS:
                 log.warning(f"[CHAT] Model {model_id} not in cache")
                 if isinstance(model_id, str) and model_id.startswith("agent:"):
-                    log.info(f"[CHAT] Model is A2A agent, refreshing models cache...")
-                    await get_all_models(request, user=user)
-                    log.info(f"[CHAT] After refresh, available models: {list(request.app.state.MODELS.keys())}")
+                    log.info(f"[CHAT] Model is A2A agent, patching agents into the model catalog...")
+                    await MODEL_CATALOG.patch_agents(request)
+                    log.info(f"[CHAT] After patch, available models: {list(request.app.state.MODELS.keys())}")
 
             if model_id not in request.app.state.MODELS:
                 log.error(f"[CHAT] Model {model_id} still not found after refresh")
@@ -0,0 +1,59 @@
+"""Add group_member table
+
+Revision ID: b7e4c1d2a9f0
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+from sqlalchemy import String, JSON
+
+
+revision = "b7e4c1d2a9f0"
+down_revision = "a1b2c3d4e5f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Backfill the memberships from the `user_ids` JSON column of every group
+    group_table = table("group", column("id", String), column("user_ids", JSON))
+    group_member_table = table(
+        "group_member",
+        column("group_id", sa.Text),
+        column("user_id", sa.Text),
+        column("created_at", sa.BigInteger),
+    )
+
+    connection = op.get_bind()
+    results = connection.execute(
+        sa.select(group_table.c.id, group_table.c.user_ids)
+    ).fetchall()
+
+    now = int(time.time())
+    rows = [
+        {"group_id": row.id, "user_id": user_id, "created_at": now}
+        for row in results
+        for user_id in dict.fromkeys(row.user_ids or [])
+    ]
+    if rows:
+        op.bulk_insert(group_member_table, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,44 @@
+"""Add file_job table
+
+Revision ID: c3f8a6e1d5b2
+Revises: b7e4c1d2a9f0
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c3f8a6e1d5b2"
+down_revision = "b7e4c1d2a9f0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "file_job",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("hash", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column("lease_until", sa.BigInteger(), nullable=True),
+        sa.Column("available_at", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "file_job_status_available_at_idx", "file_job", ["status", "available_at"]
+    )
+    op.create_index("file_job_file_id_idx", "file_job", ["file_id"])
+
+
+def downgrade():
+    op.drop_index("file_job_file_id_idx", table_name="file_job")
+    op.drop_index("file_job_status_available_at_idx", table_name="file_job")
+    op.drop_table("file_job")
@@ -0,0 +1,35 @@
+"""Add file_blob table
+
+Revision ID: d4a9b2c7e1f3
+Revises: c3f8a6e1d5b2
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d4a9b2c7e1f3"
+down_revision = "c3f8a6e1d5b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Files uploaded before this revision keep their own stored objects and
+    # are not counted as references
+    op.create_table(
+        "file_blob",
+        sa.Column("hash", sa.String(), nullable=False),
+        sa.Column("path", sa.Text(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("hash"),
+    )
+
+
+def downgrade():
+    op.drop_table("file_blob")
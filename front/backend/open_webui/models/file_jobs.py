@@ -0,0 +1,330 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Integer, String, Text, or_
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# File Jobs DB Schema
+####################
+
+# pending -> running -> completed
+#                    -> pending (retried after a failed attempt)
+#                    -> failed (once the attempts are used up)
+FILE_JOB_PENDING = "pending"
+FILE_JOB_RUNNING = "running"
+FILE_JOB_COMPLETED = "completed"
+FILE_JOB_FAILED = "failed"
+
+FILE_JOB_ACTIVE_STATUSES = [FILE_JOB_PENDING, FILE_JOB_RUNNING]
+
+
+class FileJob(Base):
+    __tablename__ = "file_job"
+
+    id = Column(String, primary_key=True)
+    file_id = Column(String, nullable=False)
+    user_id = Column(String, nullable=False)
+    # sha256 of the uploaded bytes, used to reuse the result of identical files
+    hash = Column(Text, nullable=True)
+
+    status = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    # The worker holding the job, until lease_until unless it heartbeats
+    worker_id = Column(String, nullable=True)
+    lease_until = Column(BigInteger, nullable=True)
+    # Retried jobs are not picked up again before this time
+    available_at = Column(BigInteger, nullable=False)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (
+        Index("file_job_status_available_at_idx", "status", "available_at"),
+        Index("file_job_file_id_idx", "file_id"),
+    )
+
+
+class FileJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    file_id: str
+    user_id: str
+    hash: Optional[str] = None
+
+    status: str
+    attempts: int = 0
+    error: Optional[str] = None
+
+    worker_id: Optional[str] = None
+    lease_until: Optional[int] = None
+    available_at: int
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Forms
+####################
+
+
+class FileJobStatusResponse(BaseModel):
+    job_id: Optional[str] = None
+    file_id: str
+    status: str
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: Optional[int] = None
+    updated_at: Optional[int] = None
+
+
+class FileJobsTable:
+    def insert_new_job(
+        self, file_id: str, user_id: str, hash: Optional[str] = None
+    ) -> Optional[FileJobModel]:
+        """Queues the file, or returns its job if one is already queued."""
+        with get_db() as db:
+            existing = (
+                db.query(FileJob)
+                .filter(
+                    FileJob.file_id == file_id,
+                    FileJob.status.in_(FILE_JOB_ACTIVE_STATUSES),
+                )
+                .first()
+            )
+            if existing:
+                return FileJobModel.model_validate(existing)
+
+            now = int(time.time())
+            job = FileJobModel(
+                id=str(uuid.uuid4()),
+                file_id=file_id,
+                user_id=user_id,
+                hash=hash,
+                status=FILE_JOB_PENDING,
+                available_at=now,
+                created_at=now,
+                updated_at=now,
+            )
+
+            try:
+                result = FileJob(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                return FileJobModel.model_validate(result)
+            except Exception as e:
+                log.exception(f"Error inserting a new file job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[FileJobModel]:
+        with get_db() as db:
+            job = db.get(FileJob, id)
+            return FileJobModel.model_validate(job) if job else None
+
+    def get_latest_job_by_file_id(self, file_id: str) -> Optional[FileJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(FileJob)
+                .filter_by(file_id=file_id)
+                .order_by(FileJob.created_at.desc())
+                .first()
+            )
+            return FileJobModel.model_validate(job) if job else None
+
+    def get_completed_job_by_hash(
+        self, user_id: str, hash: str, exclude_file_id: str
+    ) -> Optional[FileJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(FileJob)
+                .filter(
+                    FileJob.user_id == user_id,
+                    FileJob.hash == hash,
+                    FileJob.file_id != exclude_file_id,
+                    FileJob.status == FILE_JOB_COMPLETED,
+                )
+                .order_by(FileJob.updated_at.desc())
+                .first()
+            )
+            return FileJobModel.model_validate(job) if job else None
+
+    def claim_next_job(
+        self,
+        worker_id: str,
+        lease_timeout: int,
+        max_jobs_per_user: int,
+        max_attempts: int,
+    ) -> Optional[FileJobModel]:
+        """
+        Leases the oldest runnable job to worker_id: a pending job, or a
+        running one whose worker stopped heartbeating. Jobs of users already
+        at max_jobs_per_user, and jobs whose hash is being processed (they
+        reuse its result once done), are left for later.
+        """
+        now = int(time.time())
+        with get_db() as db:
+            running = (
+                db.query(FileJob.user_id, FileJob.hash)
+                .filter(
+                    FileJob.status == FILE_JOB_RUNNING,
+                    FileJob.lease_until >= now,
+                )
+                .all()
+            )
+            running_per_user = {}
+            for user_id, _ in running:
+                running_per_user[user_id] = running_per_user.get(user_id, 0) + 1
+            running_hashes = {hash for _, hash in running if hash}
+
+            candidates = (
+                db.query(FileJob)
+                .filter(
+                    or_(
+                        (FileJob.status == FILE_JOB_PENDING)
+                        & (FileJob.available_at <= now),
+                        (FileJob.status == FILE_JOB_RUNNING)
+                        & (FileJob.lease_until < now),
+                    )
+                )
+                .order_by(FileJob.available_at, FileJob.created_at)
+                .limit(100)
+                .all()
+            )
+
+            for job in candidates:
+                if running_per_user.get(job.user_id, 0) >= max_jobs_per_user:
+                    continue
+                if job.hash and job.hash in running_hashes:
+                    continue
+
+                if job.status == FILE_JOB_RUNNING and job.attempts >= max_attempts:
+                    # Its worker died on the last attempt
+                    db.query(FileJob).filter_by(
+                        id=job.id, status=FILE_JOB_RUNNING, lease_until=job.lease_until
+                    ).update(
+                        {
+                            "status": FILE_JOB_FAILED,
+                            "error": job.error or "Processing did not finish",
+                            "worker_id": None,
+                            "lease_until": None,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                    db.commit()
+                    continue
+
+                # Only one worker wins the conditional update
+                claimed = (
+                    db.query(FileJob)
+                    .filter_by(
+                        id=job.id,
+                        status=job.status,
+                        worker_id=job.worker_id,
+                        attempts=job.attempts,
+                    )
+                    .update(
+                        {
+                            "status": FILE_JOB_RUNNING,
+                            "worker_id": worker_id,
+                            "lease_until": now + lease_timeout,
+                            "attempts": job.attempts + 1,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+
+                if claimed:
+                    db.refresh(job)
+                    return FileJobModel.model_validate(job)
+
+                db.rollback()
+
+            return None
+
+    def heartbeat_job(self, id: str, worker_id: str, lease_timeout: int) -> bool:
+        """Extends the lease; False if the job is no longer held by worker_id."""
+        now = int(time.time())
+        with get_db() as db:
+            updated = (
+                db.query(FileJob)
+                .filter_by(id=id, worker_id=worker_id, status=FILE_JOB_RUNNING)
+                .update(
+                    {"lease_until": now + lease_timeout, "updated_at": now},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return bool(updated)
+
+    def complete_job(self, id: str, worker_id: str) -> bool:
+        return self._finish_job(
+            id, worker_id, {"status": FILE_JOB_COMPLETED, "error": None}
+        )
+
+    def fail_job(
+        self, id: str, worker_id: str, error: str, retry_at: Optional[int] = None
+    ) -> bool:
+        """Fails the job for good, or queues it again at retry_at."""
+        if retry_at is None:
+            return self._finish_job(
+                id, worker_id, {"status": FILE_JOB_FAILED, "error": error}
+            )
+        return self._finish_job(
+            id,
+            worker_id,
+            {"status": FILE_JOB_PENDING, "error": error, "available_at": retry_at},
+        )
+
+    def _finish_job(self, id: str, worker_id: str, values: dict) -> bool:
+        with get_db() as db:
+            updated = (
+                db.query(FileJob)
+                .filter_by(id=id, worker_id=worker_id, status=FILE_JOB_RUNNING)
+                .update(
+                    {
+                        **values,
+                        "worker_id": None,
+                        "lease_until": None,
+                        "updated_at": int(time.time()),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return bool(updated)
+
+    def delete_jobs_by_file_id(self, file_id: str) -> bool:
+        with get_db() as db:
+            try:
+                db.query(FileJob).filter_by(file_id=file_id).delete()
+                db.commit()
+                return True
+            except Exception:
+                return False
+
+    def delete_all_jobs(self) -> bool:
+        with get_db() as db:
+            try:
+                db.query(FileJob).delete()
+                db.commit()
+                return True
+            except Exception:
+                return False
+
+
+FileJobs = FileJobsTable()
@@ -5,7 +5,8 @@ from typing import Optional
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Text, JSON
+from sqlalchemy.exc import IntegrityError
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -33,6 +34,28 @@ class File(Base):
     updated_at = Column(BigInteger)
 
 
+class FileBlob(Base):
+    """
+    Stored content shared by every file with the same bytes. Files point at
+    the blob's path and hold a reference each; the stored object is deleted
+    when the last of them is.
+    """
+
+    __tablename__ = "file_blob"
+    hash = Column(String, primary_key=True)  # sha256 of the bytes
+
+    path = Column(Text)
+    size = Column(BigInteger, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # Extraction results shared (read-only) by the files of the blob:
+    # {"content", "extraction_config", "collections"}
+    data = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
 class FileModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -52,6 +75,19 @@ class FileModel(BaseModel):
     updated_at: Optional[int]  # timestamp in epoch
 
 
+class FileBlobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    hash: str
+    path: str
+    size: Optional[int] = None
+    ref_count: int = 0
+    data: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
 ####################
 # Forms
 ####################
@@ -233,3 +269,122 @@ class FilesTable:
 
 
 Files = FilesTable()
+
+
+class FileBlobsTable:
+    def acquire_blob(self, hash: str, path: str, size: Optional[int] = None) -> str:
+        """
+        Adds a reference to the blob with this content, creating it from the
+        object stored at path if there is none yet. Returns the path the file
+        should use; if it is not `path`, the new object is a duplicate.
+        """
+        for _ in range(3):
+            with get_db() as db:
+                now = int(time.time())
+                updated = (
+                    db.query(FileBlob)
+                    .filter_by(hash=hash)
+                    .update(
+                        {
+                            FileBlob.ref_count: FileBlob.ref_count + 1,
+                            FileBlob.updated_at: now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if updated:
+                    blob = db.get(FileBlob, hash)
+                    if blob:
+                        return blob.path
+                    continue
+
+                try:
+                    db.add(
+                        FileBlob(
+                            hash=hash,
+                            path=path,
+                            size=size,
+                            ref_count=1,
+                            data={},
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
+                    db.commit()
+                    return path
+                except IntegrityError:
+                    # Created concurrently, add a reference to that one
+                    db.rollback()
+
+        raise Exception(f"Could not store the file blob {hash}")
+
+    def release_blob(self, hash: str, path: str) -> Optional[FileBlobModel]:
+        """
+        Drops a reference of a file stored at path. Returns the blob with its
+        remaining references (removed once it reaches 0), or None if the file
+        does not share a blob.
+        """
+        with get_db() as db:
+            updated = (
+                db.query(FileBlob)
+                .filter_by(hash=hash, path=path)
+                .update(
+                    {
+                        FileBlob.ref_count: FileBlob.ref_count - 1,
+                        FileBlob.updated_at: int(time.time()),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not updated:
+                return None
+
+            blob = FileBlobModel.model_validate(db.get(FileBlob, hash))
+            if blob.ref_count <= 0:
+                deleted = (
+                    db.query(FileBlob)
+                    .filter(FileBlob.hash == hash, FileBlob.ref_count <= 0)
+                    .delete(synchronize_session=False)
+                )
+                db.commit()
+                if not deleted:
+                    db.expire_all()
+                    current = db.get(FileBlob, hash)
+                    # Either a file took a reference in the meantime, or a
+                    # concurrent release already removed the blob
+                    if current is not None:
+                        blob = FileBlobModel.model_validate(current)
+            return blob
+
+    def get_blob_by_hash(self, hash: str) -> Optional[FileBlobModel]:
+        with get_db() as db:
+            blob = db.get(FileBlob, hash)
+            return FileBlobModel.model_validate(blob) if blob else None
+
+    def update_blob_data_by_hash(
+        self, hash: str, data: dict
+    ) -> Optional[FileBlobModel]:
+        with get_db() as db:
+            try:
+                blob = db.query(FileBlob).filter_by(hash=hash).first()
+                blob.data = {**(blob.data if blob.data else {}), **data}
+                blob.updated_at = int(time.time())
+                db.commit()
+                return FileBlobModel.model_validate(blob)
+            except Exception:
+                return None
+
+    def delete_all_blobs(self) -> bool:
+        with get_db() as db:
+            try:
+                db.query(FileBlob).delete()
+                db.commit()
+
+                return True
+            except Exception:
+                return False
+
+
+FileBlobs = FileBlobsTable()
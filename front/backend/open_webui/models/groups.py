@@ -1,17 +1,18 @@
 import json
 import logging
+import threading
 import time
 from typing import Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import GROUP_MEMBERSHIP_CACHE_TTL, SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, Text, JSON
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +42,22 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    """
+    Normalized copy of Group.user_ids, so the groups of a user can be looked
+    up through an index instead of scanning the JSON column of every group.
+    """
+
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, primary_key=True)
+    user_id = Column(Text, primary_key=True)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("group_member_user_id_idx", "user_id"),)
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -87,7 +104,70 @@ class GroupUpdateForm(GroupForm):
     user_ids: Optional[list[str]] = None
 
 
+####################
+# Membership Cache
+####################
+
+GROUP_MEMBERSHIP_CACHE_MAX_SIZE = 10000
+
+
+class GroupMembershipCache:
+    """
+    Short-lived cache of the groups each user is a member of, used by the
+    access checks that run several times per request. Any group write in this
+    process clears the whole cache, since it can change the permissions of
+    every member; other workers see the change after at most
+    GROUP_MEMBERSHIP_CACHE_TTL seconds.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.groups: dict[str, tuple[float, list[GroupModel]]] = {}
+
+    def get(self, user_id: str) -> Optional[list[GroupModel]]:
+        with self.lock:
+            entry = self.groups.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                self.groups.pop(user_id, None)
+                return None
+            return entry[1]
+
+    def set(self, user_id: str, groups: list[GroupModel]):
+        if self.ttl <= 0:
+            return
+
+        with self.lock:
+            if len(self.groups) >= GROUP_MEMBERSHIP_CACHE_MAX_SIZE:
+                self.groups.clear()
+            self.groups[user_id] = (time.monotonic(), groups)
+
+    def clear(self):
+        with self.lock:
+            self.groups.clear()
+
+
 class GroupTable:
+    def __init__(self):
+        self.cache = GroupMembershipCache(GROUP_MEMBERSHIP_CACHE_TTL)
+
+    def _set_group_members(self, db, group_id: str, user_ids: list[str]):
+        # Keeps the group_member rows in step with Group.user_ids; the caller
+        # commits both in the same transaction.
+        db.query(GroupMember).filter_by(group_id=group_id).delete()
+        db.add_all(
+            [
+                GroupMember(
+                    group_id=group_id,
+                    user_id=user_id,
+                    created_at=int(time.time()),
+                )
+                for user_id in dict.fromkeys(user_ids)
+            ]
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -105,7 +185,9 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._set_group_members(db, group.id, group.user_ids)
                 db.commit()
+                self.cache.clear()
                 db.refresh(result)
                 if result:
                     return GroupModel.model_validate(result)
@@ -127,16 +209,22 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_cached_groups_by_member_id(self, user_id: str) -> list[GroupModel]:
+        groups = self.cache.get(user_id)
+        if groups is None:
+            groups = self.get_groups_by_member_id(user_id)
+            self.cache.set(user_id, groups)
+        return groups
+
+    def get_group_ids_by_member_id(self, user_id: str) -> set[str]:
+        return {group.id for group in self.get_cached_groups_by_member_id(user_id)}
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -163,7 +251,10 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
                 db.commit()
+                self.cache.clear()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -173,7 +264,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                self.cache.clear()
                 return True
         except Exception:
             return False
@@ -182,7 +275,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                self.cache.clear()
 
                 return True
             except Exception:
@@ -201,7 +296,10 @@ class GroupTable:
                             "updated_at": int(time.time()),
                         }
                     )
-                    db.commit()
+
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                self.cache.clear()
 
                 return True
             except Exception:
@@ -214,6 +214,13 @@ class ModelsTable:
         except Exception:
             return None
 
+    def get_models_by_ids(self, ids: list[str]) -> list[ModelModel]:
+        with get_db() as db:
+            return [
+                ModelModel.model_validate(model)
+                for model in db.query(Model).filter(Model.id.in_(ids)).all()
+            ]
+
     def toggle_model_by_id(self, id: str) -> Optional[ModelModel]:
         with get_db() as db:
             try:
@@ -1,8 +1,10 @@
 import logging
+import threading
 import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import USER_CACHE_TTL
 from open_webui.utils.encryption import ENABLE_CHAT_ENCRYPTION, create_user_key_ref
 
 log = logging.getLogger(__name__)
@@ -107,7 +109,68 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# User Cache
+####################
+
+USER_CACHE_MAX_SIZE = 10000
+
+
+class UserCache:
+    """
+    Short-lived cache of the users resolved during authentication, keyed by
+    id and by API key. Entries are dropped whenever the user is updated in
+    this process; other workers see the change after at most USER_CACHE_TTL
+    seconds.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.users: dict[str, tuple[float, UserModel]] = {}
+        self.api_keys: dict[str, str] = {}
+
+    def get(self, id: str) -> Optional[UserModel]:
+        with self.lock:
+            entry = self.users.get(id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                self.users.pop(id, None)
+                return None
+            return entry[1]
+
+    def get_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        id = self.api_keys.get(api_key)
+        return self.get(id) if id else None
+
+    def set(self, user: UserModel, api_key: Optional[str] = None):
+        if self.ttl <= 0:
+            return
+
+        with self.lock:
+            if len(self.users) >= USER_CACHE_MAX_SIZE:
+                self.users.clear()
+                self.api_keys.clear()
+
+            self.users[user.id] = (time.monotonic(), user)
+            if api_key:
+                self.api_keys[api_key] = user.id
+
+    def invalidate(self, id: str):
+        with self.lock:
+            self.users.pop(id, None)
+            for api_key in [k for k, v in self.api_keys.items() if v == id]:
+                self.api_keys.pop(api_key, None)
+
+
 class UsersTable:
+    def __init__(self):
+        self.cache = UserCache(USER_CACHE_TTL)
+        # Ids of users seen since the last flush of last_active_at
+        self.active_user_ids: set[str] = set()
+        self.active_user_ids_lock = threading.Lock()
+
     def insert_new_user(
         self,
         id: str,
@@ -161,6 +224,22 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        user = self.cache.get(id)
+        if user is None:
+            user = self.get_user_by_id(id)
+            if user:
+                self.cache.set(user)
+        return user
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        user = self.cache.get_by_api_key(api_key)
+        if user is None:
+            user = self.get_user_by_api_key(api_key)
+            if user:
+                self.cache.set(user, api_key=api_key)
+        return user
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -239,6 +318,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.cache.invalidate(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -253,6 +333,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -272,6 +353,30 @@ class UsersTable:
         except Exception:
             return None
 
+    def mark_user_active_by_id(self, id: str):
+        # Written in batches by flush_user_last_active
+        with self.active_user_ids_lock:
+            self.active_user_ids.add(id)
+
+    def flush_user_last_active(self) -> int:
+        with self.active_user_ids_lock:
+            ids = list(self.active_user_ids)
+            self.active_user_ids.clear()
+
+        if not ids:
+            return 0
+
+        try:
+            with get_db() as db:
+                db.query(User).filter(User.id.in_(ids)).update(
+                    {"last_active_at": int(time.time())}, synchronize_session=False
+                )
+                db.commit()
+            return len(ids)
+        except Exception as e:
+            log.exception(f"Error updating last active timestamps: {e}")
+            return 0
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -279,6 +384,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -290,6 +396,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -309,6 +416,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -327,6 +435,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                self.cache.invalidate(id)
 
                 return True
             else:
@@ -339,6 +448,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                self.cache.invalidate(id)
                 return True if result == 1 else False
         except Exception:
             return False
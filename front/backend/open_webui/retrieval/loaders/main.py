@@ -2,23 +2,8 @@ import requests
 import logging
 import ftfy
 import sys
+from typing import Iterator
 
-from langchain_community.document_loaders import (
-    AzureAIDocumentIntelligenceLoader,
-    BSHTMLLoader,
-    CSVLoader,
-    Docx2txtLoader,
-    OutlookMessageLoader,
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredEPubLoader,
-    UnstructuredExcelLoader,
-    UnstructuredMarkdownLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredRSTLoader,
-    UnstructuredXMLLoader,
-    YoutubeLoader,
-)
 from langchain_core.documents import Document
 
 from open_webui.retrieval.loaders.mistral import MistralLoader
@@ -184,12 +169,44 @@ class Loader:
             for doc in docs
         ]
 
+    def lazy_load(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> Iterator[Document]:
+        """
+        Yields the documents one at a time for loaders that can extract them
+        incrementally (e.g. PDF pages), falling back to `load` otherwise.
+        """
+        loader = self._get_loader(filename, file_content_type, file_path)
+        docs = loader.lazy_load() if hasattr(loader, "lazy_load") else loader.load()
+
+        for doc in docs:
+            yield Document(
+                page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
+            )
+
     def _is_text_file(self, file_ext: str, file_content_type: str) -> bool:
         return file_ext in known_source_ext or (
             file_content_type and file_content_type.find("text/") >= 0
         )
 
     def _get_loader(self, filename: str, file_content_type: str, file_path: str):
+        # Imported here since langchain_community takes seconds to import
+        from langchain_community.document_loaders import (
+            AzureAIDocumentIntelligenceLoader,
+            BSHTMLLoader,
+            CSVLoader,
+            Docx2txtLoader,
+            OutlookMessageLoader,
+            PyPDFLoader,
+            TextLoader,
+            UnstructuredEPubLoader,
+            UnstructuredExcelLoader,
+            UnstructuredMarkdownLoader,
+            UnstructuredPowerPointLoader,
+            UnstructuredRSTLoader,
+            UnstructuredXMLLoader,
+        )
+
         file_ext = filename.split(".")[-1].lower()
 
         if self.engine == "tika" and self.kwargs.get("TIKA_SERVER_URL"):
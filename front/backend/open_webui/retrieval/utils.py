@@ -1,6 +1,9 @@
+import json
 import logging
 import os
-from typing import Optional, Union
+import queue
+import threading
+from typing import Iterable, Iterator, Optional, Union
 
 import requests
 import hashlib
@@ -355,6 +358,51 @@ def query_collection_with_hybrid_search(
     return merge_and_sort_query_results(results, k=k)
 
 
+def iter_docs_in_background(
+    docs: Iterable[Document], max_size: int
+) -> Iterator[Document]:
+    """
+    Iterates over `docs` on a worker thread so extraction overlaps with the
+    consumer, keeping at most `max_size` documents buffered ahead of it.
+    """
+    docs_queue = queue.Queue(maxsize=max(max_size, 1))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                docs_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for doc in docs:
+                if not put(doc):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = docs_queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblocks the producer if the consumer stops early
+        stop.set()
+
+
 def get_embedding_function(
     embedding_engine,
     embedding_model,
@@ -400,6 +448,11 @@ def get_embedding_function(
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
 
+# Collections shared by the files with the same content, which hold no
+# per-file metadata (see get_shared_file_collection_name)
+SHARED_FILE_COLLECTION_PREFIX = "file-shared-"
+
+
 def get_sources_from_files(
     request,
     files,
@@ -543,6 +596,17 @@ def get_sources_from_files(
                 except Exception as e:
                     log.exception(e)
 
+            if context and any(
+                name.startswith(SHARED_FILE_COLLECTION_PREFIX)
+                for name in collection_names
+            ):
+                name = file.get("name") or (file.get("file") or {}).get("filename")
+                for metadatas in context.get("metadatas", []):
+                    for metadata in metadatas:
+                        metadata.update(
+                            {"file_id": file.get("id"), "name": name, "source": name}
+                        )
+
             extracted_collections.extend(collection_names)
 
         if context:
@@ -571,6 +635,45 @@ def get_sources_from_files(
     return sources
 
 
+def merge_sources(sources: list[dict], other_sources: list[dict], k: int) -> list[dict]:
+    """
+    Merges two retrievals over the same files, e.g. for different queries.
+    Query results for the same file are combined and re-sorted with
+    `merge_and_sort_query_results`; other sources are kept once.
+    """
+
+    def get_source_key(source: dict) -> str:
+        return json.dumps(source.get("source"), sort_keys=True, default=str)
+
+    merged = {get_source_key(source): source for source in sources}
+    for source in other_sources:
+        key = get_source_key(source)
+        existing = merged.get(key)
+
+        if existing is None:
+            merged[key] = source
+        elif "distances" in existing and "distances" in source:
+            result = merge_and_sort_query_results(
+                [
+                    {
+                        "distances": [s["distances"]],
+                        "documents": [s["document"]],
+                        "metadatas": [s["metadata"]],
+                    }
+                    for s in [existing, source]
+                ],
+                k=k,
+            )
+            merged[key] = {
+                **existing,
+                "document": result["documents"][0],
+                "metadata": result["metadatas"][0],
+                "distances": result["distances"][0],
+            }
+
+    return list(merged.values())
+
+
 def get_model_path(model: str, update_model: bool = False):
     # Construct huggingface_hub kwargs with local_files_only to return the snapshot path
     cache_dir = os.getenv("SENTENCE_TRANSFORMERS_HOME")
@@ -20,6 +20,10 @@ elif VECTOR_DB == "elasticsearch":
     from open_webui.retrieval.vector.dbs.elasticsearch import ElasticsearchClient
 
     VECTOR_DB_CLIENT = ElasticsearchClient()
+elif VECTOR_DB == "local":
+    from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+    VECTOR_DB_CLIENT = LocalVectorClient()
 else:
     from open_webui.retrieval.vector.dbs.chroma import ChromaClient
 
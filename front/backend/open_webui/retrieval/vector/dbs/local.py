@@ -0,0 +1,659 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from open_webui.config import (
+    LOCAL_VECTOR_DB_PATH,
+    LOCAL_VECTOR_DB_QUANTIZATION,
+    LOCAL_VECTOR_DB_SEGMENT_ROWS,
+    LOCAL_VECTOR_DB_HNSW_THRESHOLD,
+    LOCAL_VECTOR_DB_COMPACTION_RATIO,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import fcntl
+except ImportError:  # Windows, only a single process can write safely
+    fcntl = None
+
+try:
+    # Ships with chromadb as chroma-hnswlib
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Rows multiplied at once during brute-force search, bounds temporary memory
+SEARCH_BLOCK_ROWS = 4096
+
+# Compaction is not worth it for a handful of deleted rows
+COMPACTION_MIN_DELETED_ROWS = 1024
+
+INT8_SCALE = 127.0
+
+
+def match_filter(metadata: dict, filter: dict) -> bool:
+    # Supports the subset of the Chroma "where" syntax used by Open WebUI
+    for key, value in filter.items():
+        if key == "$and":
+            if not all(match_filter(metadata, f) for f in value):
+                return False
+        elif key == "$or":
+            if not any(match_filter(metadata, f) for f in value):
+                return False
+        elif isinstance(value, dict):
+            field = metadata.get(key)
+            for op, operand in value.items():
+                if op == "$eq" and field != operand:
+                    return False
+                if op == "$ne" and field == operand:
+                    return False
+                if op == "$in" and field not in operand:
+                    return False
+                if op == "$nin" and field in operand:
+                    return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+class LocalCollection:
+    """
+    A collection stored as append-only segments in its own directory:
+
+    - `manifest.json` lists the segments, the vector dimension and dtype and
+      the deleted row numbers. It is replaced atomically and is the commit
+      point of every write.
+    - `<segment>.vec` holds the normalized vectors as raw rows, memory-mapped
+      for search.
+    - `<segment>.jsonl` is the sidecar with the id, text and metadata of each
+      row.
+
+    Rows are numbered across segments in order. Upserts append a new row and
+    mark the previous one as deleted; compaction rewrites the live rows into
+    fresh segments.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.manifest_mtime = None
+        self._clear()
+
+    def _clear(self):
+        self.manifest = None
+        self.vectors: list[np.ndarray] = []
+        self.segment_starts: list[int] = []
+        self.ids: list[str] = []
+        self.texts: list[str] = []
+        self.metadatas: list[dict] = []
+        self.deleted: set[int] = set()
+        self.id_to_row: dict[str, int] = {}
+        self.deleted_mask: Optional[np.ndarray] = None
+        self.hnsw_index = None
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    @property
+    def dtype(self):
+        return np.int8 if self.manifest["dtype"] == "int8" else np.float32
+
+    ####################
+    # Loading
+    ####################
+
+    def _open_segment(self, segment: dict) -> np.ndarray:
+        shape = (segment["rows"], self.manifest["dimension"])
+        if segment["rows"] == 0:
+            return np.empty(shape, dtype=self.dtype)
+        return np.memmap(
+            self.path / f"{segment['name']}.vec",
+            dtype=self.dtype,
+            mode="r",
+            shape=shape,
+        )
+
+    def _load(self):
+        self._clear()
+        self.manifest = json.loads(self.manifest_path.read_text())
+
+        for segment in self.manifest["segments"]:
+            self.segment_starts.append(len(self.ids))
+            self.vectors.append(self._open_segment(segment))
+
+            with open(self.path / f"{segment['name']}.jsonl", "rb") as f:
+                data = f.read(segment["text_bytes"])
+            for line in data.splitlines():
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.texts.append(row["text"])
+                self.metadatas.append(row["metadata"])
+
+        self.deleted = set(self.manifest["deleted"])
+        self.id_to_row = {
+            id: row for row, id in enumerate(self.ids) if row not in self.deleted
+        }
+
+    def refresh(self):
+        # Picks up writes made by other processes sharing the directory
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.manifest_mtime = None
+            self._clear()
+            return
+
+        if mtime != self.manifest_mtime:
+            self._load()
+            self.manifest_mtime = mtime
+
+    def exists(self) -> bool:
+        with self.lock:
+            self.refresh()
+            return self.manifest is not None
+
+    ####################
+    # Writing
+    ####################
+
+    @contextmanager
+    def write_lock(self):
+        with self.lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.path / ".lock", "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_manifest(self):
+        self.manifest["deleted"] = sorted(self.deleted)
+
+        tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.manifest))
+        os.replace(tmp_path, self.manifest_path)
+
+        self.manifest_mtime = self.manifest_path.stat().st_mtime_ns
+
+    def _append_rows(self, vectors: np.ndarray, rows: list[dict]) -> list[int]:
+        """Appends rows to the segment files; returns the touched segments."""
+        touched = []
+        offset = 0
+
+        while offset < len(rows):
+            segments = self.manifest["segments"]
+            if not segments or segments[-1]["rows"] >= LOCAL_VECTOR_DB_SEGMENT_ROWS:
+                segments.append(
+                    {
+                        "name": f"{self.manifest['next_segment']:06d}",
+                        "rows": 0,
+                        "text_bytes": 0,
+                    }
+                )
+                self.manifest["next_segment"] += 1
+
+            segment = segments[-1]
+            count = min(
+                LOCAL_VECTOR_DB_SEGMENT_ROWS - segment["rows"], len(rows) - offset
+            )
+            vec_path = self.path / f"{segment['name']}.vec"
+            text_path = self.path / f"{segment['name']}.jsonl"
+
+            data = b"".join(
+                (json.dumps(row, default=str) + "\n").encode("utf-8")
+                for row in rows[offset : offset + count]
+            )
+
+            # Drop anything past the last commit left by an interrupted write
+            row_bytes = self.manifest["dimension"] * np.dtype(self.dtype).itemsize
+            for path, size in [
+                (vec_path, segment["rows"] * row_bytes),
+                (text_path, segment["text_bytes"]),
+            ]:
+                with open(path, "ab") as f:
+                    f.truncate(size)
+
+            with open(vec_path, "ab") as f:
+                f.write(
+                    np.ascontiguousarray(vectors[offset : offset + count]).tobytes()
+                )
+            with open(text_path, "ab") as f:
+                f.write(data)
+
+            segment["rows"] += count
+            segment["text_bytes"] += len(data)
+            touched.append(len(segments) - 1)
+            offset += count
+
+        return touched
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.manifest["dtype"] == "int8":
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors
+
+    def _decode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.manifest["dtype"] == "int8":
+            vectors = vectors / INT8_SCALE
+        return vectors
+
+    def upsert(self, items: list[VectorItem]):
+        vectors = normalize(np.asarray([item["vector"] for item in items]))
+
+        with self.write_lock():
+            if self.manifest is None:
+                self.manifest = {
+                    "dimension": vectors.shape[1],
+                    "dtype": (
+                        "int8" if LOCAL_VECTOR_DB_QUANTIZATION == "int8" else "float32"
+                    ),
+                    "segments": [],
+                    "next_segment": 0,
+                    "deleted": [],
+                }
+
+            if vectors.shape[1] != self.manifest["dimension"]:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match the "
+                    f"collection dimension {self.manifest['dimension']}"
+                )
+
+            touched = self._append_rows(
+                self._encode(vectors),
+                [
+                    {
+                        "id": item["id"],
+                        "text": item["text"],
+                        "metadata": item["metadata"],
+                    }
+                    for item in items
+                ],
+            )
+
+            replaced = []
+            for item in items:
+                row = len(self.ids)
+                previous = self.id_to_row.get(item["id"])
+                if previous is not None:
+                    self.deleted.add(previous)
+                    replaced.append(previous)
+
+                self.ids.append(item["id"])
+                self.texts.append(item["text"])
+                self.metadatas.append(item["metadata"])
+                self.id_to_row[item["id"]] = row
+
+            self._write_manifest()
+
+            for idx in touched:
+                segment = self._open_segment(self.manifest["segments"][idx])
+                if idx < len(self.vectors):
+                    self.vectors[idx] = segment
+                else:
+                    self.segment_starts.append(
+                        self.segment_starts[-1] + len(self.vectors[-1])
+                        if self.vectors
+                        else 0
+                    )
+                    self.vectors.append(segment)
+            self.deleted_mask = None
+
+            if self.hnsw_index is not None:
+                rows = np.arange(len(self.ids) - len(items), len(self.ids))
+                self.hnsw_index.resize_index(max(len(self.ids), 1))
+                self.hnsw_index.add_items(vectors, rows)
+                self._mark_hnsw_deleted(replaced)
+
+    def delete(self, ids: Optional[list[str]] = None, filter: Optional[dict] = None):
+        with self.write_lock():
+            if self.manifest is None:
+                return
+
+            if ids:
+                rows = [self.id_to_row[id] for id in ids if id in self.id_to_row]
+            elif filter:
+                rows = [
+                    row
+                    for row in self.id_to_row.values()
+                    if match_filter(self.metadatas[row], filter)
+                ]
+            else:
+                return
+
+            if not rows:
+                return
+
+            for row in rows:
+                self.deleted.add(row)
+                self.id_to_row.pop(self.ids[row], None)
+
+            self._write_manifest()
+            self.deleted_mask = None
+            self._mark_hnsw_deleted(rows)
+
+    def needs_compaction(self) -> bool:
+        with self.lock:
+            return (
+                self.manifest is not None
+                and len(self.deleted) >= COMPACTION_MIN_DELETED_ROWS
+                and len(self.deleted) > LOCAL_VECTOR_DB_COMPACTION_RATIO * len(self.ids)
+            )
+
+    def compact(self):
+        with self.write_lock():
+            if self.manifest is None or not self.deleted:
+                return
+
+            old_segments = self.manifest["segments"]
+            log.info(
+                f"compacting {self.path.name}: {len(self.id_to_row)} live rows, "
+                f"{len(self.deleted)} deleted"
+            )
+
+            deleted_mask = self._get_deleted_mask()
+            self.manifest["segments"] = []
+            for start, segment in zip(self.segment_starts, self.vectors):
+                rows = np.arange(start, start + len(segment))
+                live = ~deleted_mask[rows]
+                if not live.any():
+                    continue
+
+                self._append_rows(
+                    np.asarray(segment)[live],
+                    [
+                        {
+                            "id": self.ids[row],
+                            "text": self.texts[row],
+                            "metadata": self.metadatas[row],
+                        }
+                        for row in rows[live]
+                    ],
+                )
+
+            self.deleted = set()
+            self._write_manifest()
+
+            # Other processes keep their mappings of the old files until they
+            # notice the new manifest, which is fine on POSIX
+            for segment in old_segments:
+                for suffix in [".vec", ".jsonl"]:
+                    (self.path / f"{segment['name']}{suffix}").unlink(missing_ok=True)
+
+            self._load()
+
+    ####################
+    # Reading
+    ####################
+
+    def _get_deleted_mask(self) -> np.ndarray:
+        if self.deleted_mask is None or len(self.deleted_mask) != len(self.ids):
+            mask = np.zeros(len(self.ids), dtype=bool)
+            if self.deleted:
+                mask[list(self.deleted)] = True
+            self.deleted_mask = mask
+        return self.deleted_mask
+
+    def _mark_hnsw_deleted(self, rows: list[int]):
+        if self.hnsw_index is None:
+            return
+        for row in rows:
+            try:
+                self.hnsw_index.mark_deleted(row)
+            except RuntimeError:
+                pass
+
+    def _get_hnsw_index(self):
+        if (
+            hnswlib is None
+            or LOCAL_VECTOR_DB_HNSW_THRESHOLD <= 0
+            or len(self.id_to_row) < LOCAL_VECTOR_DB_HNSW_THRESHOLD
+        ):
+            return None
+
+        if self.hnsw_index is None:
+            log.info(f"building HNSW index for {self.path.name}")
+            index = hnswlib.Index(space="ip", dim=self.manifest["dimension"])
+            index.init_index(max_elements=len(self.ids), ef_construction=200, M=16)
+
+            deleted_mask = self._get_deleted_mask()
+            for start, segment in zip(self.segment_starts, self.vectors):
+                for offset in range(0, len(segment), SEARCH_BLOCK_ROWS):
+                    rows = np.arange(
+                        start + offset,
+                        start + min(offset + SEARCH_BLOCK_ROWS, len(segment)),
+                    )
+                    live = ~deleted_mask[rows]
+                    if live.any():
+                        block = self._decode(segment[offset : offset + len(rows)])
+                        index.add_items(block[live], rows[live])
+
+            self.hnsw_index = index
+        return self.hnsw_index
+
+    def _search_brute_force(
+        self, queries: np.ndarray, limit: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        deleted_mask = self._get_deleted_mask()
+
+        for start, segment in zip(self.segment_starts, self.vectors):
+            for offset in range(0, len(segment), SEARCH_BLOCK_ROWS):
+                block = self._decode(segment[offset : offset + SEARCH_BLOCK_ROWS])
+                rows = np.arange(start + offset, start + offset + len(block))
+
+                scores = queries @ block.T
+                scores[:, deleted_mask[rows]] = -np.inf
+
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_rows = np.concatenate(
+                    [best_rows, np.broadcast_to(rows, scores.shape)], axis=1
+                )
+
+                if best_scores.shape[1] > limit:
+                    top = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+                    best_scores = np.take_along_axis(best_scores, top, axis=1)
+                    best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return (
+            np.take_along_axis(best_scores, order, axis=1),
+            np.take_along_axis(best_rows, order, axis=1),
+        )
+
+    def search(
+        self, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        queries = normalize(np.asarray(vectors))
+
+        with self.lock:
+            self.refresh()
+            if self.manifest is None:
+                return None
+
+            limit = min(limit, len(self.id_to_row))
+            if limit <= 0:
+                return SearchResult(
+                    ids=[[] for _ in vectors],
+                    documents=[[] for _ in vectors],
+                    metadatas=[[] for _ in vectors],
+                    distances=[[] for _ in vectors],
+                )
+
+            index = self._get_hnsw_index()
+            if index is not None:
+                index.set_ef(max(limit * 4, 64))
+                rows, distances = index.knn_query(queries, k=limit)
+                scores = 1 - distances
+            else:
+                scores, rows = self._search_brute_force(queries, limit)
+
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for query_scores, query_rows in zip(scores, rows):
+                hits = [
+                    (float(score), int(row))
+                    for score, row in zip(query_scores, query_rows)
+                    if np.isfinite(score)
+                ]
+                result["ids"].append([self.ids[row] for _, row in hits])
+                result["documents"].append([self.texts[row] for _, row in hits])
+                result["metadatas"].append([self.metadatas[row] for _, row in hits])
+                # Cosine similarity mapped to 0 (worst) -> 1 (best), as for Chroma
+                result["distances"].append([(1 + score) / 2 for score, _ in hits])
+
+            return SearchResult(**result)
+
+    def get(
+        self, filter: Optional[dict] = None, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        with self.lock:
+            self.refresh()
+            if self.manifest is None:
+                return None
+
+            rows = []
+            for row in sorted(self.id_to_row.values()):
+                if limit is not None and len(rows) >= limit:
+                    break
+                if filter is None or match_filter(self.metadatas[row], filter):
+                    rows.append(row)
+
+            return GetResult(
+                ids=[[self.ids[row] for row in rows]],
+                documents=[[self.texts[row] for row in rows]],
+                metadatas=[[self.metadatas[row] for row in rows]],
+            )
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class LocalVectorClient:
+    """
+    Embedded vector store for single-instance deployments that do not want to
+    run a separate vector database. Search is an exact matrix product over
+    memory-mapped segments, switching to an in-memory HNSW graph for
+    collections above LOCAL_VECTOR_DB_HNSW_THRESHOLD rows when hnswlib is
+    available.
+    """
+
+    def __init__(self):
+        self.path = Path(LOCAL_VECTOR_DB_PATH)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.collections: dict[str, LocalCollection] = {}
+        self.collections_lock = threading.Lock()
+        self.compacting: set[str] = set()
+
+    def _get_collection_path(self, collection_name: str) -> Path:
+        if re.fullmatch(r"[A-Za-z0-9_.-]{1,128}", collection_name):
+            return self.path / collection_name
+        return self.path / hashlib.sha256(collection_name.encode()).hexdigest()
+
+    def _get_collection(self, collection_name: str) -> LocalCollection:
+        path = self._get_collection_path(collection_name)
+        with self.collections_lock:
+            collection = self.collections.get(path.name)
+            if collection is None:
+                collection = LocalCollection(path)
+                self.collections[path.name] = collection
+            return collection
+
+    def _compact_in_background(self, collection_name: str):
+        collection = self._get_collection(collection_name)
+        if collection_name in self.compacting or not collection.needs_compaction():
+            return
+
+        def compact():
+            try:
+                collection.compact()
+            except Exception as e:
+                log.exception(f"Error compacting collection {collection_name}: {e}")
+            finally:
+                self.compacting.discard(collection_name)
+
+        self.compacting.add(collection_name)
+        threading.Thread(target=compact, daemon=True).start()
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self._get_collection(collection_name).exists()
+
+    def delete_collection(self, collection_name: str):
+        collection = self._get_collection(collection_name)
+        with collection.lock:
+            shutil.rmtree(collection.path, ignore_errors=True)
+            collection.refresh()
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            return self._get_collection(collection_name).search(vectors, limit)
+        except Exception as e:
+            log.exception(f"Error searching collection {collection_name}: {e}")
+            return None
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            return self._get_collection(collection_name).get(filter=filter, limit=limit)
+        except Exception as e:
+            log.exception(f"Error querying collection {collection_name}: {e}")
+            return None
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self._get_collection(collection_name).get()
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        if items:
+            self._get_collection(collection_name).upsert(items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        if items:
+            self._get_collection(collection_name).upsert(items)
+            self._compact_in_background(collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        self._get_collection(collection_name).delete(ids=ids, filter=filter)
+        self._compact_in_background(collection_name)
+
+    def reset(self):
+        # Resets the database. This will delete all collections and item entries.
+        with self.collections_lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            for collection in self.collections.values():
+                with collection.lock:
+                    collection.refresh()
@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+import aiohttp
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+from open_webui.config import (
+    WEB_LOADER_CACHE_DIR,
+    WEB_LOADER_CACHE_MAX_SIZE,
+    WEB_LOADER_CACHE_TTL,
+    WEB_LOADER_ENGINE,
+    WEB_SEARCH_CACHE_TTL,
+)
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.utils import (
+    extract_metadata,
+    get_web_loader,
+    safe_validate_urls,
+)
+from open_webui.utils.disk_cache import DiskCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+####################
+# Search Results Cache
+####################
+
+SEARCH_RESULTS_CACHE_MAX_SIZE = 1024
+
+SEARCH_RESULTS_CACHE: OrderedDict[tuple[str, str], tuple[float, list[SearchResult]]] = (
+    OrderedDict()
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def get_cached_search_results(engine: str, query: str) -> Optional[list[SearchResult]]:
+    key = (engine, normalize_query(query))
+    entry = SEARCH_RESULTS_CACHE.get(key)
+    if entry is None:
+        return None
+
+    cached_at, results = entry
+    if time.time() - cached_at > WEB_SEARCH_CACHE_TTL:
+        SEARCH_RESULTS_CACHE.pop(key, None)
+        return None
+
+    SEARCH_RESULTS_CACHE.move_to_end(key)
+    return results
+
+
+def set_cached_search_results(engine: str, query: str, results: list[SearchResult]):
+    if WEB_SEARCH_CACHE_TTL <= 0:
+        return
+
+    key = (engine, normalize_query(query))
+    SEARCH_RESULTS_CACHE[key] = (time.time(), results)
+    SEARCH_RESULTS_CACHE.move_to_end(key)
+
+    while len(SEARCH_RESULTS_CACHE) > SEARCH_RESULTS_CACHE_MAX_SIZE:
+        SEARCH_RESULTS_CACHE.popitem(last=False)
+
+
+def clear_search_results_cache():
+    SEARCH_RESULTS_CACHE.clear()
+
+
+####################
+# Page Cache
+####################
+
+
+class CachedPage(BaseModel):
+    url: str
+    content: str
+    metadata: dict
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: int  # timestamp in epoch
+
+    def to_document(self) -> Document:
+        return Document(page_content=self.content, metadata=self.metadata)
+
+
+class WebPageCache(DiskCache):
+    """
+    Fetched pages on disk, stored as <directory>/<key[:2]>/<key>.json by the
+    hash of their URL.
+
+    Pages are indexed as (size, last used), rebuilt from the directory when
+    first used (the modification time of a page is its last use). Stale
+    pages are revalidated with the site rather than expired, so ttl only
+    removes the pages nobody asked for in that time.
+    """
+
+    def get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def scan_entries(self) -> list[tuple[float, str, tuple[Any, float]]]:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, (stat.st_size, stat.st_mtime)))
+        return entries
+
+    def index_entry(self, key: str, entry: tuple[int, float]):
+        self.entries[key] = entry
+        self.size += entry[0]
+
+    def unindex_entry(self, key: str) -> list[Path]:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[0]
+        return [self.get_path(key)]
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        path = self.get_path(key)
+        try:
+            data = path.read_bytes()
+            page = CachedPage.model_validate_json(data)
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process, if it was indexed
+            self.remove(key)
+            return None
+        except Exception as e:
+            log.warning(f"Error reading cached page {path}: {e}")
+            self.remove(key)
+            return None
+
+        with self.lock:
+            self.load_entries()
+            # Possibly written by another process
+            self.unindex_entry(key)
+            self.index_entry(key, (len(data), time.time()))
+        return page
+
+    def set(self, key: str, page: CachedPage) -> CachedPage:
+        data = page.model_dump_json().encode()
+        self.write_file(self.get_path(key), data)
+
+        with self.lock:
+            self.load_entries()
+            # Overwritten in place, so there are no files to remove
+            self.unindex_entry(key)
+            self.index_entry(key, (len(data), time.time()))
+
+        self.evict(keep=key)
+        return page
+
+
+WEB_PAGE_CACHE = WebPageCache(
+    WEB_LOADER_CACHE_DIR, WEB_LOADER_CACHE_MAX_SIZE * 1024 * 1024, WEB_LOADER_CACHE_TTL
+)
+
+
+def get_page_cache_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def get_cached_page(url: str) -> Optional[CachedPage]:
+    return WEB_PAGE_CACHE.get(get_page_cache_key(url))
+
+
+def set_cached_page(page: CachedPage):
+    WEB_PAGE_CACHE.set(get_page_cache_key(page.url), page)
+
+
+WEB_PAGE_SESSION: Optional[aiohttp.ClientSession] = None
+WEB_PAGE_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_web_page_session(trust_env: bool = False) -> aiohttp.ClientSession:
+    """Returns the session shared by all cached page revalidations."""
+    global WEB_PAGE_SESSION, WEB_PAGE_SESSION_LOOP
+
+    loop = asyncio.get_running_loop()
+    if (
+        WEB_PAGE_SESSION is None
+        or WEB_PAGE_SESSION.closed
+        or WEB_PAGE_SESSION_LOOP != loop
+        or WEB_PAGE_SESSION.trust_env != trust_env
+    ):
+        WEB_PAGE_SESSION = aiohttp.ClientSession(
+            trust_env=trust_env, timeout=aiohttp.ClientTimeout(total=10)
+        )
+        WEB_PAGE_SESSION_LOOP = loop
+    return WEB_PAGE_SESSION
+
+
+async def close_web_page_session():
+    global WEB_PAGE_SESSION
+    if WEB_PAGE_SESSION is not None and not WEB_PAGE_SESSION.closed:
+        await WEB_PAGE_SESSION.close()
+    WEB_PAGE_SESSION = None
+
+
+def parse_page(url: str, html: str) -> Document:
+    """Parses a page the way the safe_web loader does."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "xml" if url.endswith(".xml") else "html.parser")
+    return Document(page_content=soup.get_text(), metadata=extract_metadata(soup, url))
+
+
+async def revalidate_page(
+    page: CachedPage, verify_ssl: bool = True, trust_env: bool = False
+) -> Optional[CachedPage]:
+    """
+    Asks the site whether a stale cached page is still current using its
+    ETag / Last-Modified validators. Returns the page, renewed on 304 Not
+    Modified or replaced by the body of a 200 response when the web loader
+    would parse it the same way, or None to have it loaded again.
+    """
+    headers = {}
+    if page.etag:
+        headers["If-None-Match"] = page.etag
+    if page.last_modified:
+        headers["If-Modified-Since"] = page.last_modified
+    if not headers:
+        return None
+
+    try:
+        async with get_web_page_session(trust_env).get(
+            page.url, headers=headers, ssl=None if verify_ssl else False
+        ) as response:
+            if response.status == 304:
+                return page.model_copy(update={"fetched_at": int(time.time())})
+
+            if response.status == 200 and WEB_LOADER_ENGINE.value in ["", "safe_web"]:
+                doc = parse_page(page.url, await response.text())
+                if not doc.page_content:
+                    return None
+                return CachedPage(
+                    url=page.url,
+                    content=doc.page_content,
+                    metadata=doc.metadata,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    fetched_at=int(time.time()),
+                )
+    except Exception as e:
+        log.debug(f"Error revalidating cached page {page.url}: {e}")
+    return None
+
+
+async def load_web_pages(
+    urls: list[str],
+    verify_ssl: bool = True,
+    requests_per_second: int = 2,
+    trust_env: bool = False,
+) -> list[Document]:
+    """
+    Loads the given URLs, serving pages from the page cache while they are
+    fresh or confirmed unchanged by the site, and fetching only the rest.
+    Pages that could not be retrieved are left out, as with the web loader.
+    """
+    urls = list(dict.fromkeys(safe_validate_urls(urls)))
+
+    async def get_fresh_page(url: str) -> Optional[CachedPage]:
+        if WEB_LOADER_CACHE_TTL <= 0:
+            return None
+
+        page = await asyncio.to_thread(get_cached_page, url)
+        if page is None:
+            return None
+
+        if time.time() - page.fetched_at <= WEB_LOADER_CACHE_TTL:
+            return page
+
+        page = await revalidate_page(page, verify_ssl, trust_env)
+        if page is not None:
+            await asyncio.to_thread(set_cached_page, page)
+        return page
+
+    docs = {}
+    stale_urls = []
+    pages = await asyncio.gather(*[get_fresh_page(url) for url in urls])
+    for url, page in zip(urls, pages):
+        if page is None:
+            stale_urls.append(url)
+        else:
+            docs[url] = page.to_document()
+
+    log.debug(f"web page cache: {len(docs)} hits, {len(stale_urls)} misses")
+
+    if stale_urls:
+        loader = get_web_loader(
+            stale_urls,
+            verify_ssl=verify_ssl,
+            requests_per_second=requests_per_second,
+            trust_env=trust_env,
+        )
+        validators = getattr(loader, "response_validators", {})
+
+        for doc in await loader.aload():
+            url = doc.metadata.get("source")
+            docs[url if url in stale_urls else id(doc)] = doc
+
+            if WEB_LOADER_CACHE_TTL > 0 and url in stale_urls and doc.page_content:
+                await asyncio.to_thread(
+                    set_cached_page,
+                    CachedPage(
+                        url=url,
+                        content=doc.page_content,
+                        metadata=doc.metadata,
+                        etag=validators.get(url, {}).get("etag"),
+                        last_modified=validators.get(url, {}).get("last_modified"),
+                        fetched_at=int(time.time()),
+                    ),
+                )
+
+    # Keep the order of the search results; loaders that report a different
+    # source for a page are appended at the end
+    return [docs.pop(url) for url in urls if url in docs] + list(docs.values())
@@ -492,6 +492,8 @@ class SafeWebBaseLoader(WebBaseLoader):
         """
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
+        # ETag / Last-Modified of each fetched URL, used by the web page cache
+        self.response_validators: Dict[str, Dict[str, Optional[str]]] = {}
 
     async def _fetch(
         self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
@@ -511,6 +513,10 @@ class SafeWebBaseLoader(WebBaseLoader):
                     ) as response:
                         if self.raise_for_status:
                             response.raise_for_status()
+                        self.response_validators[url] = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
                         return await response.text()
                 except aiohttp.ClientConnectionError as e:
                     if i == retries - 1:
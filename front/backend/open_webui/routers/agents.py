@@ -20,9 +20,17 @@ from open_webui.models.registry import RegistryAgents
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.a2a_runtime import PROVIDER_DEFAULTS, run_agent_turn
+from open_webui.utils.models import MODEL_CATALOG
+from open_webui.utils.rate_limit import RateLimiter
+from open_webui.env import A2A_RATE_LIMIT, FETCH_WELL_KNOWN_RATE_LIMIT
 
 router = APIRouter()
 
+A2A_RATE_LIMITER = RateLimiter("a2a", A2A_RATE_LIMIT, default=(60, 60))
+FETCH_WELL_KNOWN_RATE_LIMITER = RateLimiter(
+    "fetch_well_known", FETCH_WELL_KNOWN_RATE_LIMIT, default=(30, 60)
+)
+
 ############################
 # JSON-RPC Message Models
 ############################
@@ -100,6 +108,7 @@ async def get_agent_by_id(agent_id: str, user=Depends(get_verified_user)):
 
 @router.post("/register", response_model=AgentModel)
 async def register_agent(
+    request: Request,
     form_data: RegisterAgentForm,
     user=Depends(get_verified_user),
 ):
@@ -117,6 +126,7 @@ async def register_agent(
     )
 
     if agent:
+        await MODEL_CATALOG.patch_agents(request)
         return agent
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,6 +141,7 @@ async def register_agent(
 
 @router.post("/register-by-url", response_model=AgentModel)
 async def register_agent_by_url(
+    request: Request,
     form_data: RegisterAgentByUrlForm,
     user=Depends(get_verified_user),
 ):
@@ -197,6 +208,7 @@ async def register_agent_by_url(
         )
         
         if agent:
+            await MODEL_CATALOG.patch_agents(request)
             return agent
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -220,7 +232,9 @@ async def register_agent_by_url(
 ############################
 
 
-@router.get("/fetch-well-known")
+@router.get(
+    "/fetch-well-known", dependencies=[Depends(FETCH_WELL_KNOWN_RATE_LIMITER)]
+)
 async def fetch_agent_well_known(agent_url: str, user=Depends(get_verified_user)):
     """Fetch an agent's .well-known/agent.json file without registering"""
     if not agent_url:
@@ -257,6 +271,7 @@ async def fetch_agent_well_known(agent_url: str, user=Depends(get_verified_user)
 
 @router.patch("/{agent_id}", response_model=AgentModel)
 async def update_agent(
+    request: Request,
     agent_id: str,
     form_data: AgentUpdateForm,
     user=Depends(get_verified_user),
@@ -278,6 +293,7 @@ async def update_agent(
 
     updated_agent = Agents.update_agent_by_id(agent_id, form_data)
     if updated_agent:
+        await MODEL_CATALOG.patch_agents(request)
         return updated_agent
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -291,7 +307,9 @@ async def update_agent(
 
 
 @router.delete("/{agent_id}")
-async def delete_agent(agent_id: str, user=Depends(get_verified_user)):
+async def delete_agent(
+    request: Request, agent_id: str, user=Depends(get_verified_user)
+):
     """Delete an agent"""
     agent = Agents.get_agent_by_id(agent_id)
     if not agent:
@@ -309,6 +327,7 @@ async def delete_agent(agent_id: str, user=Depends(get_verified_user)):
 
     result = Agents.delete_agent_by_id(agent_id)
     if result:
+        await MODEL_CATALOG.patch_agents(request)
         return {"success": True, "message": "Agent deleted successfully"}
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -530,6 +549,7 @@ async def deploy_agent(
                 f"Deploy succeeded but registry publish failed for agent {agent_id}: {e}"
             )
 
+    await MODEL_CATALOG.patch_agents(request)
     return agent
 
 
@@ -548,7 +568,7 @@ async def get_internal_agent_card(request: Request, agent_id: str):
     return _internal_agent_card(agent, endpoint)
 
 
-@router.post("/{agent_id}/internal-a2a")
+@router.post("/{agent_id}/internal-a2a", dependencies=[Depends(A2A_RATE_LIMITER)])
 async def internal_agent_jsonrpc(agent_id: str, request: Request):
     """JSON-RPC handler for an internally-hosted agent. Public by A2A spec."""
     try:
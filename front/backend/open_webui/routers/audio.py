@@ -1,14 +1,16 @@
+import asyncio
 import hashlib
+import io
 import json
 import logging
 import os
+import shutil
 import uuid
 from functools import lru_cache
 from pathlib import Path
 from pydub import AudioSegment
 
 import aiohttp
-import aiofiles
 import requests
 import mimetypes
 
@@ -21,14 +23,23 @@ from fastapi import (
     status,
     APIRouter,
 )
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.speech_cache import SpeechCache
+from open_webui.utils.transcription import (
+    WHISPER_TRANSCRIBER,
+    get_cached_transcript,
+    get_transcript_cache_key,
+    set_cached_transcript,
+    set_faster_whisper_model,
+)
 from open_webui.config import (
+    AUDIO_TTS_CACHE_MAX_SIZE,
+    AUDIO_TTS_CACHE_TTL,
     WHISPER_MODEL_AUTO_UPDATE,
-    WHISPER_MODEL_DIR,
     CACHE_DIR,
 )
 
@@ -37,7 +48,6 @@ from open_webui.env import (
     AIOHTTP_CLIENT_TIMEOUT,
     ENV,
     SRC_LOG_LEVELS,
-    DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
 )
 
@@ -56,6 +66,10 @@ log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
 SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+SPEECH_CACHE = SpeechCache(
+    SPEECH_CACHE_DIR, AUDIO_TTS_CACHE_MAX_SIZE * 1024 * 1024, AUDIO_TTS_CACHE_TTL
+)
+
 
 ##########################################
 #
@@ -94,30 +108,6 @@ def convert_audio_to_wav(file_path, output_path, conversion_type):
     log.info(f"Converted {file_path} to {output_path}")
 
 
-def set_faster_whisper_model(model: str, auto_update: bool = False):
-    whisper_model = None
-    if model:
-        from faster_whisper import WhisperModel
-
-        faster_whisper_kwargs = {
-            "model_size_or_path": model,
-            "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
-            "compute_type": "int8",
-            "download_root": WHISPER_MODEL_DIR,
-            "local_files_only": not auto_update,
-        }
-
-        try:
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
-        except Exception:
-            log.warning(
-                "WhisperModel initialization failed, attempting download with local_files_only=False"
-            )
-            faster_whisper_kwargs["local_files_only"] = False
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
-    return whisper_model
-
-
 ##########################################
 #
 # Audio API
@@ -254,29 +244,11 @@ def load_speech_pipeline(request):
         )
 
 
-@router.post("/speech")
-async def speech(request: Request, user=Depends(get_verified_user)):
-    body = await request.body()
-    name = hashlib.sha256(
-        body
-        + str(request.app.state.config.TTS_ENGINE).encode("utf-8")
-        + str(request.app.state.config.TTS_MODEL).encode("utf-8")
-    ).hexdigest()
-
-    file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-    file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
-    # Check if the file already exists in the cache
-    if file_path.is_file():
-        return FileResponse(file_path)
+SPEECH_ENGINES = ["openai", "elevenlabs", "azure", "transformers"]
 
-    payload = None
-    try:
-        payload = json.loads(body.decode("utf-8"))
-    except Exception as e:
-        log.exception(e)
-        raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
+async def synthesize_speech(request: Request, payload: dict, user) -> bytes:
+    """Returns the audio for an OpenAI style speech payload."""
     if request.app.state.config.TTS_ENGINE == "openai":
         payload["model"] = request.app.state.config.TTS_MODEL
 
@@ -305,13 +277,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 ) as r:
                     r.raise_for_status()
 
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -360,13 +326,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 ) as r:
                     r.raise_for_status()
 
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -386,12 +346,6 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             )
 
     elif request.app.state.config.TTS_ENGINE == "azure":
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         region = request.app.state.config.TTS_AZURE_SPEECH_REGION
         language = request.app.state.config.TTS_VOICE
         locale = "-".join(request.app.state.config.TTS_VOICE.split("-")[:1])
@@ -416,13 +370,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 ) as r:
                     r.raise_for_status()
 
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-                    return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -442,13 +390,6 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             )
 
     elif request.app.state.config.TTS_ENGINE == "transformers":
-        payload = None
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         import torch
         import soundfile as sf
 
@@ -473,39 +414,89 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             forward_params={"speaker_embeddings": speaker_embedding},
         )
 
-        sf.write(file_path, speech["audio"], samplerate=speech["sampling_rate"])
+        buffer = io.BytesIO()
+        sf.write(
+            buffer,
+            speech["audio"],
+            samplerate=speech["sampling_rate"],
+            format="MP3",
+        )
+        return buffer.getvalue()
+
+
+@router.post("/speech")
+async def speech(request: Request, user=Depends(get_verified_user)):
+    if request.app.state.config.TTS_ENGINE not in SPEECH_ENGINES:
+        return None
+
+    body = await request.body()
+    name = hashlib.sha256(
+        body
+        + str(request.app.state.config.TTS_ENGINE).encode("utf-8")
+        + str(request.app.state.config.TTS_MODEL).encode("utf-8")
+    ).hexdigest()
+
+    async def create() -> tuple[bytes, dict]:
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except Exception as e:
+            log.exception(e)
+            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+        return await synthesize_speech(request, payload, user), payload
 
-        async with aiofiles.open(file_body_path, "w") as f:
-            await f.write(json.dumps(payload))
+    return FileResponse(await SPEECH_CACHE.get_or_create(name, create))
 
-        return FileResponse(file_path)
 
+@router.get("/speech/cache")
+async def get_speech_cache_metrics(user=Depends(get_admin_user)):
+    return await asyncio.to_thread(SPEECH_CACHE.get_metrics)
 
-def transcribe(request: Request, file_path):
+
+@router.delete("/speech/cache")
+async def clear_speech_cache(user=Depends(get_admin_user)):
+    await asyncio.to_thread(SPEECH_CACHE.clear)
+    return {"status": True}
+
+
+def get_transcription_settings(request: Request) -> dict:
+    """The settings a cached transcript was made with."""
+    config = request.app.state.config
+    settings = {"engine": config.STT_ENGINE}
+    if config.STT_ENGINE == "":
+        settings["model"] = config.WHISPER_MODEL
+        settings["vad_filter"] = config.WHISPER_VAD_FILTER
+    elif config.STT_ENGINE == "azure":
+        settings["locales"] = config.AUDIO_STT_AZURE_LOCALES
+    else:
+        settings["model"] = config.STT_MODEL
+    return settings
+
+
+def iter_transcription(request: Request, file_path):
+    """
+    Yields {"type": "segment"} events as the local whisper model transcribes
+    the recording, then a {"type": "done"} event with the transcript.
+    Transcripts are cached by the hash of the audio and the settings.
+    """
     log.info(f"transcribe: {file_path}")
     filename = os.path.basename(file_path)
     file_dir = os.path.dirname(file_path)
     id = filename.split(".")[0]
 
-    if request.app.state.config.STT_ENGINE == "":
-        if request.app.state.faster_whisper_model is None:
-            request.app.state.faster_whisper_model = set_faster_whisper_model(
-                request.app.state.config.WHISPER_MODEL
-            )
-
-        model = request.app.state.faster_whisper_model
-        segments, info = model.transcribe(
-            file_path,
-            beam_size=5,
-            vad_filter=request.app.state.config.WHISPER_VAD_FILTER,
-        )
-        log.info(
-            "Detected language '%s' with probability %f"
-            % (info.language, info.language_probability)
-        )
+    key = get_transcript_cache_key(file_path, get_transcription_settings(request))
+    data = get_cached_transcript(key)
+    if data is not None:
+        log.info(f"Reusing the cached transcript of {file_path}")
+        yield {"type": "done", "data": data}
+        return
 
-        transcript = "".join([segment.text for segment in list(segments)])
-        data = {"text": transcript.strip()}
+    if request.app.state.config.STT_ENGINE == "":
+        texts = []
+        for segment in WHISPER_TRANSCRIBER.iter_segments(request.app, file_path):
+            texts.append(segment["text"])
+            yield {"type": "segment", "data": segment}
+        data = {"text": "".join(texts).strip()}
 
         # save the transcript to a json file
         transcript_file = f"{file_dir}/{id}.json"
@@ -513,8 +504,28 @@ def transcribe(request: Request, file_path):
             json.dump(data, f)
 
         log.debug(data)
-        return data
-    elif request.app.state.config.STT_ENGINE == "openai":
+    else:
+        data = transcribe_with_engine(request, file_path)
+
+    set_cached_transcript(key, data)
+    yield {"type": "done", "data": data}
+
+
+def transcribe(request: Request, file_path):
+    data = None
+    for event in iter_transcription(request, file_path):
+        if event["type"] == "done":
+            data = event["data"]
+    return data
+
+
+def transcribe_with_engine(request: Request, file_path):
+    """Transcribes the recording with the configured external engine."""
+    filename = os.path.basename(file_path)
+    file_dir = os.path.dirname(file_path)
+    id = filename.split(".")[0]
+
+    if request.app.state.config.STT_ENGINE == "openai":
         audio_format = get_audio_format(file_path)
         if audio_format:
             os.rename(file_path, file_path.replace(".wav", f".{audio_format}"))
@@ -739,6 +750,7 @@ def transcribe(request: Request, file_path):
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
         file_dir = os.path.dirname(file_path)
+        id = os.path.basename(file_path).split(".")[0]
         audio = AudioSegment.from_file(file_path)
         audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
         compressed_path = f"{file_dir}/{id}_compressed.opus"
@@ -754,12 +766,7 @@ def compress_audio(file_path):
         return file_path
 
 
-@router.post("/transcriptions")
-def transcription(
-    request: Request,
-    file: UploadFile = File(...),
-    user=Depends(get_verified_user),
-):
+def save_transcription_file(request: Request, file: UploadFile) -> str:
     log.info(f"file.content_type: {file.content_type}")
 
     supported_filetypes = ("audio/mpeg", "audio/wav", "audio/ogg", "audio/x-m4a")
@@ -775,37 +782,42 @@ def transcription(
         id = uuid.uuid4()
 
         filename = f"{id}.{ext}"
-        contents = file.file.read()
 
         file_dir = f"{CACHE_DIR}/audio/transcriptions"
         os.makedirs(file_dir, exist_ok=True)
         file_path = f"{file_dir}/{filename}"
 
+        # Copied in chunks rather than read into memory
         with open(file_path, "wb") as f:
-            f.write(contents)
+            shutil.copyfileobj(file.file, f, 1024 * 1024)
 
-        try:
-            try:
-                file_path = compress_audio(file_path)
-            except Exception as e:
-                log.exception(e)
+        # The local model takes recordings of any size, the external engines
+        # have an upload limit
+        if request.app.state.config.STT_ENGINE != "":
+            file_path = compress_audio(file_path)
 
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=ERROR_MESSAGES.DEFAULT(e),
-                )
+        return file_path
+    except Exception as e:
+        log.exception(e)
 
-            data = transcribe(request, file_path)
-            file_path = file_path.split("/")[-1]
-            return {**data, "filename": file_path}
-        except Exception as e:
-            log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
 
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ERROR_MESSAGES.DEFAULT(e),
-            )
 
+@router.post("/transcriptions")
+def transcription(
+    request: Request,
+    file: UploadFile = File(...),
+    user=Depends(get_verified_user),
+):
+    file_path = save_transcription_file(request, file)
+
+    try:
+        data = transcribe(request, file_path)
+        file_path = file_path.split("/")[-1]
+        return {**data, "filename": file_path}
     except Exception as e:
         log.exception(e)
 
@@ -815,6 +827,33 @@ def transcription(
         )
 
 
+@router.post("/transcriptions/stream")
+def transcription_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    user=Depends(get_verified_user),
+):
+    """
+    Server-sent events with the segments of the transcript as they are
+    transcribed (local whisper model only), then the transcript.
+    """
+    file_path = save_transcription_file(request, file)
+    filename = file_path.split("/")[-1]
+
+    def event_stream():
+        try:
+            for event in iter_transcription(request, file_path):
+                if event["type"] == "done":
+                    event["data"] = {**event["data"], "filename": filename}
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            log.exception(e)
+            event = {"type": "error", "error": ERROR_MESSAGES.DEFAULT(e)}
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 def get_available_models(request: Request) -> list[dict]:
     available_models = []
     if request.app.state.config.TTS_ENGINE == "openai":
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import APIRouter, Depends, Request, HTTPException
 from pydantic import BaseModel, ConfigDict
 
@@ -8,7 +10,11 @@ from open_webui.config import get_config, save_config
 from open_webui.config import BannerModel
 
 from open_webui.utils.tools import get_tool_server_data, get_tool_servers_data
+from open_webui.env import SRC_LOG_LEVELS
+
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 router = APIRouter()
 
@@ -105,7 +111,7 @@ async def set_tool_servers_config(
     ]
 
     request.app.state.TOOL_SERVERS = await get_tool_servers_data(
-        request.app.state.config.TOOL_SERVER_CONNECTIONS
+        request.app.state.config.TOOL_SERVER_CONNECTIONS, force=True
     )
 
     return {
@@ -129,7 +135,7 @@ async def verify_tool_servers_config(
             token = request.state.token.credentials
 
         url = f"{form_data.url}/{form_data.path}"
-        return await get_tool_server_data(token, url)
+        return await get_tool_server_data(token, url, force=True)
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -427,19 +433,19 @@ async def set_a2a_agents_config(
                         user_id=user.id,
                     )
 
-    # After syncing DB, refresh the in-memory models cache for this process
-    # so newly-registered A2A agents are immediately available to the
+    # After syncing DB, patch the agents into the model catalog so
+    # newly-registered A2A agents are immediately available to the
     # chat/completions endpoint which checks request.app.state.MODELS.
     try:
-        from open_webui.utils.models import get_all_models
+        from open_webui.utils.models import MODEL_CATALOG
 
-        print(f"[CONFIG] Refreshing models cache after A2A agent registration...")
-        await get_all_models(request, user=user)
-        print(f"[CONFIG] Models cache refreshed. Cache now has {len(request.app.state.MODELS)} models")
+        await MODEL_CATALOG.patch_agents(request)
+        log.info(
+            f"Model catalog patched with the A2A agents, "
+            f"{len(request.app.state.MODELS)} models"
+        )
     except Exception as e:
-        print(f"[CONFIG] Failed to refresh models cache after A2A agent update: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"Error patching the A2A agents into the model catalog: {e}")
 
     return {
         "ENABLE_A2A_AGENTS": request.app.state.config.ENABLE_A2A_AGENTS,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import requests
@@ -8,9 +8,15 @@ import logging
 
 from open_webui.models.agents import Agents
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import EMBED_CHAT_RATE_LIMIT
+from open_webui.utils.rate_limit import RateLimiter
 from starlette.responses import StreamingResponse
 
 router = APIRouter()
+
+EMBED_CHAT_RATE_LIMITER = RateLimiter(
+    "embed_chat", EMBED_CHAT_RATE_LIMIT, default=(30, 60)
+)
 log = logging.getLogger(__name__)
 
 class EmbedAgentResponse(BaseModel):
@@ -54,7 +60,7 @@ class EmbedChatRequest(BaseModel):
     messages: List[Dict[str, Any]]
     stream: bool = True
 
-@router.post("/chat/completions")
+@router.post("/chat/completions", dependencies=[Depends(EMBED_CHAT_RATE_LIMITER)])
 async def embed_chat_completion(form_data: EmbedChatRequest):
     agent_id = form_data.model
     # If model ID starts with "agent:", strip it
@@ -1,4 +1,5 @@
 import logging
+import mimetypes
 import os
 import uuid
 from fnmatch import fnmatch
@@ -16,21 +17,25 @@ from fastapi import (
     status,
     Query,
 )
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.file_jobs import FileJobs, FileJobStatusResponse
 from open_webui.models.files import (
+    FileBlobs,
     FileForm,
     FileModel,
     FileModelResponse,
     Files,
 )
 from open_webui.models.knowledge import Knowledges
+from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 
 from open_webui.routers.retrieval import ProcessFileForm, process_file
-from open_webui.routers.audio import transcribe
-from open_webui.storage.provider import Storage
+from open_webui.storage.provider import AsyncStorage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.file_jobs import FILE_PROCESSING_QUEUE, get_file_job_status
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -72,19 +77,61 @@ def has_access_to_file(
     return has_access
 
 
+async def delete_files_from_storage(files: list[FileModel]):
+    """
+    Deletes the stored objects of the files, in bulk, except those other
+    files with the same content still use, along with the collections shared
+    by them.
+    """
+    file_paths = []
+    collection_names = []
+    for file in files:
+        sha256 = (file.meta or {}).get("sha256")
+        blob = (
+            await run_in_threadpool(FileBlobs.release_blob, sha256, file.path)
+            if sha256
+            else None
+        )
+        if blob is not None and blob.ref_count > 0:
+            continue
+
+        file_paths.append(file.path)
+        collection_names.extend(
+            (blob.data or {}).get("collections", []) if blob else []
+        )
+
+    await AsyncStorage.delete_files(file_paths)
+    await run_in_threadpool(delete_collections, collection_names)
+
+
+def delete_collections(collection_names: list[str]):
+    for collection_name in collection_names:
+        try:
+            if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        except Exception as e:
+            log.debug(f"Error deleting collection {collection_name}: {e}")
+
+
 ############################
 # Upload File
 ############################
 
 
 @router.post("/", response_model=FileModelResponse)
-def upload_file(
+async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     user=Depends(get_verified_user),
     file_metadata: dict = {},
     process: bool = Query(True),
+    background: bool = Query(False),
 ):
+    """
+    Stores the file and queues it for processing. Unless `background` is set,
+    the response waits for the processing to finish; otherwise its progress
+    is reported through socket events and /files/{id}/process/status.
+    """
     log.info(f"file.content_type: {file.content_type}")
     try:
         unsanitized_filename = file.filename
@@ -94,9 +141,18 @@ def upload_file(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(file.file, filename)
+        file_info, file_path = await AsyncStorage.upload_file(file.file, filename)
+
+        # Files with the same bytes share one stored object
+        blob_path = await run_in_threadpool(
+            FileBlobs.acquire_blob, file_info["sha256"], file_path, file_info["size"]
+        )
+        if blob_path != file_path:
+            await AsyncStorage.delete_file(file_path)
+            file_path = blob_path
 
-        file_item = Files.insert_new_file(
+        file_item = await run_in_threadpool(
+            Files.insert_new_file,
             user.id,
             FileForm(
                 **{
@@ -106,39 +162,28 @@ def upload_file(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": file_info["size"],
+                        "sha256": file_info["sha256"],
                         "data": file_metadata,
                     },
                 }
             ),
         )
-        if process:
-            try:
-                if file.content_type in [
-                    "audio/mpeg",
-                    "audio/wav",
-                    "audio/ogg",
-                    "audio/x-m4a",
-                ]:
-                    file_path = Storage.get_file(file_path)
-                    result = transcribe(request, file_path)
-
-                    process_file(
-                        request,
-                        ProcessFileForm(file_id=id, content=result.get("text", "")),
-                        user=user,
-                    )
-                elif file.content_type not in ["image/png", "image/jpeg", "image/gif"]:
-                    process_file(request, ProcessFileForm(file_id=id), user=user)
-
-                file_item = Files.get_file_by_id(id=id)
-            except Exception as e:
-                log.exception(e)
-                log.error(f"Error processing file: {file_item.id}")
+        if process and file_item:
+            job = await FILE_PROCESSING_QUEUE.enqueue(id, user.id, file_info["sha256"])
+            if job and not background:
+                # The error of a failed attempt is returned right away; the
+                # retries are reported through the status of the job
+                job = await FILE_PROCESSING_QUEUE.wait_for_job(job.id, retries=False)
+                file_item = await run_in_threadpool(Files.get_file_by_id, id=id)
+
+            if job and file_item:
                 file_item = FileModelResponse(
                     **{
                         **file_item.model_dump(),
-                        "error": str(e.detail) if hasattr(e, "detail") else str(e),
+                        "job_id": job.id,
+                        "status": job.status,
+                        **({"error": job.error} if job.error else {}),
                     }
                 )
 
@@ -227,8 +272,10 @@ async def search_files(
 async def delete_all_files(user=Depends(get_admin_user)):
     result = Files.delete_all_files()
     if result:
+        FileJobs.delete_all_jobs()
+        FileBlobs.delete_all_blobs()
         try:
-            Storage.delete_all_files()
+            await AsyncStorage.delete_all_files()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -272,6 +319,36 @@ async def get_file_by_id(id: str, user=Depends(get_verified_user)):
         )
 
 
+############################
+# Get File Process Status By Id
+############################
+
+
+@router.get("/{id}/process/status", response_model=FileJobStatusResponse)
+async def get_file_process_status_by_id(id: str, user=Depends(get_verified_user)):
+    file = Files.get_file_by_id(id)
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "read", user)
+    ):
+        job = FileJobs.get_latest_job_by_file_id(id)
+        if job:
+            return get_file_job_status(job)
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=ERROR_MESSAGES.NOT_FOUND,
+    )
+
+
 ############################
 # Get File Data Content By Id
 ############################
@@ -350,9 +427,82 @@ async def update_file_data_content_by_id(
 ############################
 
 
+def parse_range_header(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single "bytes=start-end" or "bytes=-suffix" range into inclusive
+    offsets. Returns None for anything else (including multiple ranges), in
+    which case the whole file is served.
+    """
+    unit, _, byte_range = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in byte_range:
+        return None
+
+    start, separator, end = byte_range.strip().partition("-")
+    if not separator:
+        return None
+
+    try:
+        if start == "":
+            # The last `end` bytes; an empty suffix cannot be satisfied
+            suffix = int(end)
+            return (max(size - suffix, 0) if suffix > 0 else size), size - 1
+        return int(start), (min(int(end), size - 1) if end else size - 1)
+    except ValueError:
+        return None
+
+
+async def get_file_range_response(
+    request: Request, file_path: str, headers: dict, media_type: Optional[str]
+) -> Response:
+    """
+    Streams the file straight from storage instead of downloading it first,
+    honouring If-None-Match and single Range requests (with If-Range) so that
+    PDF viewers and audio players can seek.
+    """
+    size, etag = await AsyncStorage.stat_file(file_path)
+    if not etag.startswith(('"', 'W/"')):
+        etag = f'"{etag}"'
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in [tag.strip() for tag in if_none_match.split(",")]
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    start, end = 0, size - 1
+    status_code = status.HTTP_200_OK
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range_header(range_header, size)
+        if byte_range is not None:
+            start, end = byte_range
+            if start > end or start >= size:
+                raise HTTPException(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={"Content-Range": f"bytes */{size}"},
+                )
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    content = (
+        await AsyncStorage.open_range(file_path, start, end) if size > 0 else iter([])
+    )
+    return StreamingResponse(
+        content, status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    request: Request,
+    id: str,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -368,44 +518,43 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
+            # Handle Unicode filenames
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
 
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
-
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
+            content_type = file.meta.get("content_type")
+            headers = {}
 
-                if attachment:
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
-
-                return FileResponse(file_path, headers=headers, media_type=content_type)
 
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return await get_file_range_response(
+                request,
+                file.path,
+                headers,
+                content_type or mimetypes.guess_type(filename)[0],
+            )
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ERROR_MESSAGES.NOT_FOUND,
+            )
+        except HTTPException:
+            raise
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -436,7 +585,7 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
+            file_path = await AsyncStorage.get_file(file.path)
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
@@ -463,7 +612,9 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.get("/{id}/content/{file_name}")
-async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
+async def get_file_content_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     file = Files.get_file_by_id(id)
 
     if not file:
@@ -487,13 +638,11 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                return FileResponse(file_path, headers=headers)
-            else:
+            try:
+                return await get_file_range_response(
+                    request, file_path, headers, mimetypes.guess_type(filename)[0]
+                )
+            except FileNotFoundError:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=ERROR_MESSAGES.NOT_FOUND,
@@ -543,8 +692,9 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
 
         result = Files.delete_file_by_id(id)
         if result:
+            FileJobs.delete_jobs_by_file_id(id)
             try:
-                Storage.delete_file(file.path)
+                await delete_files_from_storage([file])
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
@@ -14,6 +14,7 @@ from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.models import MODEL_CATALOG
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -78,6 +79,7 @@ async def create_new_function(
             function_cache_dir.mkdir(parents=True, exist_ok=True)
 
             if function:
+                await MODEL_CATALOG.patch_functions(request)
                 return function
             else:
                 raise HTTPException(
@@ -121,7 +123,9 @@ async def get_function_by_id(id: str, user=Depends(get_admin_user)):
 
 
 @router.post("/id/{id}/toggle", response_model=Optional[FunctionModel])
-async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
+async def toggle_function_by_id(
+    request: Request, id: str, user=Depends(get_admin_user)
+):
     function = Functions.get_function_by_id(id)
     if function:
         function = Functions.update_function_by_id(
@@ -129,6 +133,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            await MODEL_CATALOG.patch_functions(request)
             return function
         else:
             raise HTTPException(
@@ -148,7 +153,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
 
 
 @router.post("/id/{id}/toggle/global", response_model=Optional[FunctionModel])
-async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
+async def toggle_global_by_id(request: Request, id: str, user=Depends(get_admin_user)):
     function = Functions.get_function_by_id(id)
     if function:
         function = Functions.update_function_by_id(
@@ -156,6 +161,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            await MODEL_CATALOG.patch_functions(request)
             return function
         else:
             raise HTTPException(
@@ -194,6 +200,8 @@ async def update_function_by_id(
         function = Functions.update_function_by_id(id, updated)
 
         if function:
+            FUNCTIONS.invalidate(id, function_module)
+            await MODEL_CATALOG.patch_functions(request)
             return function
         else:
             raise HTTPException(
@@ -220,9 +228,9 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
-        FUNCTIONS = request.app.state.FUNCTIONS
-        if id in FUNCTIONS:
-            del FUNCTIONS[id]
+        request.app.state.FUNCTIONS.invalidate(id)
+
+        await MODEL_CATALOG.patch_functions(request)
 
     return result
 
@@ -6,15 +6,25 @@ import logging
 import mimetypes
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 import requests
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
-from open_webui.config import CACHE_DIR
+from open_webui.config import (
+    CACHE_DIR,
+    ENABLE_IMAGE_GENERATION_CACHE,
+    IMAGE_GENERATION_CACHE_MAX_SIZE,
+    IMAGE_GENERATION_CACHE_TTL,
+)
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
 from open_webui.routers.files import upload_file
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.images.cache import (
+    GeneratedImages,
+    ImageGenerationCache,
+    get_image_generation_cache_key,
+)
 from open_webui.utils.images.comfyui import (
     ComfyUIGenerateImageForm,
     ComfyUIWorkflow,
@@ -28,6 +38,12 @@ log.setLevel(SRC_LOG_LEVELS["IMAGES"])
 IMAGE_CACHE_DIR = CACHE_DIR / "image" / "generations"
 IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+IMAGE_GENERATION_CACHE = ImageGenerationCache(
+    IMAGE_CACHE_DIR,
+    IMAGE_GENERATION_CACHE_MAX_SIZE * 1024 * 1024,
+    IMAGE_GENERATION_CACHE_TTL,
+)
+
 
 router = APIRouter()
 
@@ -413,6 +429,7 @@ class GenerateImageForm(BaseModel):
     size: Optional[str] = None
     n: int = 1
     negative_prompt: Optional[str] = None
+    seed: Optional[int] = None
 
 
 def load_b64_image_data(b64_str):
@@ -450,7 +467,7 @@ def load_url_image_data(url, headers=None):
         return None
 
 
-def upload_image(request, image_metadata, image_data, content_type, user):
+async def upload_image(request, image_metadata, image_data, content_type, user):
     image_format = mimetypes.guess_extension(content_type)
     file = UploadFile(
         file=io.BytesIO(image_data),
@@ -459,17 +476,111 @@ def upload_image(request, image_metadata, image_data, content_type, user):
             "content-type": content_type,
         },
     )
-    file_item = upload_file(request, file, user, file_metadata=image_metadata)
+    # Images have nothing to extract
+    file_item = await upload_file(
+        request, file, user, file_metadata=image_metadata, process=False
+    )
     url = request.app.url_path_for("get_file_content_by_id", id=file_item.id)
     return url
 
 
+def get_image_generation_params(request: Request, form_data: GenerateImageForm):
+    """The parameters the generated images depend on, normalized."""
+    config = request.app.state.config
+    engine = config.IMAGE_GENERATION_ENGINE or "automatic1111"
+
+    params = {
+        "engine": engine,
+        "model": form_data.model or config.IMAGE_GENERATION_MODEL,
+        "prompt": " ".join(form_data.prompt.split()),
+        "negative_prompt": (
+            " ".join(form_data.negative_prompt.split())
+            if form_data.negative_prompt is not None
+            else None
+        ),
+        "size": form_data.size or config.IMAGE_SIZE,
+        "n": form_data.n,
+        "steps": config.IMAGE_STEPS,
+        "seed": form_data.seed,
+    }
+
+    if engine == "openai":
+        params["base_url"] = config.IMAGES_OPENAI_API_BASE_URL
+    elif engine == "gemini":
+        params["base_url"] = config.IMAGES_GEMINI_API_BASE_URL
+    elif engine == "comfyui":
+        params["base_url"] = config.COMFYUI_BASE_URL
+        params["workflow"] = config.COMFYUI_WORKFLOW
+        params["nodes"] = config.COMFYUI_WORKFLOW_NODES
+    else:
+        params["base_url"] = config.AUTOMATIC1111_BASE_URL
+        params["cfg_scale"] = config.AUTOMATIC1111_CFG_SCALE
+        params["sampler"] = config.AUTOMATIC1111_SAMPLER
+        params["scheduler"] = config.AUTOMATIC1111_SCHEDULER
+
+    return params
+
+
+@router.get("/cache")
+async def get_image_generation_cache_metrics(user=Depends(get_admin_user)):
+    return await asyncio.to_thread(IMAGE_GENERATION_CACHE.get_metrics)
+
+
+@router.delete("/cache")
+async def clear_image_generation_cache(user=Depends(get_admin_user)):
+    await asyncio.to_thread(IMAGE_GENERATION_CACHE.clear)
+    return {"status": True}
+
+
 @router.post("/generations")
 async def image_generations(
     request: Request,
     form_data: GenerateImageForm,
     user=Depends(get_verified_user),
 ):
+    return await generate_image_files(request, form_data, user)
+
+
+async def generate_image_files(
+    request: Request,
+    form_data: GenerateImageForm,
+    user,
+    event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+) -> list[dict]:
+    """
+    Generates images and uploads them as files of the user. Requests with a
+    fixed seed are deterministic: identical ones reuse the images generated
+    for the first one while they are cached, and concurrent ones wait for a
+    single generation. Unseeded requests, and those with seed 0 that engines
+    read as a random seed, always generate new images. Engines
+    that report their progress send it to event_emitter as status events.
+    """
+
+    async def create():
+        return await generate_images(request, form_data, user, event_emitter)
+
+    if ENABLE_IMAGE_GENERATION_CACHE and form_data.seed:
+        key = get_image_generation_cache_key(
+            get_image_generation_params(request, form_data)
+        )
+        images, metadata = await IMAGE_GENERATION_CACHE.get_or_create(key, create)
+    else:
+        images, metadata = await create()
+
+    urls = []
+    for image_data, content_type in images:
+        url = await upload_image(request, metadata, image_data, content_type, user)
+        urls.append({"url": url})
+    return urls
+
+
+async def generate_images(
+    request: Request,
+    form_data: GenerateImageForm,
+    user,
+    event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+) -> tuple[GeneratedImages, dict]:
+    """Returns the images generated by the configured engine and their metadata."""
     width, height = tuple(map(int, request.app.state.config.IMAGE_SIZE.split("x")))
 
     r = None
@@ -522,9 +633,8 @@ async def image_generations(
                 else:
                     image_data, content_type = load_b64_image_data(image["b64_json"])
 
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
-            return images
+                images.append((image_data, content_type))
+            return images, data
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
             headers = {}
@@ -556,10 +666,9 @@ async def image_generations(
                 image_data, content_type = load_b64_image_data(
                     image["bytesBase64Encoded"]
                 )
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
+                images.append((image_data, content_type))
 
-            return images
+            return images, data
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
             data = {
@@ -575,6 +684,9 @@ async def image_generations(
             if form_data.negative_prompt is not None:
                 data["negative_prompt"] = form_data.negative_prompt
 
+            if form_data.seed is not None:
+                data["seed"] = form_data.seed
+
             form_data = ComfyUIGenerateImageForm(
                 **{
                     "workflow": ComfyUIWorkflow(
@@ -586,40 +698,22 @@ async def image_generations(
                     **data,
                 }
             )
-            res = await comfyui_generate_image(
+            images = await comfyui_generate_image(
                 request.app.state.config.IMAGE_GENERATION_MODEL,
                 form_data,
-                user.id,
                 request.app.state.config.COMFYUI_BASE_URL,
                 request.app.state.config.COMFYUI_API_KEY,
+                event_emitter,
             )
-            log.debug(f"res: {res}")
-
-            images = []
+            log.debug(f"Generated {len(images)} images with ComfyUI")
 
-            for image in res["data"]:
-                headers = None
-                if request.app.state.config.COMFYUI_API_KEY:
-                    headers = {
-                        "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-                    }
-
-                image_data, content_type = load_url_image_data(image["url"], headers)
-                url = upload_image(
-                    request,
-                    form_data.model_dump(exclude_none=True),
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            return images, form_data.model_dump(exclude_none=True)
         elif (
             request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
             or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
         ):
             if form_data.model:
-                set_image_model(form_data.model)
+                await asyncio.to_thread(set_image_model, request, form_data.model)
 
             data = {
                 "prompt": form_data.prompt,
@@ -634,6 +728,9 @@ async def image_generations(
             if form_data.negative_prompt is not None:
                 data["negative_prompt"] = form_data.negative_prompt
 
+            if form_data.seed is not None:
+                data["seed"] = form_data.seed
+
             if request.app.state.config.AUTOMATIC1111_CFG_SCALE:
                 data["cfg_scale"] = request.app.state.config.AUTOMATIC1111_CFG_SCALE
 
@@ -658,15 +755,8 @@ async def image_generations(
 
             for image in res["images"]:
                 image_data, content_type = load_b64_image_data(image)
-                url = upload_image(
-                    request,
-                    {**data, "info": res["info"]},
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+                images.append((image_data, content_type))
+            return images, {**data, "info": res["info"]}
     except Exception as e:
         error = e
         if r != None:
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 import logging
 
@@ -10,6 +11,7 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel
+from open_webui.models.file_jobs import FileJobs
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -17,11 +19,21 @@ from open_webui.routers.retrieval import (
     process_files_batch,
     BatchProcessFilesForm,
 )
+from open_webui.routers.files import delete_files_from_storage
 from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.utils.auth import get_verified_user
+from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.reindex import (
+    ReindexJobModel,
+    cancel_reindex_job,
+    create_reindex_job,
+    get_reindex_job,
+    get_reindex_jobs,
+    get_running_reindex_job,
+    resume_reindex_job,
+)
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -166,67 +178,82 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
-async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
+class ReindexForm(BaseModel):
+    force: bool = False
+
+
+@router.post("/reindex", response_model=ReindexJobModel)
+async def reindex_knowledge_files(
+    request: Request,
+    form_data: Optional[ReindexForm] = None,
+    user=Depends(get_verified_user),
+):
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
+    running_job = get_running_reindex_job()
+    if running_job:
+        return running_job
 
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
+    return create_reindex_job(
+        request, user, force=form_data.force if form_data else False
+    )
 
-    for knowledge_base in knowledge_bases:
-        try:
-            files = Files.get_files_by_ids(knowledge_base.data.get("file_ids", []))
 
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error deleting vector DB collection",
-                )
+@router.get("/reindex/jobs", response_model=list[ReindexJobModel])
+async def get_reindex_knowledge_jobs(user=Depends(get_admin_user)):
+    return get_reindex_jobs()
 
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
 
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error processing knowledge base",
-            )
+@router.get("/reindex/{job_id}", response_model=ReindexJobModel)
+async def get_reindex_knowledge_job_by_id(job_id: str, user=Depends(get_admin_user)):
+    job = get_reindex_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
 
-    log.info("Reindexing completed successfully")
-    return True
+@router.post("/reindex/{job_id}/cancel", response_model=ReindexJobModel)
+async def cancel_reindex_knowledge_job_by_id(job_id: str, user=Depends(get_admin_user)):
+    job = get_reindex_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return await cancel_reindex_job(job)
+
+
+@router.post("/reindex/{job_id}/resume", response_model=ReindexJobModel)
+async def resume_reindex_knowledge_job_by_id(
+    request: Request, job_id: str, user=Depends(get_admin_user)
+):
+    job = get_reindex_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    running_job = get_running_reindex_job()
+    if running_job:
+        if running_job.id == job.id:
+            return running_job
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Another reindex job is already running"),
+        )
+
+    if job.status == "completed":
+        return job
+
+    return resume_reindex_job(request, job, user)
 
 
 ############################
@@ -524,8 +551,16 @@ def remove_file_from_knowledge_by_id(
         log.debug(e)
         pass
 
-    # Delete file from database
-    Files.delete_file_by_id(form_data.file_id)
+    # Delete file from database, and its stored object unless other files
+    # with the same content still use it
+    if Files.delete_file_by_id(form_data.file_id):
+        FileJobs.delete_jobs_by_file_id(form_data.file_id)
+        try:
+            # This route runs in the threadpool, the release on the event loop
+            from_thread.run(delete_files_from_storage, [file])
+        except Exception as e:
+            log.exception(e)
+            log.error(f"Error deleting the stored file {form_data.file_id}")
 
     if knowledge:
         data = knowledge.data or {}
@@ -13,6 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.models import MODEL_CATALOG
 
 
 router = APIRouter()
@@ -70,6 +71,7 @@ async def create_new_model(
     else:
         model = Models.insert_new_model(form_data, user.id)
         if model:
+            await MODEL_CATALOG.patch_model(request, model.id)
             return model
         else:
             raise HTTPException(
@@ -107,7 +109,9 @@ async def get_model_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.post("/model/toggle", response_model=Optional[ModelResponse])
-async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
+async def toggle_model_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     model = Models.get_model_by_id(id)
     if model:
         if (
@@ -118,6 +122,7 @@ async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
             model = Models.toggle_model_by_id(id)
 
             if model:
+                await MODEL_CATALOG.patch_model(request, id)
                 return model
             else:
                 raise HTTPException(
@@ -143,6 +148,7 @@ async def toggle_model_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/model/update", response_model=Optional[ModelModel])
 async def update_model_by_id(
+    request: Request,
     id: str,
     form_data: ModelForm,
     user=Depends(get_verified_user),
@@ -166,6 +172,7 @@ async def update_model_by_id(
         )
 
     model = Models.update_model_by_id(id, form_data)
+    await MODEL_CATALOG.patch_model(request, id)
     return model
 
 
@@ -175,7 +182,9 @@ async def update_model_by_id(
 
 
 @router.delete("/model/delete", response_model=bool)
-async def delete_model_by_id(id: str, user=Depends(get_verified_user)):
+async def delete_model_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     model = Models.get_model_by_id(id)
     if not model:
         raise HTTPException(
@@ -194,10 +203,12 @@ async def delete_model_by_id(id: str, user=Depends(get_verified_user)):
         )
 
     result = Models.delete_model_by_id(id)
+    await MODEL_CATALOG.patch_model(request, id)
     return result
 
 
 @router.delete("/delete/all", response_model=bool)
-async def delete_all_models(user=Depends(get_admin_user)):
+async def delete_all_models(request: Request, user=Depends(get_admin_user)):
     result = Models.delete_all_models()
+    await MODEL_CATALOG.rebuild(request)
     return result
@@ -286,6 +286,10 @@ async def update_config(
         if key in keys
     }
 
+    from open_webui.utils.models import MODEL_CATALOG
+
+    await MODEL_CATALOG.refresh(request, user=user)
+
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
         "OLLAMA_BASE_URLS": request.app.state.config.OLLAMA_BASE_URLS,
@@ -388,9 +392,16 @@ async def get_all_models(request: Request, user: UserModel = None):
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
+    model_infos = {
+        model_info.id: model_info
+        for model_info in Models.get_models_by_ids(
+            [model["model"] for model in models.get("models", [])]
+        )
+    }
+
     filtered_models = []
     for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
+        model_info = model_infos.get(model["model"])
         if model_info:
             if user.id == model_info.user_id or has_access(
                 user.id, type="read", access_control=model_info.access_control
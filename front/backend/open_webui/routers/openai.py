@@ -175,6 +175,10 @@ async def update_config(
         if key in keys
     }
 
+    from open_webui.utils.models import MODEL_CATALOG
+
+    await MODEL_CATALOG.refresh(request, user=user)
+
     return {
         "ENABLE_OPENAI_API": request.app.state.config.ENABLE_OPENAI_API,
         "OPENAI_API_BASE_URLS": request.app.state.config.OPENAI_API_BASE_URLS,
@@ -372,9 +376,16 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
+    model_infos = {
+        model_info.id: model_info
+        for model_info in Models.get_models_by_ids(
+            [model["id"] for model in models.get("data", [])]
+        )
+    }
+
     filtered_models = []
     for model in models.get("data", []):
-        model_info = Models.get_model_by_id(model["id"])
+        model_info = model_infos.get(model["id"])
         if model_info:
             if user.id == model_info.user_id or has_access(
                 user.id, type="read", access_control=model_info.access_control
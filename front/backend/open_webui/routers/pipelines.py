@@ -9,15 +9,17 @@ from fastapi import (
     APIRouter,
 )
 import aiohttp
+import asyncio
 import os
 import logging
+import time
 import shutil
 import requests
 from pydantic import BaseModel
 from starlette.responses import FileResponse
 from typing import Optional
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 
@@ -56,105 +58,197 @@ def get_sorted_filters(model_id, models):
     return sorted_filters
 
 
-async def process_pipeline_inlet_filter(request, payload, user, models):
-    user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
-    model_id = payload["model"]
-    sorted_filters = get_sorted_filters(model_id, models)
-    model = models[model_id]
+def is_independent_filter(filter) -> bool:
+    """
+    Filters that declare "independent": true in their pipeline metadata are
+    read-only annotators: they see the payload but their result is not
+    chained into it, so they can run concurrently with everything else.
+    """
+    pipeline = filter.get("pipeline", {})
+    return pipeline.get("type") == "filter" and pipeline.get("independent") is True
 
-    if "pipeline" in model:
-        sorted_filters.append(model)
 
-    async with aiohttp.ClientSession() as session:
-        for filter in sorted_filters:
-            urlIdx = filter.get("urlIdx")
-            if urlIdx is None:
-                continue
+class PipelineFilterMetrics:
+    """Per-filter call latencies of this worker, by (direction, filter id)."""
 
-            url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
+    def __init__(self):
+        self.metrics: dict[tuple[str, str], dict] = {}
 
-            if not key:
-                continue
+    def record(self, direction: str, filter_id: str, elapsed: float, error: bool):
+        metric = self.metrics.setdefault(
+            (direction, filter_id),
+            {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "last": 0.0},
+        )
+        metric["count"] += 1
+        metric["errors"] += int(error)
+        metric["total"] += elapsed
+        metric["max"] = max(metric["max"], elapsed)
+        metric["last"] = elapsed
+
+        log.debug(
+            f"Pipeline {direction} filter {filter_id} took {elapsed:.3f}s"
+            + (" (failed)" if error else "")
+        )
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user,
-                "body": payload,
+    def get_metrics(self) -> list[dict]:
+        return [
+            {
+                "id": filter_id,
+                "direction": direction,
+                "count": metric["count"],
+                "errors": metric["errors"],
+                "avg": metric["total"] / metric["count"],
+                "max": metric["max"],
+                "last": metric["last"],
             }
+            for (direction, filter_id), metric in self.metrics.items()
+        ]
 
-            try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/inlet",
-                    headers=headers,
-                    json=request_data,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                res = (
-                    await response.json()
-                    if response.content_type == "application/json"
-                    else {}
-                )
-                if "detail" in res:
-                    raise Exception(response.status, res["detail"])
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
 
-    return payload
+PIPELINE_FILTER_METRICS = PipelineFilterMetrics()
 
+PIPELINES_SESSION: Optional[aiohttp.ClientSession] = None
+PIPELINES_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
 
-async def process_pipeline_outlet_filter(request, payload, user, models):
+
+def get_pipelines_session() -> aiohttp.ClientSession:
+    """Returns the session shared by all pipeline filter calls."""
+    global PIPELINES_SESSION, PIPELINES_SESSION_LOOP
+
+    loop = asyncio.get_running_loop()
+    if (
+        PIPELINES_SESSION is None
+        or PIPELINES_SESSION.closed
+        or PIPELINES_SESSION_LOOP != loop
+    ):
+        PIPELINES_SESSION = aiohttp.ClientSession()
+        PIPELINES_SESSION_LOOP = loop
+    return PIPELINES_SESSION
+
+
+async def close_pipelines_session():
+    global PIPELINES_SESSION
+    if PIPELINES_SESSION is not None and not PIPELINES_SESSION.closed:
+        await PIPELINES_SESSION.close()
+    PIPELINES_SESSION = None
+
+
+async def call_pipeline_filter(
+    request, filter, direction: str, user: dict, payload: dict
+) -> Optional[dict]:
+    """
+    Posts the payload to the filter's /filter/{direction} endpoint. Returns
+    the filtered payload, or None if the filter was skipped or failed. An
+    inlet filter rejecting the request with a "detail" raises.
+    """
+    urlIdx = filter.get("urlIdx")
+    if urlIdx is None:
+        return None
+
+    url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
+    key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
+
+    if not key:
+        return None
+
+    headers = {"Authorization": f"Bearer {key}"}
+    request_data = {
+        "user": user,
+        "body": payload,
+    }
+    timeout = aiohttp.ClientTimeout(
+        total=filter.get("pipeline", {}).get(
+            "timeout", AIOHTTP_CLIENT_TIMEOUT_PIPELINE_FILTER
+        )
+    )
+
+    res = {}
+    error = True
+    start = time.perf_counter()
+    try:
+        async with get_pipelines_session().post(
+            f"{url}/{filter['id']}/filter/{direction}",
+            headers=headers,
+            json=request_data,
+            timeout=timeout,
+        ) as response:
+            res = await response.json()
+            response.raise_for_status()
+            error = False
+            return res
+    except aiohttp.ClientResponseError as e:
+        if direction == "inlet" and isinstance(res, dict) and "detail" in res:
+            raise Exception(response.status, res["detail"])
+        log.warning(f"Pipeline {direction} filter {filter['id']} failed: {e}")
+    except Exception as e:
+        log.exception(f"Connection error: {e}")
+    finally:
+        PIPELINE_FILTER_METRICS.record(
+            direction, filter["id"], time.perf_counter() - start, error
+        )
+
+    return None
+
+
+async def process_pipeline_filters(request, direction, payload, user, filters):
     user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
+
+    async def run_chained_filters(payload):
+        # Mutating filters run one after another in priority order, each
+        # receiving the output of the previous one
+        for filter in filters:
+            if is_independent_filter(filter):
+                continue
+            res = await call_pipeline_filter(request, filter, direction, user, payload)
+            if res is not None:
+                payload = res
+        return payload
+
+    tasks = [asyncio.create_task(run_chained_filters(payload))] + [
+        asyncio.create_task(
+            call_pipeline_filter(request, filter, direction, user, payload)
+        )
+        for filter in filters
+        if is_independent_filter(filter)
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            # Raises the first rejection, e.g. an inlet filter's "detail"
+            task.result()
+        return tasks[0].result()
+    finally:
+        # The request is rejected (or cancelled): stop the other filters
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def process_pipeline_inlet_filter(request, payload, user, models):
     model_id = payload["model"]
     sorted_filters = get_sorted_filters(model_id, models)
     model = models[model_id]
 
     if "pipeline" in model:
-        sorted_filters = [model] + sorted_filters
+        sorted_filters.append(model)
 
-    async with aiohttp.ClientSession() as session:
-        for filter in sorted_filters:
-            urlIdx = filter.get("urlIdx")
-            if urlIdx is None:
-                continue
+    return await process_pipeline_filters(
+        request, "inlet", payload, user, sorted_filters
+    )
 
-            url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
 
-            if not key:
-                continue
+async def process_pipeline_outlet_filter(request, payload, user, models):
+    model_id = payload["model"]
+    sorted_filters = get_sorted_filters(model_id, models)
+    model = models[model_id]
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user,
-                "body": payload,
-            }
+    if "pipeline" in model:
+        sorted_filters = [model] + sorted_filters
 
-            try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/outlet",
-                    headers=headers,
-                    json=request_data,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                try:
-                    res = (
-                        await response.json()
-                        if "application/json" in response.content_type
-                        else {}
-                    )
-                    if "detail" in res:
-                        raise Exception(response.status, res)
-                except Exception:
-                    pass
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
-
-    return payload
+    return await process_pipeline_filters(
+        request, "outlet", payload, user, sorted_filters
+    )
 
 
 ##################################
@@ -166,6 +260,11 @@ async def process_pipeline_outlet_filter(request, payload, user, models):
 router = APIRouter()
 
 
+@router.get("/filters/metrics")
+async def get_pipeline_filter_metrics(user=Depends(get_admin_user)):
+    return {"data": PIPELINE_FILTER_METRICS.get_metrics()}
+
+
 @router.get("/list")
 async def get_pipelines_list(request: Request, user=Depends(get_admin_user)):
     responses = await get_all_models_responses(request, user)
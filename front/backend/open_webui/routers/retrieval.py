@@ -3,11 +3,12 @@ import logging
 import mimetypes
 import os
 import shutil
+import threading
 
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Union
 
 from fastapi import (
     Depends,
@@ -27,7 +28,7 @@ import tiktoken
 from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
 from langchain_core.documents import Document
 
-from open_webui.models.files import FileModel, Files
+from open_webui.models.files import FileBlobModel, FileBlobs, FileModel, Files
 from open_webui.models.knowledge import Knowledges
 from open_webui.storage.provider import Storage
 
@@ -41,6 +42,12 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
 from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.cache import (
+    clear_search_results_cache,
+    get_cached_search_results,
+    load_web_pages,
+    set_cached_search_results,
+)
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
 from open_webui.retrieval.web.mojeek import search_mojeek
@@ -61,7 +68,9 @@ from open_webui.retrieval.web.perplexity import search_perplexity
 from open_webui.retrieval.web.sougou import search_sougou
 
 from open_webui.retrieval.utils import (
+    SHARED_FILE_COLLECTION_PREFIX,
     get_embedding_function,
+    iter_docs_in_background,
     get_model_path,
     query_collection,
     query_collection_with_hybrid_search,
@@ -81,6 +90,8 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    RAG_INGEST_BATCH_SIZE,
+    RAG_INGEST_QUEUE_SIZE,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -153,6 +164,57 @@ def get_rf(
     return rf
 
 
+class LazyModel:
+    """
+    Defers loading a local model until it is first used, so that the server
+    can start listening without waiting for sentence-transformers and the
+    model weights. load() can also be called from a background warm-up task.
+    Attribute access (e.g. ef.encode, rf.predict) is forwarded to the model.
+    """
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.model = None
+        self.error = None
+
+    def load(self):
+        if self.loaded:
+            return self.model
+
+        with self.lock:
+            if not self.loaded:
+                try:
+                    self.model = self.loader()
+                except Exception as e:
+                    log.error(f"Error loading {self.name} model: {e}")
+                    self.error = e
+                self.loaded = True
+
+        return self.model
+
+    def __getattr__(self, name):
+        model = self.load()
+        if model is None:
+            raise Exception(
+                ERROR_MESSAGES.DEFAULT(self.error or f"{self.name} model not loaded")
+            )
+        return getattr(model, name)
+
+
+def get_reranking_function(request: Request):
+    """
+    The reranking model, loading it if needed, or None when there is none or
+    it failed to load, in which case results are not reranked.
+    """
+    rf = request.app.state.rf
+    if isinstance(rf, LazyModel):
+        return rf.load()
+    return rf
+
+
 ##########################################
 #
 # API routes
@@ -628,6 +690,9 @@ async def update_rag_config(
     )
 
     if form_data.web is not None:
+        # Search results depend on the engine settings below
+        clear_search_results_cache()
+
         # Web search settings
         request.app.state.config.ENABLE_WEB_SEARCH = form_data.web.ENABLE_WEB_SEARCH
         request.app.state.config.WEB_SEARCH_ENGINE = form_data.web.WEB_SEARCH_ENGINE
@@ -788,6 +853,170 @@ async def update_rag_config(
 ####################################
 
 
+def get_current_embedding_config(request: Request) -> dict:
+    return {
+        "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+        "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+    }
+
+
+def get_current_extraction_config(request: Request) -> dict:
+    return {
+        "engine": request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+        "pdf_extract_images": request.app.state.config.PDF_EXTRACT_IMAGES,
+    }
+
+
+def get_shared_file_collection_name(request: Request, hash: str) -> str:
+    """
+    Returns the collection shared by every file whose bytes hash to `hash`,
+    for the current extraction, splitting and embedding settings.
+    """
+    config = {
+        "hash": hash,
+        "extraction": get_current_extraction_config(request),
+        "embedding": get_current_embedding_config(request),
+        "splitter": [
+            request.app.state.config.TEXT_SPLITTER,
+            request.app.state.config.CHUNK_SIZE,
+            request.app.state.config.CHUNK_OVERLAP,
+        ],
+    }
+    return (
+        SHARED_FILE_COLLECTION_PREFIX
+        + calculate_sha256_string(json.dumps(config, sort_keys=True))[:40]
+    )
+
+
+def get_shared_file_content(request: Request, blob: FileBlobModel) -> Optional[str]:
+    """Returns the content extracted from the blob with the current settings."""
+    data = blob.data or {}
+    if data.get("extraction_config") == json.dumps(
+        get_current_extraction_config(request), sort_keys=True
+    ):
+        return data.get("content")
+    return None
+
+
+def save_shared_file_content(
+    request: Request,
+    blob: FileBlobModel,
+    content: Optional[str] = None,
+    collection_name: Optional[str] = None,
+):
+    data = {}
+    if content is not None:
+        data["content"] = content
+        data["extraction_config"] = json.dumps(
+            get_current_extraction_config(request), sort_keys=True
+        )
+    if collection_name:
+        collections = (blob.data or {}).get("collections", [])
+        if collection_name not in collections:
+            data["collections"] = [*collections, collection_name]
+
+    if data:
+        FileBlobs.update_blob_data_by_hash(blob.hash, data)
+
+
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+    return text_splitter.split_documents(docs)
+
+
+def get_docs_texts_and_metadatas(
+    request: Request,
+    docs: list[Document],
+    metadata: Optional[dict] = None,
+    split: bool = True,
+) -> tuple[list[str], list[dict]]:
+    if split:
+        docs = split_docs(request, docs)
+
+    if len(docs) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    texts = [doc.page_content for doc in docs]
+    metadatas = [
+        {
+            **doc.metadata,
+            **(metadata if metadata else {}),
+            "embedding_config": json.dumps(get_current_embedding_config(request)),
+        }
+        for doc in docs
+    ]
+
+    # ChromaDB does not like datetime formats
+    # for meta-data so convert them to string.
+    for metadata in metadatas:
+        for key, value in metadata.items():
+            if (
+                isinstance(value, datetime)
+                or isinstance(value, list)
+                or isinstance(value, dict)
+            ):
+                metadata[key] = str(value)
+
+    return texts, metadatas
+
+
+def get_vector_items(
+    request: Request, texts: list[str], metadatas: list[dict], user=None
+) -> list[dict]:
+    embedding_function = get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_BASE_URL
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else request.app.state.config.RAG_OLLAMA_API_KEY
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+    )
+
+    embeddings = embedding_function(
+        list(map(lambda x: x.replace("\n", " "), texts)),
+        prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+        user=user,
+    )
+
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "text": text,
+            "vector": embeddings[idx],
+            "metadata": metadatas[idx],
+        }
+        for idx, text in enumerate(texts)
+    ]
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -831,58 +1060,9 @@ def save_docs_to_vector_db(
                 log.info(f"Document with hash {metadata['hash']} already exists")
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
-    if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-        docs = text_splitter.split_documents(docs)
-
-    if len(docs) == 0:
-        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
-
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
-        }
-        for doc in docs
-    ]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if (
-                isinstance(value, datetime)
-                or isinstance(value, list)
-                or isinstance(value, dict)
-            ):
-                metadata[key] = str(value)
+    texts, metadatas = get_docs_texts_and_metadatas(
+        request, docs, metadata=metadata, split=split
+    )
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
@@ -898,50 +1078,136 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"adding to collection {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_BASE_URL
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else request.app.state.config.RAG_OLLAMA_API_KEY
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-        )
+        items = get_vector_items(request, texts, metadatas, user=user)
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
+        VECTOR_DB_CLIENT.insert(
+            collection_name=collection_name,
+            items=items,
         )
 
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
-        ]
+        return True
+    except Exception as e:
+        log.exception(e)
+        raise e
+
+
+def save_docs_stream_to_vector_db(
+    request: Request,
+    docs: Iterable[Document],
+    collection_name: str,
+    metadata: Optional[dict] = None,
+    user=None,
+) -> list[str]:
+    """
+    Streams documents into a new collection. Documents are extracted on a
+    background thread, split as they arrive, and embedded and inserted in
+    batches, so memory stays bounded for large files and the first chunks are
+    searchable before the whole document has been processed.
+
+    Returns the page contents of the streamed documents.
+    """
+    log.info(f"save_docs_stream_to_vector_db: {collection_name}")
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        log.info(f"collection {collection_name} already exists, skipping embedding")
+        return [doc.page_content for doc in docs]
+
+    contents = []
+    chunks = []
+    inserted = 0
 
+    def insert_chunks():
+        nonlocal chunks, inserted
+
+        texts, metadatas = get_docs_texts_and_metadatas(
+            request, chunks, metadata=metadata, split=False
+        )
         VECTOR_DB_CLIENT.insert(
             collection_name=collection_name,
-            items=items,
+            items=get_vector_items(request, texts, metadatas, user=user),
         )
 
-        return True
+        inserted += len(chunks)
+        chunks = []
+
+    try:
+        for doc in iter_docs_in_background(docs, RAG_INGEST_QUEUE_SIZE):
+            contents.append(doc.page_content)
+            chunks.extend(split_docs(request, [doc]))
+
+            if len(chunks) >= RAG_INGEST_BATCH_SIZE:
+                insert_chunks()
+
+        if chunks or inserted == 0:
+            insert_chunks()
+
+        log.info(f"inserted {inserted} chunks into collection {collection_name}")
+        return contents
     except Exception as e:
         log.exception(e)
+        # Do not leave a partially indexed document behind
+        if inserted > 0:
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
         raise e
 
 
+def get_processed_file_docs(file: FileModel) -> list[Document]:
+    """
+    Returns the already extracted documents of a file, preferring the chunks
+    stored in its own `file-{id}` collection over the raw text content.
+    """
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+    )
+
+    if result is not None and len(result.ids[0]) > 0:
+        return [
+            Document(
+                page_content=result.documents[0][idx],
+                metadata=result.metadatas[0][idx],
+            )
+            for idx, id in enumerate(result.ids[0])
+        ]
+
+    # Chunks shared with the other files of the same content, newest first
+    sha256 = (file.meta or {}).get("sha256")
+    blob = FileBlobs.get_blob_by_hash(sha256) if sha256 else None
+    for collection_name in reversed(
+        (blob.data or {}).get("collections", []) if blob else []
+    ):
+        if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            continue
+
+        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        if result is not None and len(result.ids[0]) > 0:
+            return [
+                Document(
+                    page_content=result.documents[0][idx],
+                    metadata={
+                        **result.metadatas[0][idx],
+                        "name": file.filename,
+                        "created_by": file.user_id,
+                        "file_id": file.id,
+                        "source": file.filename,
+                    },
+                )
+                for idx, id in enumerate(result.ids[0])
+            ]
+
+    return [
+        Document(
+            page_content=file.data.get("content", ""),
+            metadata={
+                **file.meta,
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            },
+        )
+    ]
+
+
 class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
@@ -959,8 +1225,35 @@ def process_file(
 
         collection_name = form_data.collection_name
 
+        # Files with the same bytes share one read-only extraction and
+        # collection; their chunks carry no per-file metadata
+        blob = None
+        if collection_name is None and not form_data.content and file.path:
+            sha256 = (file.meta or {}).get("sha256")
+            blob = FileBlobs.get_blob_by_hash(sha256) if sha256 else None
+
         if collection_name is None:
-            collection_name = f"file-{file.id}"
+            collection_name = (
+                get_shared_file_collection_name(request, blob.hash)
+                if blob
+                else f"file-{file.id}"
+            )
+
+        file_metadata = (
+            {}
+            if blob
+            else {
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            }
+        )
+
+        # Whether the documents were already embedded while being extracted
+        streamed = False
+        # Whether the content was extracted from another file of the blob
+        shared_content = None
 
         if form_data.content:
             # Update the content in the file
@@ -991,38 +1284,19 @@ def process_file(
             # Check if the file has already been processed and save the content
             # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-            result = VECTOR_DB_CLIENT.query(
-                collection_name=f"file-{file.id}", filter={"file_id": file.id}
-            )
-
-            if result is not None and len(result.ids[0]) > 0:
-                docs = [
-                    Document(
-                        page_content=result.documents[0][idx],
-                        metadata=result.metadatas[0][idx],
-                    )
-                    for idx, id in enumerate(result.ids[0])
-                ]
-            else:
-                docs = [
-                    Document(
-                        page_content=file.data.get("content", ""),
-                        metadata={
-                            **file.meta,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                ]
-
+            docs = get_processed_file_docs(file)
             text_content = file.data.get("content", "")
         else:
             # Process the file and save the content
             # Usage: /files/
             file_path = file.path
-            if file_path:
+            if blob:
+                shared_content = get_shared_file_content(request, blob)
+
+            if shared_content is not None:
+                log.info(f"Reusing the extracted content of blob {blob.hash}")
+                docs = [Document(page_content=shared_content)]
+            elif file_path:
                 file_path = Storage.get_file(file_path)
                 loader = Loader(
                     engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
@@ -1033,23 +1307,46 @@ def process_file(
                     DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
                     MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
                 )
-                docs = loader.load(
+                docs = loader.lazy_load(
                     file.filename, file.meta.get("content_type"), file_path
                 )
 
-                docs = [
+                # The loaders' source is the path of the stored object, which
+                # is named after the file that first uploaded the content
+                docs = (
                     Document(
                         page_content=doc.page_content,
                         metadata={
-                            **doc.metadata,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
+                            **{
+                                key: value
+                                for key, value in doc.metadata.items()
+                                if not (blob and key == "source")
+                            },
+                            **file_metadata,
                         },
                     )
                     for doc in docs
-                ]
+                )
+
+                if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
+                    # Embed the pages while the rest of the file is extracted;
+                    # the content hash is only known once extraction finishes
+                    # so it is not part of the chunk metadata here.
+                    docs = [
+                        Document(page_content=content)
+                        for content in save_docs_stream_to_vector_db(
+                            request,
+                            docs=docs,
+                            collection_name=collection_name,
+                            metadata=(
+                                {}
+                                if blob
+                                else {"file_id": file.id, "name": file.filename}
+                            ),
+                            user=user,
+                        )
+                    ]
+                    streamed = True
             else:
                 docs = [
                     Document(
@@ -1074,19 +1371,34 @@ def process_file(
         hash = calculate_sha256_string(text_content)
         Files.update_file_hash_by_id(file.id, hash)
 
+        if blob and shared_content is None:
+            save_shared_file_content(request, blob, content=text_content)
+
         if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
-                result = save_docs_to_vector_db(
-                    request,
-                    docs=docs,
-                    collection_name=collection_name,
-                    metadata={
-                        "file_id": file.id,
-                        "name": file.filename,
-                        "hash": hash,
-                    },
-                    add=(True if form_data.collection_name else False),
-                    user=user,
+                result = (
+                    streamed
+                    or (
+                        blob is not None
+                        and VECTOR_DB_CLIENT.has_collection(
+                            collection_name=collection_name
+                        )
+                    )
+                    or save_docs_to_vector_db(
+                        request,
+                        docs=docs,
+                        collection_name=collection_name,
+                        metadata={
+                            **(
+                                {}
+                                if blob
+                                else {"file_id": file.id, "name": file.filename}
+                            ),
+                            "hash": hash,
+                        },
+                        add=(True if form_data.collection_name else False),
+                        user=user,
+                    )
                 )
 
                 if result:
@@ -1096,6 +1408,10 @@ def process_file(
                             "collection_name": collection_name,
                         },
                     )
+                    if blob:
+                        save_shared_file_content(
+                            request, blob, collection_name=collection_name
+                        )
 
                     return {
                         "status": True,
@@ -1465,6 +1781,60 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         raise Exception("No search engine API key found in environment variables")
 
 
+# Writes to the per-URL web collections, striped by collection name
+WEB_COLLECTION_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def get_web_collection_lock(collection_name: str) -> threading.Lock:
+    index = int(calculate_sha256_string(collection_name), 16)
+    return WEB_COLLECTION_LOCKS[index % len(WEB_COLLECTION_LOCKS)]
+
+
+def save_web_doc_to_vector_db(
+    request: Request, doc: Document, collection_name: str, user=None
+):
+    """
+    Embeds a web page into its per-URL collection, unless the collection
+    already holds the same content embedded with the current embedding config.
+
+    The collection is shared by every search that fetched the URL. Within the
+    process its writes are serialized, and the new chunks are upserted before
+    the previous ones are deleted, so concurrent searches never find it empty.
+    """
+    hash = calculate_sha256_string(doc.page_content)
+
+    with get_web_collection_lock(collection_name):
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=collection_name, filter={"hash": hash}, limit=1
+        )
+        if result is not None and result.ids and result.ids[0]:
+            try:
+                embedding_config = json.loads(
+                    result.metadatas[0][0].get("embedding_config", "{}")
+                )
+            except (TypeError, json.JSONDecodeError):
+                embedding_config = None
+
+            if embedding_config == get_current_embedding_config(request):
+                log.info(f"reusing web search collection {collection_name}")
+                return
+
+        existing_ids = []
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            existing = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+            if existing is not None and existing.ids:
+                existing_ids = existing.ids[0]
+
+        texts, metadatas = get_docs_texts_and_metadatas(
+            request, [doc], metadata={"hash": hash}
+        )
+        items = get_vector_items(request, texts, metadatas, user=user)
+
+        VECTOR_DB_CLIENT.upsert(collection_name=collection_name, items=items)
+        if existing_ids:
+            VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=existing_ids)
+
+
 @router.post("/process/web/search")
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
@@ -1473,9 +1843,11 @@ async def process_web_search(
         logging.info(
             f"trying to web search with {request.app.state.config.WEB_SEARCH_ENGINE, form_data.query}"
         )
-        web_results = search_web(
-            request, request.app.state.config.WEB_SEARCH_ENGINE, form_data.query
-        )
+        engine = request.app.state.config.WEB_SEARCH_ENGINE
+        web_results = get_cached_search_results(engine, form_data.query)
+        if web_results is None:
+            web_results = search_web(request, engine, form_data.query)
+            set_cached_search_results(engine, form_data.query, web_results)
     except Exception as e:
         log.exception(e)
 
@@ -1488,13 +1860,12 @@ async def process_web_search(
 
     try:
         urls = [result.link for result in web_results]
-        loader = get_web_loader(
+        docs = await load_web_pages(
             urls,
             verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
             requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
             trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
         )
-        docs = await loader.aload()
         urls = [
             doc.metadata["source"] for doc in docs
         ]  # only keep URLs which could be retrieved
@@ -1517,17 +1888,17 @@ async def process_web_search(
             collection_names = []
             for doc_idx, doc in enumerate(docs):
                 if doc and doc.page_content:
-                    collection_name = f"web-search-{calculate_sha256_string(form_data.query + '-' + urls[doc_idx])}"[
-                        :63
-                    ]
+                    # One collection per URL, shared by every query that finds it
+                    collection_name = (
+                        f"web-search-{calculate_sha256_string(urls[doc_idx])}"[:63]
+                    )
 
                     collection_names.append(collection_name)
                     await run_in_threadpool(
-                        save_docs_to_vector_db,
+                        save_web_doc_to_vector_db,
                         request,
-                        [doc],
+                        doc,
                         collection_name,
-                        overwrite=True,
                         user=user,
                     )
 
@@ -1574,7 +1945,7 @@ def query_doc_handler(
                     query, prefix=prefix, user=user
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
-                reranking_function=request.app.state.rf,
+                reranking_function=get_reranking_function(request),
                 k_reranker=form_data.k_reranker
                 or request.app.state.config.TOP_K_RERANKER,
                 r=(
@@ -1625,7 +1996,7 @@ def query_collection_handler(
                     query, prefix=prefix, user=user
                 ),
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
-                reranking_function=request.app.state.rf,
+                reranking_function=get_reranking_function(request),
                 k_reranker=form_data.k_reranker
                 or request.app.state.config.TOP_K_RERANKER,
                 r=(
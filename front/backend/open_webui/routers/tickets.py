@@ -2,8 +2,6 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-import time
-from collections import defaultdict
 
 from open_webui.models.tickets import (
     Tickets,
@@ -13,34 +11,15 @@ from open_webui.models.tickets import (
 )
 from open_webui.models.users import Users
 from open_webui.utils.auth import get_verified_user, get_admin_user, decode_token
+from open_webui.utils.rate_limit import RateLimiter
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import TICKET_SUBMIT_RATE_LIMIT
 
 router = APIRouter()
 
-# Simple in-memory rate limiting (resets on server restart)
-# For production, consider using Redis or similar
-rate_limit_store = defaultdict(list)
-RATE_LIMIT_MAX_REQUESTS = 5
-RATE_LIMIT_WINDOW = 3600  # 1 hour in seconds
-
-
-def check_rate_limit(client_ip: str) -> bool:
-    """Check if client has exceeded rate limit"""
-    current_time = time.time()
-    
-    # Clean old entries
-    rate_limit_store[client_ip] = [
-        timestamp for timestamp in rate_limit_store[client_ip]
-        if current_time - timestamp < RATE_LIMIT_WINDOW
-    ]
-    
-    # Check if limit exceeded
-    if len(rate_limit_store[client_ip]) >= RATE_LIMIT_MAX_REQUESTS:
-        return False
-    
-    # Add current request
-    rate_limit_store[client_ip].append(current_time)
-    return True
+TICKET_SUBMIT_RATE_LIMITER = RateLimiter(
+    "ticket_submit", TICKET_SUBMIT_RATE_LIMIT, default=(5, 3600)
+)
 
 
 ############################
@@ -48,25 +27,19 @@ def check_rate_limit(client_ip: str) -> bool:
 ############################
 
 
-@router.post("/tickets/submit", response_model=TicketModel)
+@router.post(
+    "/tickets/submit",
+    response_model=TicketModel,
+    dependencies=[Depends(TICKET_SUBMIT_RATE_LIMITER)],
+)
 async def submit_ticket(
     request: Request,
     form_data: TicketForm,
 ):
     """
     Submit a new support ticket.
-    Rate limited to 5 requests per hour per IP address.
+    Rate limited per IP address (TICKET_SUBMIT_RATE_LIMIT, 5 per hour by default).
     """
-    # Get client IP for rate limiting
-    client_ip = request.client.host if request.client else "unknown"
-    
-    # Check rate limit
-    if not check_rate_limit(client_ip):
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded. Please try again later.",
-        )
-    
     # Try to get user_id if user is authenticated (optional)
     user_id = None
     try:
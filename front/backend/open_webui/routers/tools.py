@@ -35,14 +35,11 @@ router = APIRouter()
 @router.get("/", response_model=list[ToolUserResponse])
 async def get_tools(request: Request, user=Depends(get_verified_user)):
 
-    if not request.app.state.TOOL_SERVERS:
-        # If the tool servers are not set, we need to set them
-        # This is done only once when the server starts
-        # This is done to avoid loading the tool servers every time
-
-        request.app.state.TOOL_SERVERS = await get_tool_servers_data(
-            request.app.state.config.TOOL_SERVER_CONNECTIONS
-        )
+    # Served from the spec cache; only the first call per server waits on a
+    # fetch, stale specs are revalidated in the background
+    request.app.state.TOOL_SERVERS = await get_tool_servers_data(
+        request.app.state.config.TOOL_SERVER_CONNECTIONS
+    )
 
     tools = Tools.get_tools()
     for server in request.app.state.TOOL_SERVERS:
@@ -243,6 +240,7 @@ async def update_tools_by_id(
         tools = Tools.update_tool_by_id(id, updated)
 
         if tools:
+            TOOLS.invalidate(id, tool_module)
             return tools
         else:
             raise HTTPException(
@@ -285,9 +283,7 @@ async def delete_tools_by_id(
 
     result = Tools.delete_tool_by_id(id)
     if result:
-        TOOLS = request.app.state.TOOLS
-        if id in TOOLS:
-            del TOOLS[id]
+        request.app.state.TOOLS.invalidate(id)
 
     return result
 
@@ -1,11 +1,21 @@
+import asyncio
+import hashlib
 import os
 import shutil
 import json
 import logging
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Tuple
 
 import boto3
+import requests
+from requests.adapters import HTTPAdapter
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -23,6 +33,8 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_LOCAL_CACHE_MAX_SIZE,
+    STORAGE_MAX_CONCURRENCY,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -31,12 +43,287 @@ from open_webui.constants import ERROR_MESSAGES
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
 from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
 from open_webui.env import SRC_LOG_LEVELS
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Uploads are copied in chunks of this size. It is also the S3 multipart part
+# size and the GCS resumable chunk size (a multiple of 256 KiB).
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Size of the chunks (and of each ranged GET for GCS) when streaming a file
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Most objects a single bulk delete request takes: S3 DeleteObjects, a GCS
+# batch request and an Azure blob batch
+S3_DELETE_BATCH_SIZE = 1000
+GCS_DELETE_BATCH_SIZE = 100
+AZURE_DELETE_BATCH_SIZE = 256
+
+# Seconds during which a cached copy handed out by LocalFileCache.get() is not
+# evicted, so that the caller gets to open it first
+LOCAL_FILE_CACHE_GRACE_PERIOD = 60
+
+
+def iter_batches(items: list, size: int) -> Iterator[list]:
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def map_concurrently(func: Callable[[Any], Any], items: list) -> list:
+    """Calls func on each item, on up to STORAGE_MAX_CONCURRENCY threads."""
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(
+        max_workers=max(min(STORAGE_MAX_CONCURRENCY, len(items)), 1)
+    ) as executor:
+        return list(executor.map(func, items))
+
+
+def get_pooled_session() -> requests.Session:
+    """A requests session keeping up to STORAGE_MAX_CONCURRENCY connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=STORAGE_MAX_CONCURRENCY,
+        pool_maxsize=STORAGE_MAX_CONCURRENCY,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class UploadStream:
+    """
+    File-like wrapper around an upload that keeps a running sha256 and size
+    and writes the local copy as the data is read, so that an upload never
+    has to be held in memory. The first chunk is read eagerly to reject empty
+    uploads before anything is written.
+    """
+
+    def __init__(self, file: BinaryIO, local_file_path: str):
+        self.file = file
+        self.buffer = file.read(UPLOAD_CHUNK_SIZE)
+        if not self.buffer:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+        self.local_file_path = local_file_path
+        self.local_file = open(local_file_path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self.buffer + self.file.read()
+            self.buffer = b""
+        else:
+            data = self.buffer[:size]
+            self.buffer = self.buffer[size:]
+            if len(data) < size:
+                data += self.file.read(size - len(data))
+
+        self.sha256.update(data)
+        self.size += len(data)
+        self.local_file.write(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self.size
+
+    def copy_to_end(self):
+        while self.read(UPLOAD_CHUNK_SIZE):
+            pass
+
+    def get_file_info(self) -> dict:
+        return {"size": self.size, "sha256": self.sha256.hexdigest()}
+
+    def close(self):
+        self.local_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        # Do not leave a partial local copy behind
+        if exc_type is not None and os.path.exists(self.local_file_path):
+            os.remove(self.local_file_path)
+
+
+class LocalFileCache:
+    """
+    Read-through cache of object storage files in UPLOAD_DIR.
+
+    Each local copy is recorded with the ETag (or GCS generation) of the
+    object it was downloaded from, in UPLOAD_DIR/.cache/<name>.etag, and is
+    reused for as long as the object still has that ETag. Downloads go to a
+    temporary file that is atomically renamed into place, and concurrent
+    requests for the same file wait for a single download. Once the cached
+    copies exceed max_size bytes, the least recently used ones are removed,
+    except for copies that are being downloaded or were handed out in the last
+    LOCAL_FILE_CACHE_GRACE_PERIOD seconds.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.key_locks: dict[str, threading.Lock] = {}
+        self.entries: Optional[OrderedDict[str, int]] = None
+
+    def get_cache_dir(self) -> str:
+        return f"{UPLOAD_DIR}/.cache"
+
+    def get_etag_path(self, local_file_path: str) -> str:
+        return f"{self.get_cache_dir()}/{os.path.basename(local_file_path)}.etag"
+
+    def read_etag(self, local_file_path: str) -> Optional[str]:
+        try:
+            with open(self.get_etag_path(local_file_path), "r") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def load_entries(self) -> OrderedDict[str, int]:
+        # Rebuild the LRU order from the copies left by earlier processes
+        if self.entries is None:
+            entries = []
+            cache_dir = self.get_cache_dir()
+            if os.path.isdir(cache_dir):
+                for name in os.listdir(cache_dir):
+                    if not name.endswith(".etag"):
+                        continue
+                    local_file_path = f"{UPLOAD_DIR}/{name.removesuffix('.etag')}"
+                    try:
+                        stat = os.stat(local_file_path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, local_file_path, stat.st_size))
+            self.entries = OrderedDict(
+                (local_file_path, size) for _, local_file_path, size in sorted(entries)
+            )
+        return self.entries
+
+    def get_key_lock(self, local_file_path: str) -> threading.Lock:
+        with self.lock:
+            return self.key_locks.setdefault(local_file_path, threading.Lock())
+
+    def add(self, local_file_path: str, etag: str):
+        """Records a local copy that matches the object with the given ETag."""
+        os.makedirs(self.get_cache_dir(), exist_ok=True)
+        etag_path = self.get_etag_path(local_file_path)
+        tmp_path = f"{etag_path}.{uuid.uuid4()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(etag)
+        os.replace(tmp_path, etag_path)
+
+        with self.lock:
+            entries = self.load_entries()
+            entries[local_file_path] = os.path.getsize(local_file_path)
+            entries.move_to_end(local_file_path)
+        self.evict(keep=local_file_path)
+
+    def get(
+        self, local_file_path: str, etag: str, download: Callable[[str], None]
+    ) -> str:
+        """
+        Returns local_file_path, calling download(tmp_path) first unless the
+        local copy already matches the ETag.
+        """
+        with self.get_key_lock(local_file_path):
+            if (
+                os.path.isfile(local_file_path)
+                and self.read_etag(local_file_path) == etag
+            ):
+                with self.lock:
+                    entries = self.load_entries()
+                    if local_file_path in entries:
+                        entries.move_to_end(local_file_path)
+                    else:
+                        entries[local_file_path] = os.path.getsize(local_file_path)
+                os.utime(local_file_path)
+                return local_file_path
+
+            os.makedirs(self.get_cache_dir(), exist_ok=True)
+            tmp_path = (
+                f"{self.get_cache_dir()}/{os.path.basename(local_file_path)}"
+                f".{uuid.uuid4()}.tmp"
+            )
+            try:
+                download(tmp_path)
+                os.replace(tmp_path, local_file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self.add(local_file_path, etag)
+            return local_file_path
+
+    def remove(self, local_file_path: str):
+        with self.lock:
+            self.load_entries().pop(local_file_path, None)
+        for path in [local_file_path, self.get_etag_path(local_file_path)]:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def clear(self):
+        with self.lock:
+            self.entries = None
+
+    def evict(self, keep: Optional[str] = None):
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            entries = self.load_entries()
+            total = sum(entries.values())
+            candidates = [path for path in entries.keys() if path != keep]
+
+        now = time.time()
+        for local_file_path in candidates:
+            if total <= self.max_size:
+                break
+
+            # Skip the copies that get() is checking or downloading right now
+            key_lock = self.get_key_lock(local_file_path)
+            if not key_lock.acquire(blocking=False):
+                continue
+            try:
+                # get() touches the copies it returns
+                try:
+                    if (
+                        now - os.path.getmtime(local_file_path)
+                        < LOCAL_FILE_CACHE_GRACE_PERIOD
+                    ):
+                        continue
+                except OSError:
+                    pass
+
+                with self.lock:
+                    size = self.load_entries().pop(local_file_path, None)
+                if size is None:
+                    continue
+                total -= size
+
+                log.debug(f"Evicting {local_file_path} from the local file cache")
+                for path in [local_file_path, self.get_etag_path(local_file_path)]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            finally:
+                key_lock.release()
+
+
+LOCAL_FILE_CACHE = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE * 1024 * 1024)
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -44,7 +331,21 @@ class StorageProvider(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
+        """
+        Streams the file to storage. Returns the file info ({"size", "sha256"})
+        and the storage path.
+        """
+        pass
+
+    @abstractmethod
+    def stat_file(self, file_path: str) -> Tuple[int, str]:
+        """Returns the size and ETag of the file."""
+        pass
+
+    @abstractmethod
+    def open_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        """Streams the bytes from start to end (inclusive) of the file."""
         pass
 
     @abstractmethod
@@ -55,23 +356,46 @@ class StorageProvider(ABC):
     def delete_file(self, file_path: str) -> None:
         pass
 
+    def delete_files(self, file_paths: list[str]) -> None:
+        """Deletes several files, concurrently or in bulk requests."""
+        map_concurrently(self.delete_file, file_paths)
+
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
-    def upload_file(file: BinaryIO, filename: str) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    def upload_file(file: BinaryIO, filename: str) -> Tuple[dict, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        with UploadStream(file, file_path) as stream:
+            stream.copy_to_end()
+        return stream.get_file_info(), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
         """Handles downloading of the file from local storage."""
         return file_path
 
+    @staticmethod
+    def stat_file(file_path: str) -> Tuple[int, str]:
+        stat = os.stat(file_path)
+        return stat.st_size, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    @staticmethod
+    def open_range(file_path: str, start: int, end: int) -> Iterator[bytes]:
+        f = open(file_path, "rb")
+
+        def iter_range():
+            with f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return iter_range()
+
     @staticmethod
     def delete_file(file_path: str) -> None:
         """Handles deletion of the file from local storage."""
@@ -106,6 +430,7 @@ class S3StorageProvider(StorageProvider):
                 "use_accelerate_endpoint": S3_USE_ACCELERATE_ENDPOINT,
                 "addressing_style": S3_ADDRESSING_STYLE,
             },
+            max_pool_connections=STORAGE_MAX_CONCURRENCY,
         )
 
         # If access key and secret are provided, use them for authentication
@@ -131,16 +456,25 @@ class S3StorageProvider(StorageProvider):
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             s3_key = os.path.join(self.key_prefix, filename)
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
-            return (
-                open(file_path, "rb").read(),
-                "s3://" + self.bucket_name + "/" + s3_key,
-            )
+            # Large uploads become multipart uploads, one part in memory at a time
+            with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+                self.s3_client.upload_fileobj(
+                    stream,
+                    self.bucket_name,
+                    s3_key,
+                    Config=TransferConfig(
+                        multipart_chunksize=UPLOAD_CHUNK_SIZE, max_concurrency=1
+                    ),
+                )
+            etag = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)[
+                "ETag"
+            ]
+            LOCAL_FILE_CACHE.add(stream.local_file_path, etag)
+            return stream.get_file_info(), "s3://" + self.bucket_name + "/" + s3_key
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -148,12 +482,39 @@ class S3StorageProvider(StorageProvider):
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            etag = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)[
+                "ETag"
+            ]
+            return LOCAL_FILE_CACHE.get(
+                self._get_local_file_path(s3_key),
+                etag,
+                lambda tmp_path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, tmp_path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def stat_file(self, file_path: str) -> Tuple[int, str]:
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name, Key=self._extract_s3_key(file_path)
+            )
+            return response["ContentLength"], response["ETag"]
+        except ClientError as e:
+            raise RuntimeError(f"Error reading file from S3: {e}")
+
+    def open_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._extract_s3_key(file_path),
+                Range=f"bytes={start}-{end}",
+            )
+            return response["Body"].iter_chunks(DOWNLOAD_CHUNK_SIZE)
+        except ClientError as e:
+            raise RuntimeError(f"Error reading file from S3: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -164,25 +525,57 @@ class S3StorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
+        LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
+
+    def delete_files(self, file_paths: list[str]) -> None:
+        """Handles deletion of several files from S3 storage."""
+        keys = [self._extract_s3_key(file_path) for file_path in file_paths]
+        try:
+            map_concurrently(
+                self._delete_objects, list(iter_batches(keys, S3_DELETE_BATCH_SIZE))
+            )
+        except ClientError as e:
+            raise RuntimeError(f"Error deleting files from S3: {e}")
+
+        # Always delete from local storage
+        for file_path in file_paths:
+            LocalStorageProvider.delete_file(file_path)
+            LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from S3 storage."""
         try:
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name)
-            if "Contents" in response:
-                for content in response["Contents"]:
-                    # Skip objects that were not uploaded from open-webui in the first place
-                    if not content["Key"].startswith(self.key_prefix):
-                        continue
-
-                    self.s3_client.delete_object(
-                        Bucket=self.bucket_name, Key=content["Key"]
-                    )
+            # Skip objects that were not uploaded from open-webui in the first place
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            keys = [
+                content["Key"]
+                for page in paginator.paginate(
+                    Bucket=self.bucket_name, Prefix=self.key_prefix
+                )
+                for content in page.get("Contents", [])
+            ]
+            map_concurrently(
+                self._delete_objects, list(iter_batches(keys, S3_DELETE_BATCH_SIZE))
+            )
         except ClientError as e:
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        LOCAL_FILE_CACHE.clear()
+
+    def _delete_objects(self, keys: list[str]) -> None:
+        # Keys that do not exist are reported as deleted
+        response = self.s3_client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        errors = response.get("Errors", [])
+        if errors:
+            raise RuntimeError(
+                f"Error deleting {len(errors)} files from S3: "
+                f"{errors[0].get('Key')}: {errors[0].get('Message')}"
+            )
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
     def _extract_s3_key(self, full_file_path: str) -> str:
@@ -205,15 +598,25 @@ class GCSStorageProvider(StorageProvider):
             # if running on local environment, credentials would be user credentials
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
+        self.gcs_client._http.mount(
+            "https://", get_pooled_session().get_adapter("https://")
+        )
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+        # Requests made on a client while one of its batches is open are
+        # deferred into the batch, so batches use a client of their own
+        self.batch_client = None
+        self.batch_lock = threading.Lock()
+
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
-            blob = self.bucket.blob(filename)
-            blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            # Without a known size, the blob is sent as a resumable upload
+            blob = self.bucket.blob(filename, chunk_size=UPLOAD_CHUNK_SIZE)
+            with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+                blob.upload_from_file(stream)
+            LOCAL_FILE_CACHE.add(stream.local_file_path, str(blob.generation))
+            return stream.get_file_info(), "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -221,14 +624,54 @@ class GCSStorageProvider(StorageProvider):
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
-
-            return local_file_path
+            return LOCAL_FILE_CACHE.get(
+                f"{UPLOAD_DIR}/{filename}",
+                str(blob.generation),
+                blob.download_to_filename,
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def stat_file(self, file_path: str) -> Tuple[int, str]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise RuntimeError(f"Error reading file from GCS: {filename} not found")
+        return blob.size, blob.etag
+
+    def open_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        try:
+            blob = self.bucket.get_blob(filename)
+        except GoogleCloudError as e:
+            raise RuntimeError(f"Error reading file from GCS: {e}")
+        if blob is None:
+            raise RuntimeError(f"Error reading file from GCS: {filename} not found")
+
+        # A single download of the whole range, pinned to the generation looked
+        # up above so that an overwrite fails it rather than mixing versions
+        response = self.gcs_client._http.get(
+            blob._get_download_url(
+                self.gcs_client, if_generation_match=blob.generation
+            ),
+            headers={"Range": f"bytes={start}-{end}"},
+            stream=True,
+        )
+        if response.status_code != 206 and not (
+            response.status_code == 200 and start == 0 and end + 1 >= blob.size
+        ):
+            with response:
+                raise RuntimeError(
+                    f"Error reading file from GCS: {response.status_code} {response.text}"
+                )
+
+        def iter_range():
+            with response:
+                yield from response.iter_content(DOWNLOAD_CHUNK_SIZE)
+
+        return iter_range()
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -240,20 +683,52 @@ class GCSStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
+        LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
+
+    def delete_files(self, file_paths: list[str]) -> None:
+        """Handles deletion of several files from GCS storage."""
+        names = [
+            file_path.removeprefix("gs://").split("/")[1] for file_path in file_paths
+        ]
+        for batch in iter_batches(names, GCS_DELETE_BATCH_SIZE):
+            self._delete_blobs(batch)
+
+        # Always delete from local storage
+        for file_path in file_paths:
+            LocalStorageProvider.delete_file(file_path)
+            LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from GCS storage."""
         try:
-            blobs = self.bucket.list_blobs()
-
-            for blob in blobs:
-                blob.delete()
-
+            names = [blob.name for blob in self.bucket.list_blobs()]
+            for batch in iter_batches(names, GCS_DELETE_BATCH_SIZE):
+                self._delete_blobs(batch)
         except NotFound as e:
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        LOCAL_FILE_CACHE.clear()
+
+    def _delete_blobs(self, names: list[str]) -> None:
+        with self.batch_lock:
+            if self.batch_client is None:
+                if GOOGLE_APPLICATION_CREDENTIALS_JSON:
+                    self.batch_client = storage.Client.from_service_account_info(
+                        info=json.loads(GOOGLE_APPLICATION_CREDENTIALS_JSON)
+                    )
+                else:
+                    self.batch_client = storage.Client()
+            bucket = self.batch_client.bucket(self.bucket_name)
+
+            try:
+                with self.batch_client.batch():
+                    for name in names:
+                        bucket.delete_blob(name)
+            except NotFound:
+                # Only the last error of a batch is raised
+                log.debug(f"Some of {len(names)} files were already deleted from GCS")
 
 
 class AzureStorageProvider(StorageProvider):
@@ -265,25 +740,41 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                transport=RequestsTransport(session=get_pooled_session()),
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                transport=RequestsTransport(session=get_pooled_session()),
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # Without a known length, the blob is staged and committed in blocks
+            with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+                result = blob_client.upload_blob(
+                    stream,
+                    overwrite=True,
+                    max_concurrency=1,
+                    max_block_size=UPLOAD_CHUNK_SIZE,
+                )
+            LOCAL_FILE_CACHE.add(stream.local_file_path, str(result["etag"]))
+            return (
+                stream.get_file_info(),
+                f"{self.endpoint}/{self.container_name}/{filename}",
+            )
+        except ValueError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -291,14 +782,38 @@ class AzureStorageProvider(StorageProvider):
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            etag = blob_client.get_blob_properties().etag
+
+            def download(tmp_path: str):
+                with open(tmp_path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return LOCAL_FILE_CACHE.get(f"{UPLOAD_DIR}/{filename}", str(etag), download)
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def stat_file(self, file_path: str) -> Tuple[int, str]:
+        try:
+            blob_client = self.container_client.get_blob_client(
+                file_path.split("/")[-1]
+            )
+            properties = blob_client.get_blob_properties()
+            return properties.size, properties.etag
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error reading file from Azure Blob Storage: {e}")
+
+    def open_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        try:
+            blob_client = self.container_client.get_blob_client(
+                file_path.split("/")[-1]
+            )
+            return blob_client.download_blob(
+                offset=start, length=end - start + 1
+            ).chunks()
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error reading file from Azure Blob Storage: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -310,18 +825,49 @@ class AzureStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_file(file_path)
+        LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
+
+    def delete_files(self, file_paths: list[str]) -> None:
+        """Handles deletion of several files from Azure Blob Storage."""
+        names = [file_path.split("/")[-1] for file_path in file_paths]
+        try:
+            map_concurrently(
+                self._delete_blobs, list(iter_batches(names, AZURE_DELETE_BATCH_SIZE))
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error deleting files from Azure Blob Storage: {e}")
+
+        # Always delete from local storage
+        for file_path in file_paths:
+            LocalStorageProvider.delete_file(file_path)
+            LOCAL_FILE_CACHE.remove(f"{UPLOAD_DIR}/{file_path.split('/')[-1]}")
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from Azure Blob Storage."""
         try:
-            blobs = self.container_client.list_blobs()
-            for blob in blobs:
-                self.container_client.delete_blob(blob.name)
+            names = list(self.container_client.list_blob_names())
+            map_concurrently(
+                self._delete_blobs, list(iter_batches(names, AZURE_DELETE_BATCH_SIZE))
+            )
         except Exception as e:
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        LOCAL_FILE_CACHE.clear()
+
+    def _delete_blobs(self, names: list[str]) -> None:
+        responses = self.container_client.delete_blobs(
+            *names, raise_on_any_failure=False
+        )
+        # Blobs that do not exist (404) are already deleted
+        failed = [
+            response for response in responses if response.status_code not in [202, 404]
+        ]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} blobs could not be deleted: {failed[0].reason}"
+            )
 
 
 def get_storage_provider(storage_provider: str):
@@ -339,3 +885,47 @@ def get_storage_provider(storage_provider: str):
 
 
 Storage = get_storage_provider(STORAGE_PROVIDER)
+
+
+class AsyncStorageProvider:
+    """
+    Async interface to a storage provider for the async routes: the
+    provider's blocking SDK calls run on a pool of STORAGE_MAX_CONCURRENCY
+    threads of their own, instead of on the event loop or in the thread pool
+    the rest of the server shares.
+    """
+
+    def __init__(self, provider: StorageProvider, max_concurrency: int):
+        self.provider = provider
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(max_concurrency, 1), thread_name_prefix="storage"
+        )
+
+    async def run(self, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+
+    async def get_file(self, file_path: str) -> str:
+        return await self.run(self.provider.get_file, file_path)
+
+    async def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
+        return await self.run(self.provider.upload_file, file, filename)
+
+    async def stat_file(self, file_path: str) -> Tuple[int, str]:
+        return await self.run(self.provider.stat_file, file_path)
+
+    async def open_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        return await self.run(self.provider.open_range, file_path, start, end)
+
+    async def delete_file(self, file_path: str) -> None:
+        await self.run(self.provider.delete_file, file_path)
+
+    async def delete_files(self, file_paths: list[str]) -> None:
+        await self.run(self.provider.delete_files, file_paths)
+
+    async def delete_all_files(self) -> None:
+        await self.run(self.provider.delete_all_files)
+
+
+AsyncStorage = AsyncStorageProvider(Storage, STORAGE_MAX_CONCURRENCY)
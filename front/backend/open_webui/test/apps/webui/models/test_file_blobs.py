@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from open_webui.models import files as files_model
+from open_webui.models.files import FileBlob, FileBlobs, FileModel
+from open_webui.routers import files as files_router
+from sqlalchemy import event
+from test.util.mock_db import mock_db
+
+HASH = "0" * 64
+
+
+@pytest.fixture(autouse=True)
+def db(monkeypatch, tmp_path):
+    with mock_db(monkeypatch, tmp_path, [files_model], [FileBlob.__table__]) as db:
+        yield db
+
+
+def get_file(id: str, path: str, hash: str = HASH) -> FileModel:
+    return FileModel(
+        id=id,
+        user_id="user",
+        filename=f"{id}.txt",
+        path=path,
+        meta={"sha256": hash},
+        created_at=0,
+        updated_at=0,
+    )
+
+
+class TestFileBlobs:
+    def test_acquire_and_release(self):
+        assert FileBlobs.acquire_blob(HASH, "first", 10) == "first"
+        # Duplicates point at the first object
+        assert FileBlobs.acquire_blob(HASH, "second", 10) == "first"
+        assert FileBlobs.get_blob_by_hash(HASH).ref_count == 2
+
+        assert FileBlobs.release_blob(HASH, "first").ref_count == 1
+        assert FileBlobs.get_blob_by_hash(HASH) is not None
+
+        assert FileBlobs.release_blob(HASH, "first").ref_count == 0
+        assert FileBlobs.get_blob_by_hash(HASH) is None
+
+        # The next upload creates the blob again from its own object
+        assert FileBlobs.acquire_blob(HASH, "third", 10) == "third"
+
+    def test_release_unshared_file(self):
+        FileBlobs.acquire_blob(HASH, "first", 10)
+        # Files stored before blobs existed have their own object
+        assert FileBlobs.release_blob(HASH, "legacy") is None
+        assert FileBlobs.release_blob("1" * 64, "first") is None
+        assert FileBlobs.get_blob_by_hash(HASH).ref_count == 1
+
+    def test_concurrent_acquire(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            paths = list(
+                executor.map(
+                    lambda index: FileBlobs.acquire_blob(HASH, f"path{index}", 10),
+                    range(32),
+                )
+            )
+
+        blob = FileBlobs.get_blob_by_hash(HASH)
+        assert set(paths) == {blob.path}
+        assert blob.ref_count == 32
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            blobs = list(
+                executor.map(
+                    lambda _: FileBlobs.release_blob(HASH, blob.path), range(32)
+                )
+            )
+        # The object is deleted once, by a release that saw no references left
+        assert any(blob.ref_count == 0 for blob in blobs)
+        assert FileBlobs.get_blob_by_hash(HASH) is None
+
+    def test_acquire_racing_release(self, db):
+        FileBlobs.acquire_blob(HASH, "first", 10)
+        acquired = []
+
+        def acquire_after_decrement(session):
+            # Runs once, between the decrement to 0 and the removal of the blob
+            if acquired:
+                return
+            acquired.append(None)
+            thread = threading.Thread(
+                target=lambda: acquired.append(
+                    FileBlobs.acquire_blob(HASH, "second", 10)
+                )
+            )
+            thread.start()
+            thread.join()
+
+        event.listen(db, "after_commit", acquire_after_decrement)
+        try:
+            blob = FileBlobs.release_blob(HASH, "first")
+        finally:
+            event.remove(db, "after_commit", acquire_after_decrement)
+
+        # The new file took over the object, so it must not be deleted
+        assert acquired == [None, "first"]
+        assert blob.ref_count == 1
+        assert FileBlobs.get_blob_by_hash(HASH).ref_count == 1
+
+
+class TestDeleteFilesFromStorage:
+    @pytest.fixture(autouse=True)
+    def storage(self, monkeypatch):
+        self.deleted_paths = []
+        self.deleted_collections = []
+
+        async def delete_files(paths):
+            self.deleted_paths.extend(paths)
+
+        monkeypatch.setattr(files_router.AsyncStorage, "delete_files", delete_files)
+        monkeypatch.setattr(
+            files_router,
+            "delete_collections",
+            lambda names: self.deleted_collections.extend(names),
+        )
+
+    def test_keeps_shared_objects(self):
+        FileBlobs.acquire_blob(HASH, "first", 10)
+        FileBlobs.acquire_blob(HASH, "first", 10)
+        FileBlobs.update_blob_data_by_hash(HASH, {"collections": ["file-a"]})
+
+        asyncio.run(files_router.delete_files_from_storage([get_file("a", "first")]))
+        assert self.deleted_paths == []
+        assert self.deleted_collections == []
+
+        asyncio.run(files_router.delete_files_from_storage([get_file("b", "first")]))
+        assert self.deleted_paths == ["first"]
+        assert self.deleted_collections == ["file-a"]
+
+    def test_deletes_in_bulk(self):
+        FileBlobs.acquire_blob(HASH, "shared", 10)
+        FileBlobs.acquire_blob(HASH, "shared", 10)
+
+        files = [
+            get_file("a", "shared"),
+            get_file("b", "legacy"),
+            get_file("c", "unhashed", hash=None),
+        ]
+        asyncio.run(files_router.delete_files_from_storage(files))
+        assert self.deleted_paths == ["legacy", "unhashed"]
+        assert FileBlobs.get_blob_by_hash(HASH).ref_count == 1
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from open_webui.retrieval.vector.dbs import local
+
+DIMENSION = 16
+
+
+def get_items(count: int, seed: int = 0) -> list[dict]:
+    vectors = np.random.default_rng(seed).normal(size=(count, DIMENSION))
+    return [
+        {
+            "id": f"id{i}",
+            "text": f"text {i}",
+            "vector": vectors[i].tolist(),
+            "metadata": {"file_id": f"file{i % 3}", "index": i},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_PATH", str(tmp_path))
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_SEGMENT_ROWS", 100)
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_HNSW_THRESHOLD", 0)
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_QUANTIZATION", "")
+    monkeypatch.setattr(local, "COMPACTION_MIN_DELETED_ROWS", 10)
+    return local.LocalVectorClient()
+
+
+class TestLocalVectorClient:
+    def test_insert_and_search(self, client):
+        items = get_items(250)
+        assert not client.has_collection("test")
+        client.insert("test", items)
+        assert client.has_collection("test")
+
+        result = client.search("test", [items[5]["vector"], items[200]["vector"]], 3)
+        assert [ids[0] for ids in result.ids] == ["id5", "id200"]
+        assert result.documents[0][0] == "text 5"
+        assert result.metadatas[1][0] == {"file_id": "file2", "index": 200}
+        assert result.distances[0][0] == pytest.approx(1.0, abs=1e-5)
+        assert result.distances[0] == sorted(result.distances[0], reverse=True)
+
+        # The rows span three segments
+        assert len(client.get("test").ids[0]) == 250
+        assert len(list(client.path.glob("test/*.vec"))) == 3
+
+    def test_upsert(self, client):
+        items = get_items(10)
+        client.insert("test", items)
+        client.upsert(
+            "test",
+            [{**items[0], "text": "new", "vector": items[7]["vector"]}],
+        )
+
+        result = client.get("test")
+        assert len(result.ids[0]) == 10
+        assert result.documents[0][result.ids[0].index("id0")] == "new"
+
+        result = client.search("test", [items[7]["vector"]], 2)
+        assert sorted(result.ids[0]) == ["id0", "id7"]
+
+    def test_dimension_mismatch(self, client):
+        client.insert("test", get_items(2))
+        with pytest.raises(ValueError):
+            client.insert(
+                "test", [{"id": "x", "text": "", "vector": [1.0], "metadata": {}}]
+            )
+
+    def test_query_and_delete(self, client):
+        client.insert("test", get_items(30))
+
+        assert len(client.query("test", {"file_id": "file1"}).ids[0]) == 10
+        assert len(client.query("test", {"file_id": "file1"}, limit=2).ids[0]) == 2
+        assert (
+            len(
+                client.query(
+                    "test", {"file_id": {"$in": ["file0", "file1"]}, "index": 3}
+                ).ids[0]
+            )
+            == 1
+        )
+
+        client.delete("test", filter={"file_id": "file1"})
+        client.delete("test", ids=["id0", "missing"])
+
+        result = client.get("test")
+        assert len(result.ids[0]) == 19
+        assert "id0" not in result.ids[0]
+        assert all(m["file_id"] != "file1" for m in result.metadatas[0])
+
+        result = client.search("test", [get_items(30)[1]["vector"]], 30)
+        assert "id1" not in result.ids[0]
+        assert len(result.ids[0]) == 19
+
+    def test_compaction(self, client):
+        items = get_items(250)
+        client.insert("test", items)
+        collection = client._get_collection("test")
+
+        collection.delete(ids=[f"id{i}" for i in range(5)])
+        assert not collection.needs_compaction()
+
+        collection.delete(ids=[f"id{i}" for i in range(5, 200)])
+        assert collection.needs_compaction()
+        collection.compact()
+
+        assert not collection.deleted
+        assert len(collection.ids) == 50
+        assert len(list(client.path.glob("test/*.vec"))) == 1
+        result = client.search("test", [items[220]["vector"]], 1)
+        assert result.ids == [["id220"]]
+        assert len(local.LocalVectorClient().get("test").ids[0]) == 50
+
+    def test_second_client(self, client):
+        items = get_items(20)
+        client.insert("test", items[:10])
+
+        other = local.LocalVectorClient()
+        assert len(other.get("test").ids[0]) == 10
+
+        # Writes of one client are picked up by the other
+        client.insert("test", items[10:])
+        client.delete("test", ids=["id0"])
+        assert len(other.get("test").ids[0]) == 19
+        assert other.search("test", [items[15]["vector"]], 1).ids == [["id15"]]
+
+        other.upsert("test", [{**items[1], "text": "new"}])
+        assert client.get("test").documents[0][-1] == "new"
+
+    def test_delete_collection(self, client):
+        client.insert("test", get_items(5))
+        client.insert("other", get_items(5))
+
+        client.delete_collection("test")
+        assert not client.has_collection("test")
+        assert client.has_collection("other")
+        assert not (client.path / "test").exists()
+
+        client.reset()
+        assert not client.has_collection("other")
+
+    def test_missing_collection(self, client):
+        assert client.get("missing") is None
+        assert client.query("missing", {"file_id": "file0"}) is None
+        assert client.search("missing", [[1.0] * DIMENSION], 3) is None
+        client.delete("missing", ids=["id0"])
+        assert not client.has_collection("missing")
+
+    def test_collection_name(self, client):
+        client.insert("../web search", get_items(2))
+        assert client.has_collection("../web search")
+        assert [path.parent for path in client.path.glob("*/manifest.json")] == [
+            client.path / local.hashlib.sha256(b"../web search").hexdigest()
+        ]
+
+    def test_int8_quantization(self, client, monkeypatch):
+        monkeypatch.setattr(local, "LOCAL_VECTOR_DB_QUANTIZATION", "int8")
+        items = get_items(50)
+        client.insert("test", items)
+
+        assert (client.path / "test" / "000000.vec").stat().st_size == 50 * DIMENSION
+        result = client.search("test", [items[5]["vector"]], 1)
+        assert result.ids == [["id5"]]
+        assert result.distances[0][0] == pytest.approx(1.0, abs=1e-2)
+
+    def test_hnsw_search(self, client, monkeypatch):
+        if local.hnswlib is None:
+            pytest.skip("hnswlib is not installed")
+
+        items = get_items(250)
+        client.insert("test", items)
+        queries = [items[i]["vector"] for i in [5, 100, 200]]
+        exact = client.search("test", queries, 5)
+
+        monkeypatch.setattr(local, "LOCAL_VECTOR_DB_HNSW_THRESHOLD", 10)
+        client = local.LocalVectorClient()
+        assert client.search("test", queries, 5).ids == exact.ids
+        assert client._get_collection("test").hnsw_index is not None
+
+        # The index follows later writes
+        client.delete("test", ids=["id5"])
+        client.upsert("test", [{**items[0], "vector": items[100]["vector"]}])
+        result = client.search("test", queries, 2)
+        assert "id5" not in result.ids[0]
+        assert sorted(result.ids[1]) == ["id0", "id100"]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import types
+
+from aiohttp import web
+from open_webui.retrieval.web import cache
+from open_webui.retrieval.web.cache import CachedPage, WebPageCache
+
+PAGE = "<html lang='en'><title>Cats</title><body>Cats purr.</body></html>"
+NEW_PAGE = "<html lang='en'><title>Cats</title><body>Cats nap.</body></html>"
+
+
+def get_page(url: str, age: int = 0, **kwargs) -> CachedPage:
+    return CachedPage(
+        url=url,
+        content="Cats purr.",
+        metadata={"source": url},
+        fetched_at=int(time.time()) - age,
+        **kwargs,
+    )
+
+
+class TestWebPageCache:
+    def test_get_and_set(self, tmp_path):
+        page_cache = WebPageCache(tmp_path, 0, 0)
+        key = cache.get_page_cache_key("https://example.com")
+        assert page_cache.get(key) is None
+
+        page = get_page("https://example.com", etag='"1"')
+        assert page_cache.set(key, page) == page
+        assert page_cache.get(key) == page
+        assert not list(tmp_path.glob("*/*.tmp"))
+
+        # Pages written by another process are found on disk
+        other_cache = WebPageCache(tmp_path, 0, 0)
+        assert other_cache.get(key) == page
+        assert other_cache.get_metrics()["size"] == page_cache.get_metrics()["size"]
+
+    def test_max_size(self, tmp_path):
+        page = get_page("https://example.com/0")
+        size = len(page.model_dump_json())
+        page_cache = WebPageCache(tmp_path, size * 2, 0)
+
+        keys = []
+        for i in range(3):
+            keys.append(cache.get_page_cache_key(f"https://example.com/{i}"))
+            page_cache.set(keys[-1], get_page(f"https://example.com/{i}"))
+
+        assert page_cache.get(keys[0]) is None
+        assert page_cache.get(keys[2]) is not None
+        assert len(list(tmp_path.glob("*/*.json"))) == 2
+
+
+class TestLoadWebPages:
+    """load_web_pages against a local site that honours the validators."""
+
+    def run(self, monkeypatch, tmp_path, handler, page: CachedPage):
+        loaded = []
+
+        def get_web_loader(urls, **kwargs):
+            loaded.extend(urls)
+
+            async def aload():
+                return []
+
+            return types.SimpleNamespace(aload=aload)
+
+        monkeypatch.setattr(cache, "WEB_PAGE_CACHE", WebPageCache(tmp_path, 0, 60))
+        monkeypatch.setattr(cache, "WEB_LOADER_CACHE_TTL", 60)
+        monkeypatch.setattr(cache, "WEB_LOADER_ENGINE", types.SimpleNamespace(value=""))
+        monkeypatch.setattr(cache, "safe_validate_urls", lambda urls: urls)
+        monkeypatch.setattr(cache, "get_web_loader", get_web_loader)
+
+        async def main():
+            site = web.Application()
+            site.router.add_get("/", handler)
+            runner = web.AppRunner(site)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", 0).start()
+            url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+            try:
+                cache.set_cached_page(get_page(url, **page))
+                docs = await cache.load_web_pages([url])
+                session = cache.get_web_page_session()
+                # Revalidations share one session
+                await cache.load_web_pages([url])
+                assert cache.get_web_page_session() is session
+                return docs, cache.get_cached_page(url)
+            finally:
+                await cache.close_web_page_session()
+                await runner.cleanup()
+
+        docs, cached = asyncio.run(main())
+        return docs, cached, loaded
+
+    def test_not_modified(self, monkeypatch, tmp_path):
+        async def handler(request):
+            assert request.headers["If-None-Match"] == '"1"'
+            return web.Response(status=304)
+
+        docs, cached, loaded = self.run(
+            monkeypatch, tmp_path, handler, {"age": 120, "etag": '"1"'}
+        )
+        assert [doc.page_content for doc in docs] == ["Cats purr."]
+        assert time.time() - cached.fetched_at < 60
+        assert not loaded
+
+    def test_modified(self, monkeypatch, tmp_path):
+        async def handler(request):
+            return web.Response(
+                text=NEW_PAGE, content_type="text/html", headers={"ETag": '"2"'}
+            )
+
+        docs, cached, loaded = self.run(
+            monkeypatch, tmp_path, handler, {"age": 120, "etag": '"1"'}
+        )
+        # The body of the revalidation is the new page, without a second fetch
+        assert [doc.page_content for doc in docs] == ["CatsCats nap."]
+        assert docs[0].metadata["title"] == "Cats"
+        assert cached.etag == '"2"'
+        assert cached.content == "CatsCats nap."
+        assert not loaded
+
+    def test_no_validators(self, monkeypatch, tmp_path):
+        async def handler(request):
+            return web.Response(text=NEW_PAGE, content_type="text/html")
+
+        docs, cached, loaded = self.run(monkeypatch, tmp_path, handler, {"age": 120})
+        # Loaded again by the web loader
+        assert not docs
+        assert len(loaded) == 2
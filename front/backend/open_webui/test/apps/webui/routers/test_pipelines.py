@@ -0,0 +1,94 @@
+import asyncio
+import types
+
+import pytest
+from open_webui.routers import pipelines
+
+
+def get_filter(id: str, priority: int, independent: bool = False) -> dict:
+    return {
+        "id": id,
+        "urlIdx": 0,
+        "pipeline": {
+            "type": "filter",
+            "pipelines": ["*"],
+            "priority": priority,
+            "independent": independent,
+        },
+    }
+
+
+USER = types.SimpleNamespace(id="1", email="user@example.com", name="User", role="user")
+
+
+class TestPipelineFilters:
+    def setup_method(self, method):
+        self.events = []
+
+    def mock_call_pipeline_filter(self, monkeypatch, delays: dict):
+        async def call_pipeline_filter(request, filter, direction, user, payload):
+            self.events.append(("start", filter["id"]))
+            try:
+                delay = delays.get(filter["id"], 0.1)
+                if isinstance(delay, Exception):
+                    raise delay
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.events.append(("cancelled", filter["id"]))
+                raise
+            self.events.append(("end", filter["id"]))
+
+            if pipelines.is_independent_filter(filter):
+                return {**payload, "annotated": filter["id"]}
+            return {**payload, "chain": payload.get("chain", []) + [filter["id"]]}
+
+        monkeypatch.setattr(pipelines, "call_pipeline_filter", call_pipeline_filter)
+
+    def test_filter_order(self, monkeypatch):
+        self.mock_call_pipeline_filter(monkeypatch, {})
+        models = {
+            "model": {"id": "model"},
+            "first": get_filter("first", 0),
+            "second": get_filter("second", 1),
+            "annotator": get_filter("annotator", 2, independent=True),
+        }
+
+        payload = asyncio.run(
+            pipelines.process_pipeline_inlet_filter(
+                None, {"model": "model"}, USER, models
+            )
+        )
+
+        # Mutating filters are chained in priority order; the output of an
+        # independent filter is not
+        assert payload == {"model": "model", "chain": ["first", "second"]}
+        # The independent filter ran alongside the first mutating one
+        assert self.events.index(("start", "annotator")) < self.events.index(
+            ("end", "first")
+        )
+
+    def test_rejection_cancels_other_filters(self, monkeypatch):
+        self.mock_call_pipeline_filter(
+            monkeypatch, {"slow": 10, "block": Exception(400, "Blocked")}
+        )
+        models = {
+            "model": {"id": "model"},
+            "slow": get_filter("slow", 0),
+            "block": get_filter("block", 1, independent=True),
+        }
+
+        async def process_inlet_filter():
+            try:
+                await pipelines.process_pipeline_inlet_filter(
+                    None, {"model": "model"}, USER, models
+                )
+            finally:
+                self.events.append(("rejected", "model"))
+
+        with pytest.raises(Exception, match="Blocked"):
+            asyncio.run(asyncio.wait_for(process_inlet_filter(), 5))
+        # The slow filter was stopped before the request was rejected
+        assert self.events.index(("cancelled", "slow")) < self.events.index(
+            ("rejected", "model")
+        )
+        assert ("end", "slow") not in self.events
@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -7,15 +8,20 @@ from moto import mock_aws
 from open_webui.storage import provider
 from gcp_storage_emulator.server import create_server
 from google.cloud import storage
-from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
 from unittest.mock import MagicMock
 
 
+def get_file_info(content: bytes) -> dict:
+    return {"size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+
+
 def mock_upload_dir(monkeypatch, tmp_path):
     """Fixture to monkey-patch the UPLOAD_DIR and create a temporary directory."""
     directory = tmp_path / "uploads"
     directory.mkdir()
     monkeypatch.setattr(provider, "UPLOAD_DIR", str(directory))
+    # Forget the local copies recorded by other tests
+    monkeypatch.setattr(provider.LOCAL_FILE_CACHE, "entries", None)
     return directory
 
 
@@ -66,10 +72,12 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        file_info, file_path = self.Storage.upload_file(
+            self.file_bytesio, self.filename
+        )
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info == get_file_info(self.file_content)
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -88,6 +96,16 @@ class TestLocalStorageProvider:
         self.Storage.delete_file(file_path)
         assert not (upload_dir / self.filename).exists()
 
+    def test_delete_files(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        (upload_dir / self.filename).write_bytes(self.file_content)
+        (upload_dir / self.filename_extra).write_bytes(self.file_content)
+        self.Storage.delete_files(
+            [str(upload_dir / self.filename), str(upload_dir / self.filename_extra)]
+        )
+        assert not (upload_dir / self.filename).exists()
+        assert not (upload_dir / self.filename_extra).exists()
+
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         (upload_dir / self.filename).write_bytes(self.file_content)
@@ -97,10 +115,105 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename_extra).exists()
 
 
+class TestLocalFileCache:
+    def download(self, content: bytes):
+        calls = []
+
+        def download(tmp_path):
+            calls.append(tmp_path)
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+
+        return download, calls
+
+    def add_copy(self, cache, upload_dir, name, size, age):
+        local_file_path = str(upload_dir / name)
+        with open(local_file_path, "wb") as f:
+            f.write(b"x" * size)
+        cache.add(local_file_path, "etag")
+        mtime = os.path.getmtime(local_file_path) - age
+        os.utime(local_file_path, (mtime, mtime))
+        return local_file_path
+
+    def test_get_revalidates_etag(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(0)
+        local_file_path = str(upload_dir / "test.txt")
+
+        download, calls = self.download(b"first")
+        assert cache.get(local_file_path, '"1"', download) == local_file_path
+        assert cache.get(local_file_path, '"1"', download) == local_file_path
+        assert len(calls) == 1
+        assert (upload_dir / "test.txt").read_bytes() == b"first"
+
+        # The object changed in the bucket
+        download, calls = self.download(b"second")
+        assert cache.get(local_file_path, '"2"', download) == local_file_path
+        assert len(calls) == 1
+        assert (upload_dir / "test.txt").read_bytes() == b"second"
+        assert cache.read_etag(local_file_path) == '"2"'
+
+        # A new process finds the copy left by this one
+        cache = provider.LocalFileCache(0)
+        assert cache.get(local_file_path, '"2"', download) == local_file_path
+        assert len(calls) == 1
+
+    def test_evict_least_recently_used(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(10)
+        age = provider.LOCAL_FILE_CACHE_GRACE_PERIOD + 60
+
+        first = self.add_copy(cache, upload_dir, "first", 4, age)
+        second = self.add_copy(cache, upload_dir, "second", 4, age)
+        download, _ = self.download(b"")
+        cache.get(first, "etag", download)
+        self.add_copy(cache, upload_dir, "third", 4, age)
+
+        assert os.path.exists(first)
+        assert not os.path.exists(second)
+        assert not os.path.exists(cache.get_etag_path(second))
+        assert list(cache.entries.keys()) == [first, str(upload_dir / "third")]
+
+    def test_evict_keeps_recently_used(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(10)
+        age = provider.LOCAL_FILE_CACHE_GRACE_PERIOD + 60
+
+        first = self.add_copy(cache, upload_dir, "first", 4, age)
+        second = self.add_copy(cache, upload_dir, "second", 4, age)
+        # Handed out but maybe not opened yet
+        download, _ = self.download(b"")
+        cache.get(first, "etag", download)
+        cache.get(second, "etag", download)
+        third = self.add_copy(cache, upload_dir, "third", 4, 0)
+
+        assert all(os.path.exists(path) for path in [first, second, third])
+
+        # The budget is enforced again once the grace period is over
+        for path in [first, second]:
+            mtime = os.path.getmtime(path) - age
+            os.utime(path, (mtime, mtime))
+        cache.evict()
+        assert not os.path.exists(first)
+        assert os.path.exists(second)
+
+    def test_evict_skips_copies_being_fetched(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(4)
+        age = provider.LOCAL_FILE_CACHE_GRACE_PERIOD + 60
+
+        first = self.add_copy(cache, upload_dir, "first", 4, age)
+        with cache.get_key_lock(first):
+            self.add_copy(cache, upload_dir, "second", 4, age)
+            assert os.path.exists(first)
+        cache.evict()
+        assert not os.path.exists(first)
+
+
 @mock_aws
 class TestS3StorageProvider:
 
-    def __init__(self):
+    def setup_method(self, method):
         self.Storage = provider.S3StorageProvider()
         self.Storage.bucket_name = "my-bucket"
         self.s3_client = boto3.resource("s3", region_name="us-east-1")
@@ -108,7 +221,6 @@ class TestS3StorageProvider:
         self.filename = "test.txt"
         self.filename_extra = "test_exyta.txt"
         self.file_bytesio_empty = io.BytesIO()
-        super().__init__()
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
@@ -116,7 +228,7 @@ class TestS3StorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
@@ -124,7 +236,7 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info == get_file_info(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -132,7 +244,7 @@ class TestS3StorageProvider:
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(s3_file_path)
@@ -142,7 +254,7 @@ class TestS3StorageProvider:
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         assert (upload_dir / self.filename).exists()
@@ -154,6 +266,18 @@ class TestS3StorageProvider:
         assert error["Code"] == "404"
         assert error["Message"] == "Not Found"
 
+    def test_delete_files(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        file_paths = [
+            self.Storage.upload_file(io.BytesIO(self.file_content), f"{i}.txt")[1]
+            for i in range(provider.S3_DELETE_BATCH_SIZE + 1)
+        ]
+        self.Storage.delete_files(file_paths + ["s3://my-bucket/missing.txt"])
+        assert not (upload_dir / "0.txt").exists()
+        bucket = self.s3_client.Bucket(self.Storage.bucket_name)
+        assert list(bucket.objects.all()) == []
+
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         # create 2 files
@@ -187,6 +311,17 @@ class TestS3StorageProvider:
         assert not (upload_dir / self.filename).exists()
         assert not (upload_dir / self.filename_extra).exists()
 
+    def test_delete_all_files_paginated(self, monkeypatch, tmp_path):
+        mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        bucket = self.s3_client.Bucket(self.Storage.bucket_name)
+        # More keys than a single listing page and a single DeleteObjects call
+        for i in range(provider.S3_DELETE_BATCH_SIZE + 200):
+            bucket.put_object(Key=f"{i}.txt", Body=self.file_content)
+
+        self.Storage.delete_all_files()
+        assert list(bucket.objects.all()) == []
+
     def test_init_without_credentials(self, monkeypatch):
         """Test that S3StorageProvider can initialize without explicit credentials."""
         # Temporarily unset the environment variables
@@ -229,7 +364,7 @@ class TestGCSStorageProvider:
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.Storage.bucket.get_blob(self.filename)
@@ -237,7 +372,7 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info == get_file_info(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -245,16 +380,30 @@ class TestGCSStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(gcs_file_path)
         assert file_path == str(upload_dir / self.filename)
         assert (upload_dir / self.filename).exists()
 
+    def test_open_range(self, monkeypatch, tmp_path, setup):
+        mock_upload_dir(monkeypatch, tmp_path)
+        file_info, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename
+        )
+        content = self.Storage.open_range(gcs_file_path, 5, 11)
+        assert b"".join(content) == self.file_content[5:12]
+        content = self.Storage.open_range(gcs_file_path, 0, len(self.file_content) - 1)
+        assert b"".join(content) == self.file_content
+
+        # Errors are raised before the response starts
+        with pytest.raises(RuntimeError):
+            self.Storage.open_range("gs://my-bucket/missing.txt", 0, 1)
+
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         # ensure that local directory has the uploaded file as well
@@ -265,6 +414,17 @@ class TestGCSStorageProvider:
         assert not (upload_dir / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename) == None
 
+    def test_delete_files(self, monkeypatch, tmp_path, setup):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        file_paths = [
+            self.Storage.upload_file(io.BytesIO(self.file_content), f"{i}.txt")[1]
+            for i in range(3)
+        ]
+        self.Storage.delete_files(file_paths + ["gs://my-bucket/missing.txt"])
+        assert not (upload_dir / "0.txt").exists()
+        for i in range(3):
+            assert self.Storage.bucket.get_blob(f"{i}.txt") == None
+
     def test_delete_all_files(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         # create 2 files
@@ -291,38 +451,14 @@ class TestGCSStorageProvider:
         assert self.Storage.bucket.get_blob(self.filename_extra) == None
 
 
-class TestAzureStorageProvider:
-    def __init__(self):
-        super().__init__()
-
-    @pytest.fixture(scope="class")
-    def setup_storage(self, monkeypatch):
-        # Create mock Blob Service Client and related clients
-        mock_blob_service_client = MagicMock()
-        mock_container_client = MagicMock()
-        mock_blob_client = MagicMock()
-
-        # Set up return values for the mock
-        mock_blob_service_client.get_container_client.return_value = (
-            mock_container_client
-        )
-        mock_container_client.get_blob_client.return_value = mock_blob_client
+def read_upload(stream, **kwargs):
+    """Consumes an upload the way the Azure SDK does."""
+    stream.copy_to_end()
+    return {"etag": '"0x1"'}
 
-        # Monkeypatch the Azure classes to return our mocks
-        monkeypatch.setattr(
-            azure.storage.blob,
-            "BlobServiceClient",
-            lambda *args, **kwargs: mock_blob_service_client,
-        )
-        monkeypatch.setattr(
-            azure.storage.blob,
-            "ContainerClient",
-            lambda *args, **kwargs: mock_container_client,
-        )
-        monkeypatch.setattr(
-            azure.storage.blob, "BlobClient", lambda *args, **kwargs: mock_blob_client
-        )
 
+class TestAzureStorageProvider:
+    def setup_method(self, method):
         self.Storage = provider.AzureStorageProvider()
         self.Storage.endpoint = "https://myaccount.blob.core.windows.net"
         self.Storage.container_name = "my-container"
@@ -331,9 +467,11 @@ class TestAzureStorageProvider:
         self.filename_extra = "test_extra.txt"
         self.file_bytesio_empty = io.BytesIO()
 
-        # Apply mocks to the Storage instance
-        self.Storage.blob_service_client = mock_blob_service_client
-        self.Storage.container_client = mock_container_client
+        # Mock the container and the blob clients it returns
+        self.blob_client = MagicMock()
+        self.blob_client.upload_blob.side_effect = read_upload
+        self.Storage.container_client = MagicMock()
+        self.Storage.container_client.get_blob_client.return_value = self.blob_client
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
@@ -345,19 +483,16 @@ class TestAzureStorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
 
-        # Reset side effect and create container
+        # Reset side effect
         self.Storage.container_client.get_blob_client.side_effect = None
-        self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
+        file_info, azure_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        self.blob_client.upload_blob.assert_called_once()
+        assert file_info == get_file_info(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -370,13 +505,11 @@ class TestAzureStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
-        # Mock upload behavior
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         # Mock blob download behavior
-        self.Storage.container_client.get_blob_client().download_blob().readall.return_value = (
-            self.file_content
+        self.blob_client.get_blob_properties.return_value.etag = '"0x2"'
+        self.blob_client.download_blob.return_value.readinto.side_effect = (
+            lambda f: f.write(self.file_content)
         )
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -388,48 +521,84 @@ class TestAzureStorageProvider:
 
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
         # Mock file upload
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        # Mock deletion
-        self.Storage.container_client.get_blob_client().delete_blob.return_value = None
+        assert (upload_dir / self.filename).exists()
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         self.Storage.delete_file(file_url)
 
-        self.Storage.container_client.get_blob_client().delete_blob.assert_called_once()
+        self.blob_client.delete_blob.assert_called_once()
         assert not (upload_dir / self.filename).exists()
 
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
         # Mock file uploads
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
 
         # Mock listing and deletion behavior
-        self.Storage.container_client.list_blobs.return_value = [
-            {"name": self.filename},
-            {"name": self.filename_extra},
+        self.Storage.container_client.list_blob_names.return_value = [
+            self.filename,
+            self.filename_extra,
         ]
-        self.Storage.container_client.get_blob_client().delete_blob.return_value = None
+        self.Storage.container_client.delete_blobs.return_value = []
 
         self.Storage.delete_all_files()
 
-        self.Storage.container_client.list_blobs.assert_called_once()
-        self.Storage.container_client.get_blob_client().delete_blob.assert_any_call()
+        self.Storage.container_client.list_blob_names.assert_called_once()
+        self.Storage.container_client.delete_blobs.assert_called_once_with(
+            self.filename, self.filename_extra, raise_on_any_failure=False
+        )
         assert not (upload_dir / self.filename).exists()
         assert not (upload_dir / self.filename_extra).exists()
 
-    def test_get_file_not_found(self, monkeypatch):
-        self.Storage.create_container()
+    def test_delete_files(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+
+        # Missing blobs (404) count as deleted
+        self.Storage.container_client.delete_blobs.side_effect = (
+            lambda *names, **kwargs: [
+                MagicMock(status_code=404 if name == "missing.txt" else 202)
+                for name in names
+            ]
+        )
+        names = [self.filename, "missing.txt"] + [
+            f"{i}.txt" for i in range(provider.AZURE_DELETE_BATCH_SIZE)
+        ]
+        self.Storage.delete_files(
+            [
+                f"{self.Storage.endpoint}/{self.Storage.container_name}/{name}"
+                for name in names
+            ]
+        )
+
+        batches = [
+            call.args
+            for call in self.Storage.container_client.delete_blobs.call_args_list
+        ]
+        assert len(batches) == 2
+        assert sorted(name for batch in batches for name in batch) == sorted(names)
+        assert not (upload_dir / self.filename).exists()
+
+    def test_delete_files_failure(self, monkeypatch, tmp_path):
+        mock_upload_dir(monkeypatch, tmp_path)
+        self.Storage.container_client.delete_blobs.return_value = [
+            MagicMock(status_code=403, reason="Forbidden")
+        ]
+        with pytest.raises(RuntimeError, match="Forbidden"):
+            self.Storage.delete_files(
+                [f"{self.Storage.endpoint}/{self.Storage.container_name}/x.txt"]
+            )
+
+    def test_get_file_not_found(self, monkeypatch, tmp_path):
+        mock_upload_dir(monkeypatch, tmp_path)
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         # Mock behavior to raise an error for missing blobs
-        self.Storage.container_client.get_blob_client().download_blob.side_effect = (
-            Exception("Blob not found")
-        )
+        self.blob_client.download_blob.side_effect = Exception("Blob not found")
         with pytest.raises(Exception, match="Blob not found"):
             self.Storage.get_file(file_url)
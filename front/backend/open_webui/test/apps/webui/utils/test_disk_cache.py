@@ -0,0 +1,193 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from open_webui.utils.disk_cache import DiskCache
+
+KEY = "ab" + "0" * 62
+OTHER_KEY = "cd" + "0" * 62
+THIRD_KEY = "ef" + "0" * 62
+
+
+def set_age(path, age: float):
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+class FileCache(DiskCache):
+    """One file per entry, its modification time both its creation and use."""
+
+    def get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def scan_entries(self):
+        entries = []
+        for path in self.directory.glob("*/*"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.name, (stat.st_size, stat.st_mtime)))
+        return entries
+
+    def index_entry(self, key: str, entry: tuple[int, float]):
+        self.entries[key] = entry
+        self.size += entry[0]
+
+    def unindex_entry(self, key: str) -> list[Path]:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[0]
+        return [self.get_path(key)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.load_entries().get(key)
+        if entry is None:
+            return None
+        if self.is_expired(entry[1]):
+            self.expirations += 1
+            self.remove(key)
+            return None
+        self.touch(key)
+        return self.get_path(key).read_bytes()
+
+    def set(self, key: str, data: bytes) -> bytes:
+        self.write_file(self.get_path(key), data)
+        with self.lock:
+            self.load_entries()
+            self.unindex_entry(key)
+            self.index_entry(key, (len(data), time.time()))
+        self.evict(keep=key)
+        return data
+
+
+class TestDiskCache:
+    def test_get_or_create(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 0)
+        calls = []
+
+        async def create():
+            calls.append(KEY)
+            return (b"data",)
+
+        assert asyncio.run(cache.get_or_create(KEY, create)) == b"data"
+        assert asyncio.run(cache.get_or_create(KEY, create)) == b"data"
+        assert len(calls) == 1
+        assert not list(tmp_path.glob("*/*.tmp"))
+
+        metrics = cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["entries"] == 1
+        assert metrics["size"] == len(b"data")
+        assert metrics["hit_rate"] == 0.5
+
+    def test_get_or_create_single_flight(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 0)
+        calls = []
+
+        async def create():
+            calls.append(KEY)
+            await asyncio.sleep(0.1)
+            return (b"data",)
+
+        async def main():
+            return await asyncio.gather(
+                *[cache.get_or_create(KEY, create) for _ in range(5)]
+            )
+
+        assert asyncio.run(main()) == [b"data"] * 5
+        assert len(calls) == 1
+        assert cache.get_metrics()["coalesced"] == 4
+        assert not cache.pending
+
+    def test_get_or_create_failure(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 0)
+
+        async def create():
+            await asyncio.sleep(0.1)
+            raise RuntimeError("Creation failed")
+
+        async def main():
+            return await asyncio.gather(
+                *[cache.get_or_create(KEY, create) for _ in range(3)],
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not cache.pending
+        assert cache.get(KEY) is None
+
+    def test_ttl(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 60)
+        cache.set(KEY, b"data")
+        assert cache.get(KEY) == b"data"
+
+        set_age(cache.get_path(KEY), 120)
+        cache = FileCache(tmp_path, 0, 60)
+        assert cache.get(KEY) is None
+        assert not cache.get_path(KEY).exists()
+        assert cache.get_metrics()["expirations"] == 1
+
+    def test_remove_expired(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 60)
+        cache.set(KEY, b"data")
+        set_age(cache.get_path(KEY), 120)
+
+        # Expired entries nobody asks for again are swept on a later write,
+        # at most once per sweep interval
+        cache = FileCache(tmp_path, 0, 60)
+        cache.set(OTHER_KEY, b"data")
+        assert cache.get_path(KEY).exists()
+
+        cache.swept_at = 0
+        cache.set(THIRD_KEY, b"data")
+        assert not cache.get_path(KEY).exists()
+        metrics = cache.get_metrics()
+        assert metrics["expirations"] == 1
+        assert metrics["entries"] == 2
+
+    def test_evict_least_recently_used(self, tmp_path):
+        cache = FileCache(tmp_path, 10, 0)
+        cache.set(KEY, b"x" * 4)
+        cache.set(OTHER_KEY, b"x" * 4)
+        cache.get(KEY)
+        cache.set(THIRD_KEY, b"x" * 4)
+
+        assert cache.get(KEY) is not None
+        assert cache.get(OTHER_KEY) is None
+        assert not cache.get_path(OTHER_KEY).exists()
+        metrics = cache.get_metrics()
+        assert metrics["evictions"] == 1
+        assert metrics["size"] == 8
+
+    def test_evict_keeps_new_entry(self, tmp_path):
+        cache = FileCache(tmp_path, 4, 0)
+        cache.set(KEY, b"x" * 4)
+        cache.set(OTHER_KEY, b"x" * 8)
+
+        # Larger than the budget on its own, but just requested
+        assert cache.get(OTHER_KEY) is not None
+        assert cache.get(KEY) is None
+
+    def test_load_entries_order(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 0)
+        cache.set(KEY, b"x" * 4)
+        cache.set(OTHER_KEY, b"x" * 4)
+        set_age(cache.get_path(OTHER_KEY), 120)
+
+        # A new process rebuilds the LRU order from the disk
+        cache = FileCache(tmp_path, 6, 0)
+        cache.evict()
+        assert cache.get(OTHER_KEY) is None
+        assert cache.get(KEY) is not None
+
+    def test_clear(self, tmp_path):
+        cache = FileCache(tmp_path, 0, 0)
+        cache.set(KEY, b"data")
+        cache.set(OTHER_KEY, b"data")
+
+        cache.clear()
+        assert not list(tmp_path.glob("*/*"))
+        assert cache.get_metrics()["size"] == 0
@@ -0,0 +1,229 @@
+import asyncio
+import time
+
+import pytest
+from open_webui.models import file_jobs as file_jobs_model
+from open_webui.models.file_jobs import (
+    FILE_JOB_COMPLETED,
+    FILE_JOB_FAILED,
+    FILE_JOB_PENDING,
+    FILE_JOB_RUNNING,
+    FileJob,
+    FileJobs,
+)
+from open_webui.utils import file_jobs
+from open_webui.utils.file_jobs import FileProcessingQueue
+from test.util.mock_db import mock_db
+
+
+@pytest.fixture(autouse=True)
+def db(monkeypatch, tmp_path):
+    with mock_db(monkeypatch, tmp_path, [file_jobs_model], [FileJob.__table__]) as db:
+        yield db
+
+
+def insert_job(file_id: str, user_id: str = "user", hash=None, age: int = 0):
+    job = FileJobs.insert_new_job(file_id, user_id, hash)
+    if age:
+        with file_jobs_model.get_db() as db:
+            db.query(FileJob).filter_by(id=job.id).update(
+                {
+                    "available_at": job.available_at - age,
+                    "created_at": job.created_at - age,
+                }
+            )
+            db.commit()
+    return job
+
+
+def claim(worker_id: str, lease_timeout=60, max_jobs_per_user=10, max_attempts=3):
+    return FileJobs.claim_next_job(
+        worker_id, lease_timeout, max_jobs_per_user, max_attempts
+    )
+
+
+class TestFileJobsTable:
+    def test_insert_new_job(self):
+        job = FileJobs.insert_new_job("file", "user", "hash")
+        assert job.status == FILE_JOB_PENDING
+        assert job.attempts == 0
+
+        # A file is queued once while its job is active
+        assert FileJobs.insert_new_job("file", "user").id == job.id
+        claim("worker")
+        assert FileJobs.insert_new_job("file", "user").id == job.id
+
+        FileJobs.complete_job(job.id, "worker")
+        assert FileJobs.insert_new_job("file", "user").id != job.id
+
+    def test_claim_oldest_first(self):
+        newer = insert_job("newer")
+        older = insert_job("older", age=10)
+
+        job = claim("worker1")
+        assert job.id == older.id
+        assert job.status == FILE_JOB_RUNNING
+        assert job.worker_id == "worker1"
+        assert job.attempts == 1
+        assert job.lease_until >= int(time.time()) + 59
+
+        assert claim("worker2").id == newer.id
+        assert claim("worker3") is None
+
+    def test_max_jobs_per_user(self):
+        first = insert_job("first", "user1", age=30)
+        insert_job("second", "user1", age=20)
+        other = insert_job("other", "user2", age=10)
+
+        assert claim("worker1", max_jobs_per_user=1).id == first.id
+        # The older job of user1 waits for the running one
+        assert claim("worker2", max_jobs_per_user=1).id == other.id
+        assert claim("worker3", max_jobs_per_user=1) is None
+
+        FileJobs.complete_job(first.id, "worker1")
+        assert claim("worker3", max_jobs_per_user=1).file_id == "second"
+
+    def test_same_hash_waits(self):
+        first = insert_job("first", "user1", hash="hash", age=10)
+        second = insert_job("second", "user2", hash="hash")
+
+        assert claim("worker1").id == first.id
+        assert claim("worker2") is None
+
+        FileJobs.complete_job(first.id, "worker1")
+        assert (
+            FileJobs.get_completed_job_by_hash("user1", "hash", "other").id == first.id
+        )
+        assert FileJobs.get_completed_job_by_hash("user1", "hash", "first") is None
+        assert FileJobs.get_completed_job_by_hash("user2", "hash", "second") is None
+        assert claim("worker2").id == second.id
+
+    def test_lease(self):
+        job = insert_job("file")
+        assert claim("worker1", lease_timeout=60).id == job.id
+        assert FileJobs.heartbeat_job(job.id, "worker1", 60)
+        assert claim("worker2") is None
+
+        # The worker stopped heartbeating
+        FileJobs.heartbeat_job(job.id, "worker1", -1)
+        taken_over = claim("worker2")
+        assert taken_over.id == job.id
+        assert taken_over.attempts == 2
+
+        # The first worker lost the job
+        assert not FileJobs.heartbeat_job(job.id, "worker1", 60)
+        assert not FileJobs.complete_job(job.id, "worker1")
+        assert FileJobs.complete_job(job.id, "worker2")
+        assert FileJobs.get_job_by_id(job.id).status == FILE_JOB_COMPLETED
+
+    def test_lease_expired_on_last_attempt(self):
+        job = insert_job("file")
+        claim("worker1", lease_timeout=-1, max_attempts=1)
+
+        assert claim("worker2", max_attempts=1) is None
+        job = FileJobs.get_job_by_id(job.id)
+        assert job.status == FILE_JOB_FAILED
+        assert job.error == "Processing did not finish"
+        assert job.worker_id is None
+
+    def test_retry(self):
+        job = insert_job("file")
+        claim("worker1")
+        assert FileJobs.fail_job(job.id, "worker1", "Error", int(time.time()) + 60)
+
+        job = FileJobs.get_job_by_id(job.id)
+        assert job.status == FILE_JOB_PENDING
+        assert job.error == "Error"
+        # Not before its retry time
+        assert claim("worker2") is None
+
+        with file_jobs_model.get_db() as db:
+            db.query(FileJob).filter_by(id=job.id).update(
+                {"available_at": int(time.time())}
+            )
+            db.commit()
+        assert claim("worker2").attempts == 2
+
+        assert FileJobs.fail_job(job.id, "worker2", "Error again")
+        job = FileJobs.get_job_by_id(job.id)
+        assert job.status == FILE_JOB_FAILED
+        assert job.error == "Error again"
+        assert claim("worker3") is None
+
+
+class TestFileProcessingQueue:
+    def test_process_jobs(self, monkeypatch):
+        processed = []
+        monkeypatch.setattr(
+            file_jobs,
+            "process_file_job",
+            lambda request, job: processed.append(job.file_id),
+        )
+        queue = FileProcessingQueue(workers=2, redis_url="")
+
+        async def main():
+            queue.start(None)
+            try:
+                jobs = [await queue.enqueue(f"file{i}", "user") for i in range(3)]
+                return await asyncio.wait_for(
+                    asyncio.gather(*[queue.wait_for_job(job.id) for job in jobs]), 10
+                )
+            finally:
+                await queue.stop()
+
+        jobs = asyncio.run(main())
+        assert [job.status for job in jobs] == [FILE_JOB_COMPLETED] * 3
+        assert sorted(processed) == ["file0", "file1", "file2"]
+        assert not queue.waiters
+
+    def test_retry_with_backoff(self, monkeypatch):
+        def process_file_job(request, job):
+            raise Exception("Extraction failed")
+
+        monkeypatch.setattr(file_jobs, "process_file_job", process_file_job)
+        queue = FileProcessingQueue(workers=0, max_attempts=2, redis_url="")
+
+        async def run_next_job():
+            job = claim("worker", max_attempts=2)
+            await queue.run_job(job, "worker")
+            return FileJobs.get_job_by_id(job.id)
+
+        job = insert_job("file")
+        retried = asyncio.run(run_next_job())
+        assert retried.status == FILE_JOB_PENDING
+        assert retried.error == "Extraction failed"
+        assert (
+            retried.available_at
+            >= int(time.time()) + file_jobs.FILE_JOB_RETRY_BACKOFF - 1
+        )
+
+        with file_jobs_model.get_db() as db:
+            db.query(FileJob).filter_by(id=job.id).update({"available_at": 0})
+            db.commit()
+        failed = asyncio.run(run_next_job())
+        assert failed.status == FILE_JOB_FAILED
+        assert failed.attempts == 2
+
+    def test_wait_for_first_attempt(self, monkeypatch):
+        def process_file_job(request, job):
+            raise Exception("Extraction failed")
+
+        monkeypatch.setattr(file_jobs, "process_file_job", process_file_job)
+        queue = FileProcessingQueue(workers=1, max_attempts=3, redis_url="")
+
+        async def main():
+            queue.start(None)
+            try:
+                job = await queue.enqueue("file", "user")
+                # Well before the poll interval and the retry backoff
+                return await asyncio.wait_for(
+                    queue.wait_for_job(job.id, retries=False), 2
+                )
+            finally:
+                await queue.stop()
+
+        job = asyncio.run(main())
+        assert job.status == FILE_JOB_PENDING
+        assert job.error == "Extraction failed"
+        assert job.attempts == 1
+        assert not queue.waiters
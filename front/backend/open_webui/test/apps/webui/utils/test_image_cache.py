@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+from open_webui.utils.images import cache
+from open_webui.utils.images.cache import (
+    ImageGenerationCache,
+    get_image_generation_cache_key,
+)
+
+PARAMS = {"engine": "comfyui", "model": "sdxl", "prompt": "A cat", "seed": 1}
+KEY = get_image_generation_cache_key(PARAMS)
+OTHER_KEY = get_image_generation_cache_key({**PARAMS, "seed": 2})
+
+CAT = (b"cat image", "image/png")
+DOG = (b"dog image", "image/png")
+
+
+def test_cache_key():
+    # Independent of the order of the parameters
+    assert KEY == get_image_generation_cache_key(dict(reversed(PARAMS.items())))
+    assert KEY != OTHER_KEY
+
+
+class TestImageGenerationCache:
+    def test_get_and_set(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 0, 0)
+        assert image_cache.get(KEY) is None
+
+        image_cache.set(KEY, [CAT, DOG], {"prompt": "A cat"})
+        assert image_cache.get(KEY) == ([CAT, DOG], {"prompt": "A cat"})
+        assert not list(tmp_path.glob("**/*.tmp"))
+
+        # Results written by another process are found on disk
+        assert ImageGenerationCache(tmp_path, 0, 0).get(KEY) == (
+            [CAT, DOG],
+            {"prompt": "A cat"},
+        )
+
+    def test_shared_images(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 0, 0)
+        image_cache.set(KEY, [CAT], {})
+        image_cache.set(OTHER_KEY, [CAT, DOG], {})
+
+        # Identical images are stored once
+        assert len(list(tmp_path.glob("objects/*/*"))) == 2
+        metrics = image_cache.get_metrics()
+        assert metrics["entries"] == 2
+        assert metrics["images"] == 2
+        assert metrics["size"] == len(CAT[0]) + len(DOG[0])
+
+        # Removing a result keeps the images other results use
+        image_cache.remove(OTHER_KEY)
+        assert image_cache.get(KEY) == ([CAT], {})
+        assert len(list(tmp_path.glob("objects/*/*"))) == 1
+
+        # Replacing a result drops the images only it used
+        image_cache.set(KEY, [DOG], {})
+        assert image_cache.get(KEY) == ([DOG], {})
+        assert len(list(tmp_path.glob("objects/*/*"))) == 1
+        assert image_cache.get_metrics()["size"] == len(DOG[0])
+
+    def test_get_or_create(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 0, 0)
+
+        async def create():
+            return [CAT], {"prompt": "A cat"}
+
+        # Generated and cached results come back alike
+        for _ in range(2):
+            result = asyncio.run(image_cache.get_or_create(KEY, create))
+            assert result == ([CAT], {"prompt": "A cat"})
+        assert image_cache.get_metrics()["hits"] == 1
+
+    def test_ttl(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 0, 60)
+        image_cache.set(KEY, [CAT], {})
+        assert image_cache.get(KEY) is not None
+
+        # The age of a result is recorded in its manifest
+        image_cache = ImageGenerationCache(tmp_path, 0, 0.1)
+        time.sleep(0.2)
+        assert image_cache.get(KEY) is None
+        assert not image_cache.get_manifest_path(KEY).exists()
+        assert not list(tmp_path.glob("objects/*/*"))
+        assert image_cache.get_metrics()["expirations"] == 1
+
+    def test_evict_shared_images(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 17, 0)
+        image_cache.set(KEY, [(b"x" * 8, "image/png")], {})
+        image_cache.set(
+            OTHER_KEY, [(b"x" * 8, "image/png"), (b"y" * 8, "image/png")], {}
+        )
+        # Shared images count once against the budget
+        assert image_cache.get_metrics()["size"] == 16
+
+        # Evicting the first result frees nothing, as its image is still used
+        third_key = get_image_generation_cache_key({**PARAMS, "seed": 3})
+        image_cache.set(third_key, [(b"z" * 2, "image/png")], {})
+        assert image_cache.get(KEY) is None
+        assert image_cache.get(OTHER_KEY) is None
+        assert image_cache.get(third_key) is not None
+        assert image_cache.get_metrics()["evictions"] == 2
+        assert image_cache.get_metrics()["size"] == 2
+        assert len(list(tmp_path.glob("objects/*/*"))) == 1
+
+    def test_evicted_by_another_process(self, tmp_path):
+        image_cache = ImageGenerationCache(tmp_path, 0, 0)
+        image_cache.set(KEY, [CAT], {})
+
+        ImageGenerationCache(tmp_path, 0, 0).remove(KEY)
+        assert image_cache.get(KEY) is None
+        assert image_cache.get_metrics()["entries"] == 0
+        assert image_cache.get_metrics()["size"] == 0
+
+
+class TestImagePromptCache:
+    def test_get_and_set(self, monkeypatch):
+        monkeypatch.setattr(cache, "IMAGE_PROMPT_CACHE", cache.OrderedDict())
+        key = cache.get_image_prompt_cache_key(
+            "model", "template", [{"role": "user", "content": "Draw a cat"}]
+        )
+        assert cache.get_cached_image_prompt(key) is None
+
+        cache.set_cached_image_prompt(key, "A cat")
+        assert cache.get_cached_image_prompt(key) == "A cat"
+        assert key != cache.get_image_prompt_cache_key(
+            "model", "template", [{"role": "user", "content": "Draw a dog"}]
+        )
+
+    def test_ttl_and_max_size(self, monkeypatch):
+        monkeypatch.setattr(cache, "IMAGE_PROMPT_CACHE", cache.OrderedDict())
+        monkeypatch.setattr(cache, "IMAGE_PROMPT_CACHE_MAX_SIZE", 2)
+        monkeypatch.setattr(cache, "IMAGE_GENERATION_CACHE_TTL", 60)
+
+        for key in ["a", "b", "c"]:
+            cache.set_cached_image_prompt(key, key)
+        assert list(cache.IMAGE_PROMPT_CACHE.keys()) == ["b", "c"]
+
+        cached_at, prompt = cache.IMAGE_PROMPT_CACHE["b"]
+        cache.IMAGE_PROMPT_CACHE["b"] = (cached_at - 120, prompt)
+        assert cache.get_cached_image_prompt("b") is None
+        assert cache.get_cached_image_prompt("c") == "c"
@@ -0,0 +1,90 @@
+import json
+import types
+from unittest.mock import MagicMock
+
+import pytest
+from open_webui.utils import models
+from open_webui.utils.models import ModelCatalog
+
+SNAPSHOT = {
+    "version": 2,
+    "provider_models": [],
+    "function_models": [],
+    "refreshed_at": 0,
+    "models": {"gpt": {"id": "gpt"}},
+}
+
+
+def get_request():
+    return types.SimpleNamespace(
+        app=types.SimpleNamespace(state=types.SimpleNamespace())
+    )
+
+
+class TestModelCatalog:
+    def setup_method(self, method):
+        # Without a Redis URL no subscriber is started
+        self.catalog = ModelCatalog(60)
+        self.catalog.redis = MagicMock()
+        self.catalog.redis.get.side_effect = lambda key: {
+            ModelCatalog.REDIS_VERSION_KEY: "2",
+            ModelCatalog.REDIS_KEY: json.dumps(SNAPSHOT),
+        }[key]
+
+    def test_load_subscribed(self):
+        self.catalog.subscribed.set()
+        request = get_request()
+
+        # Nothing announced, so reads make no Redis call
+        self.catalog.load(request)
+        assert not self.catalog.redis.get.called
+
+        self.catalog.published_version = 2
+        self.catalog.load(request)
+        self.catalog.load(request)
+        self.catalog.redis.get.assert_called_once_with(ModelCatalog.REDIS_KEY)
+        assert self.catalog.version == 2
+        assert request.app.state.MODELS == SNAPSHOT["models"]
+
+    def test_load_unsubscribed(self):
+        request = get_request()
+        self.catalog.load(request)
+        assert self.catalog.version == 2
+
+        # The version is checked on every read
+        self.catalog.redis.get.reset_mock()
+        self.catalog.load(request)
+        self.catalog.redis.get.assert_called_once_with(ModelCatalog.REDIS_VERSION_KEY)
+
+    def test_publish(self):
+        self.catalog.redis.incr.return_value = 3
+        self.catalog.publish(get_request())
+        assert self.catalog.version == 3
+        self.catalog.redis.publish.assert_called_once_with(
+            ModelCatalog.REDIS_CHANNEL, 3
+        )
+
+    def test_listen(self, monkeypatch):
+        pubsub = self.catalog.redis.pubsub.return_value
+        pubsub.listen.return_value = iter(
+            [
+                {"type": "message", "data": "4"},
+                {"type": "message", "data": "invalid"},
+                {"type": "message", "data": "3"},
+            ]
+        )
+
+        class Stop(Exception):
+            pass
+
+        def sleep(seconds):
+            raise Stop()
+
+        monkeypatch.setattr(models.time, "sleep", sleep)
+        with pytest.raises(Stop):
+            self.catalog.listen()
+
+        # Caught up with the version in Redis, then kept the latest announced
+        assert self.catalog.published_version == 4
+        assert not self.catalog.subscribed.is_set()
+        pubsub.subscribe.assert_called_once_with(ModelCatalog.REDIS_CHANNEL)
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from open_webui.utils import plugin
+from unittest.mock import MagicMock
+
+FILTER_SOURCE = '''"""
+title: Test Filter
+"""
+COUNTER = []
+
+
+class Filter:
+    def inlet(self, body):
+        COUNTER.append(body)
+        return body
+'''
+
+
+class StopListening(BaseException):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def plugin_code_cache(monkeypatch):
+    monkeypatch.setattr(plugin, "PLUGIN_CODE_CACHE", plugin.OrderedDict())
+    return plugin.PLUGIN_CODE_CACHE
+
+
+class TestPluginCodeCache:
+    def test_cache_key(self, plugin_code_cache):
+        code = plugin.get_plugin_code("function_test", FILTER_SOURCE)
+        assert plugin.get_plugin_code("function_test", FILTER_SOURCE) is code
+        assert len(plugin_code_cache) == 1
+
+        # Code is compiled with the module name as its file name
+        other = plugin.get_plugin_code("function_other", FILTER_SOURCE)
+        assert other is not code
+        assert other.co_filename == "<function_other>"
+
+        # Saving new content compiles it again
+        updated = plugin.get_plugin_code(
+            "function_test", FILTER_SOURCE.replace("Test Filter", "Updated")
+        )
+        assert updated is not code
+        assert len(plugin_code_cache) == 3
+
+    def test_max_size(self, plugin_code_cache, monkeypatch):
+        monkeypatch.setattr(plugin, "PLUGIN_CODE_CACHE_MAX_SIZE", 2)
+        first = plugin.get_plugin_code("function_a", "a = 1")
+        plugin.get_plugin_code("function_b", "b = 1")
+        assert plugin.get_plugin_code("function_a", "a = 1") is first
+        plugin.get_plugin_code("function_c", "c = 1")
+
+        assert [name for name, _ in plugin_code_cache.keys()] == [
+            "function_a",
+            "function_c",
+        ]
+
+    def test_load_function_module(self, plugin_code_cache):
+        first, kind, frontmatter = plugin.load_function_module_by_id(
+            "test", content=FILTER_SOURCE
+        )
+        second, _, _ = plugin.load_function_module_by_id("test", content=FILTER_SOURCE)
+        assert kind == "filter"
+        assert frontmatter == {"title": "Test Filter"}
+        assert len(plugin_code_cache) == 1
+
+        # Each load still gets its own module globals
+        first.inlet({"n": 1})
+        assert type(first).inlet.__globals__["COUNTER"] == [{"n": 1}]
+        assert type(second).inlet.__globals__["COUNTER"] == []
+
+    def test_syntax_error(self, plugin_code_cache):
+        with pytest.raises(SyntaxError):
+            plugin.get_plugin_code("function_test", "class Filter(")
+        assert not plugin_code_cache
+
+
+class TestPluginModuleCache:
+    def get_cache(self, kind: str = "function") -> plugin.PluginModuleCache:
+        cache = plugin.PluginModuleCache(kind, redis_url="")
+        cache.redis = MagicMock()
+        return cache
+
+    def test_invalidate(self):
+        cache = plugin.PluginModuleCache("function", redis_url="")
+        cache["a"] = "module a"
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        assert "a" not in cache
+
+        cache.invalidate("b", "module b")
+        assert cache == {"b": "module b"}
+
+    def test_invalidate_publishes(self):
+        cache = self.get_cache()
+        cache["a"] = "module a"
+        cache.invalidate("a")
+
+        channel, message = cache.redis.publish.call_args.args
+        assert channel == plugin.PluginModuleCache.REDIS_CHANNEL
+        assert json.loads(message) == {
+            "kind": "function",
+            "id": "a",
+            "instance_id": cache.instance_id,
+        }
+
+        # A failing Redis does not fail the update
+        cache.redis.publish.side_effect = ConnectionError("Redis is down")
+        cache.invalidate("b", "module b")
+        assert cache["b"] == "module b"
+
+    def test_listen(self):
+        cache = self.get_cache()
+
+        def listen():
+            cache.update({"a": 1, "b": 2, "c": 3, "d": 4})
+            for data in [
+                {"kind": "function", "id": "a", "instance_id": "other"},
+                # Sent by this worker, which already updated its copy
+                {"kind": "function", "id": "b", "instance_id": cache.instance_id},
+                {"kind": "tool", "id": "c", "instance_id": "other"},
+                "not json",
+            ]:
+                yield {"type": "message", "data": json.dumps(data)}
+            yield {"type": "message", "data": "{"}
+            raise StopListening()
+
+        cache["stale"] = 0
+        cache.redis.pubsub.return_value.listen.side_effect = listen
+        with pytest.raises(StopListening):
+            cache.listen()
+
+        # Invalidations missed while not subscribed drop everything
+        assert "stale" not in cache
+        assert cache == {"b": 2, "c": 3, "d": 4}
+        cache.redis.pubsub.return_value.subscribe.assert_called_once_with(
+            plugin.PluginModuleCache.REDIS_CHANNEL
+        )
+        cache.redis.pubsub.return_value.close.assert_called_once()
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import types
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from open_webui.utils import rate_limit
+from open_webui.utils.rate_limit import RateLimiter, parse_rate_limit
+from unittest.mock import MagicMock
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(
+        rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic)
+    )
+    return clock
+
+
+class SlidingWindowScript:
+    """Stands in for the Lua script, with the same window semantics."""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.keys: dict[str, list[float]] = {}
+        self.calls = []
+
+    def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        limit, window, _ = args
+        now = self.clock.now * 1000
+        hits = [t for t in self.keys.get(keys[0], []) if t > now - window]
+        self.keys[keys[0]] = hits
+        if len(hits) >= limit:
+            return [0, hits[0] + window - now]
+        hits.append(now)
+        return [1, 0]
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("5/3600", (60, 60)) == (5, 3600)
+    assert parse_rate_limit("bogus", (3, 9)) == (3, 9)
+    assert parse_rate_limit(None, (3, 9)) == (3, 9)
+
+
+class TestMemoryRateLimiter:
+    def test_sliding_window(self, clock):
+        limiter = RateLimiter("test", "2/60", redis_url="")
+        assert limiter.hit("client") == (True, 0)
+        clock.now += 30
+        assert limiter.hit("client") == (True, 0)
+
+        allowed, retry_after = limiter.hit("client")
+        assert not allowed
+        assert retry_after == pytest.approx(30)
+        # Other clients have their own window
+        assert limiter.hit("other") == (True, 0)
+
+        # The first request left the window, the second one is still in it
+        clock.now += 30
+        assert limiter.hit("client") == (True, 0)
+        assert not limiter.hit("client")[0]
+
+    def test_rejected_requests_are_not_counted(self, clock):
+        limiter = RateLimiter("test", "1/60", redis_url="")
+        assert limiter.hit("client")[0]
+        for _ in range(5):
+            clock.now += 10
+            assert not limiter.hit("client")[0]
+        clock.now += 10
+        assert limiter.hit("client")[0]
+
+    def test_disabled(self, clock):
+        limiter = RateLimiter("test", "0/60", redis_url="")
+        assert all(limiter.hit("client")[0] for _ in range(100))
+
+    def test_max_keys(self, clock, monkeypatch):
+        monkeypatch.setattr(rate_limit, "RATE_LIMIT_MEMORY_MAX_KEYS", 3)
+        limiter = RateLimiter("test", "1/60", redis_url="")
+        for index in range(5):
+            assert limiter.hit(f"client{index}")[0]
+
+        assert list(limiter.hits.keys()) == ["client2", "client3", "client4"]
+        assert not limiter.hit("client4")[0]
+        # Forgotten, so allowed again
+        assert limiter.hit("client0")[0]
+
+
+class TestRedisRateLimiter:
+    def get_limiter(self, monkeypatch, clock, rate: str) -> RateLimiter:
+        redis = MagicMock()
+        redis.register_script.return_value = SlidingWindowScript(clock)
+        monkeypatch.setattr(
+            rate_limit, "get_redis_connection", lambda *args, **kwargs: redis
+        )
+        return RateLimiter("test", rate, redis_url="redis://localhost:6379/0")
+
+    def test_registers_script(self, monkeypatch, clock):
+        limiter = self.get_limiter(monkeypatch, clock, "2/60")
+        limiter.redis.register_script.assert_called_once_with(
+            rate_limit.SLIDING_WINDOW_SCRIPT
+        )
+
+    def test_sliding_window(self, monkeypatch, clock):
+        limiter = self.get_limiter(monkeypatch, clock, "2/60")
+        assert limiter.hit("client") == (True, 0)
+        clock.now += 20
+        assert limiter.hit("client") == (True, 0)
+
+        allowed, retry_after = limiter.hit("client")
+        assert not allowed
+        assert retry_after == pytest.approx(40)
+
+        keys, args = limiter.script.calls[0]
+        assert keys == ["open-webui:rate_limit:test:client"]
+        assert args[:2] == [2, 60000]
+        # Each request is a distinct member of the sorted set
+        assert len({args[2] for _, args in limiter.script.calls}) == 3
+        # Nothing is tracked in memory
+        assert not limiter.hits
+
+    def test_dependency_off_event_loop(self, monkeypatch, clock):
+        limiter = self.get_limiter(monkeypatch, clock, "1/60")
+        script = limiter.script
+        threads = []
+
+        def call_script(keys, args):
+            threads.append(threading.current_thread())
+            return script(keys, args)
+
+        limiter.script = call_script
+        request = types.SimpleNamespace(client=types.SimpleNamespace(host="client"))
+
+        asyncio.run(limiter(request))
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(limiter(request))
+        assert e.value.status_code == 429
+        assert threading.main_thread() not in threads
+
+    def test_memory_fallback(self, monkeypatch, clock):
+        limiter = self.get_limiter(monkeypatch, clock, "1/60")
+        limiter.script = MagicMock(side_effect=ConnectionError("Redis is down"))
+
+        assert limiter.hit("client")[0]
+        assert not limiter.hit("client")[0]
+        assert "client" in limiter.hits
+
+
+def test_dependency(clock):
+    limiter = RateLimiter("test", "1/60", redis_url="")
+    app = FastAPI()
+
+    @app.post("/submit", dependencies=[Depends(limiter)])
+    def submit():
+        return {"status": True}
+
+    with TestClient(app) as client:
+        assert client.post("/submit").status_code == 200
+        clock.now += 15.5
+        response = client.post("/submit")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "45"
+    assert response.json()["detail"] == rate_limit.ERROR_MESSAGES.RATE_LIMIT_EXCEEDED
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import time
+import types
+
+import httpx
+from aiohttp import web
+from fastapi import FastAPI
+from open_webui.models.users import UserModel
+from open_webui.routers import audio
+from open_webui.utils.auth import get_verified_user
+from open_webui.utils.speech_cache import SpeechCache
+
+KEY = "ab" + "0" * 62
+OTHER_KEY = "cd" + "0" * 62
+
+
+class TestSpeechCache:
+    def test_get_and_set(self, tmp_path):
+        cache = SpeechCache(tmp_path, 0, 0)
+        assert cache.get(KEY) is None
+
+        path = cache.set(KEY, b"audio", {"input": "Hello"})
+        assert path == tmp_path / "ab" / f"{KEY}.mp3"
+        assert cache.get(KEY) == path
+        assert path.read_bytes() == b"audio"
+        assert json.loads(cache.get_payload_path(KEY).read_text()) == {"input": "Hello"}
+        assert not list(tmp_path.glob("*/*.tmp"))
+
+        # Entries written by another process are found on disk
+        assert SpeechCache(tmp_path, 0, 0).get(KEY) == path
+
+    def test_ttl(self, tmp_path):
+        cache = SpeechCache(tmp_path, 0, 60)
+        path = cache.set(KEY, b"audio", {})
+        assert cache.get(KEY) == path
+
+        # The age of an entry is that of its payload; reading it does not
+        # extend it
+        created_at = time.time() - 120
+        os.utime(cache.get_payload_path(KEY), (created_at, created_at))
+        cache = SpeechCache(tmp_path, 0, 60)
+        assert cache.get(KEY) is None
+        assert not path.exists()
+        assert not cache.get_payload_path(KEY).exists()
+        assert cache.get_metrics()["expirations"] == 1
+
+    def test_migrate_flat_layout(self, tmp_path):
+        (tmp_path / f"{KEY}.mp3").write_bytes(b"audio")
+        (tmp_path / f"{KEY}.json").write_text(json.dumps({"input": "Hello"}))
+        (tmp_path / "other.txt").write_text("unrelated")
+
+        cache = SpeechCache(tmp_path, 0, 0)
+        path = cache.get(KEY)
+        assert path == tmp_path / "ab" / f"{KEY}.mp3"
+        assert path.read_bytes() == b"audio"
+        assert cache.get_payload_path(KEY).exists()
+        assert not (tmp_path / f"{KEY}.mp3").exists()
+        assert not (tmp_path / f"{KEY}.json").exists()
+        assert (tmp_path / "other.txt").exists()
+        assert cache.get_metrics()["entries"] == 1
+
+
+class TestSpeechEndpoint:
+    """/audio/speech against a local stand-in for an OpenAI compatible API."""
+
+    def test_speech(self, monkeypatch, tmp_path):
+        calls = []
+
+        async def create_speech(request):
+            body = await request.json()
+            calls.append(body)
+            await asyncio.sleep(0.1)
+            return web.Response(
+                body=f"audio:{body['input']}".encode(), content_type="audio/mpeg"
+            )
+
+        monkeypatch.setattr(audio, "SPEECH_CACHE", SpeechCache(tmp_path, 0, 0))
+        user = UserModel(
+            id="1",
+            name="User",
+            email="user@example.com",
+            role="user",
+            profile_image_url="",
+            last_active_at=0,
+            updated_at=0,
+            created_at=0,
+        )
+
+        app = FastAPI()
+        app.include_router(audio.router, prefix="/audio")
+        app.dependency_overrides[get_verified_user] = lambda: user
+
+        async def main():
+            stand_in = web.Application()
+            stand_in.router.add_post("/v1/audio/speech", create_speech)
+            runner = web.AppRunner(stand_in)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+
+            app.state.config = types.SimpleNamespace(
+                TTS_ENGINE="openai",
+                TTS_MODEL="tts-1",
+                TTS_OPENAI_API_BASE_URL=f"http://127.0.0.1:{port}/v1",
+                TTS_OPENAI_API_KEY="key",
+            )
+            try:
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://test"
+                ) as client:
+                    body = {"model": "tts-1", "input": "Hello", "voice": "alloy"}
+                    responses = await asyncio.gather(
+                        *[client.post("/audio/speech", json=body) for _ in range(3)]
+                    )
+                    responses.append(await client.post("/audio/speech", json=body))
+                    other = await client.post(
+                        "/audio/speech", json={**body, "input": "Goodbye"}
+                    )
+                    return responses, other
+            finally:
+                await runner.cleanup()
+
+        responses, other = asyncio.run(main())
+        assert [response.status_code for response in responses] == [200] * 4
+        assert all(response.content == b"audio:Hello" for response in responses)
+        assert other.content == b"audio:Goodbye"
+        assert [call["input"] for call in calls] == ["Hello", "Goodbye"]
+
+        metrics = audio.SPEECH_CACHE.get_metrics()
+        assert metrics["misses"] == 2
+        assert metrics["hits"] + metrics["coalesced"] == 3
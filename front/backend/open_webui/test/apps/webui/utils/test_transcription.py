@@ -0,0 +1,127 @@
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+from open_webui.utils.transcription import SAMPLING_RATE, WhisperTranscriber
+
+
+def seconds(value: float) -> int:
+    return int(value * SAMPLING_RATE)
+
+
+@pytest.fixture
+def faster_whisper(monkeypatch):
+    """Stands in for faster_whisper, with the speech found by the VAD set per test."""
+    module = types.SimpleNamespace(speech=[], calls=[])
+
+    def get_speech_timestamps(audio, vad_options, sampling_rate):
+        module.calls.append(vad_options)
+        return [
+            {"start": seconds(start), "end": seconds(end)}
+            for start, end in module.speech
+        ]
+
+    vad = types.ModuleType("faster_whisper.vad")
+    vad.VadOptions = lambda **kwargs: kwargs
+    vad.get_speech_timestamps = get_speech_timestamps
+
+    audio = types.ModuleType("faster_whisper.audio")
+    audio.decode_audio = lambda file_path, sampling_rate: module.audio
+
+    package = types.ModuleType("faster_whisper")
+    package.vad = vad
+    package.audio = audio
+    monkeypatch.setitem(sys.modules, "faster_whisper", package)
+    monkeypatch.setitem(sys.modules, "faster_whisper.vad", vad)
+    monkeypatch.setitem(sys.modules, "faster_whisper.audio", audio)
+    return module
+
+
+def get_audio(duration: float) -> np.ndarray:
+    return np.zeros(seconds(duration), dtype=np.float32)
+
+
+class TestSplitAudio:
+    def test_short_audio(self, faster_whisper):
+        transcriber = WhisperTranscriber(workers=1, chunk_duration=30)
+        audio = get_audio(30)
+        assert transcriber.split_audio(audio) == [(0, len(audio))]
+        # The VAD is not run
+        assert not faster_whisper.calls
+
+    def test_cut_in_pauses(self, faster_whisper):
+        transcriber = WhisperTranscriber(workers=1, chunk_duration=30)
+        audio = get_audio(80)
+        faster_whisper.speech = [(1, 12), (14, 25), (27, 40), (42, 58), (60, 79)]
+
+        chunks = transcriber.split_audio(audio)
+        # Cut in the middle of the last pause that keeps each chunk within 30s
+        assert chunks == [
+            (0, seconds(26)),
+            (seconds(26), seconds(41)),
+            (seconds(41), seconds(59)),
+            (seconds(59), len(audio)),
+        ]
+        assert faster_whisper.calls[0]["max_speech_duration_s"] == 30
+
+    def test_chunks_cover_audio(self, faster_whisper):
+        transcriber = WhisperTranscriber(workers=1, chunk_duration=10)
+        audio = get_audio(95.5)
+        faster_whisper.speech = [
+            (start + 0.5, start + 3.5) for start in np.arange(0, 95, 4)
+        ]
+
+        chunks = transcriber.split_audio(audio)
+        assert chunks[0][0] == 0
+        assert chunks[-1][1] == len(audio)
+        assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+        assert all(end - start <= seconds(10) for start, end in chunks)
+        assert len(chunks) == 12
+
+    def test_no_pause(self, faster_whisper):
+        transcriber = WhisperTranscriber(workers=1, chunk_duration=30)
+        audio = get_audio(50)
+        faster_whisper.speech = [(0, 50)]
+        assert transcriber.split_audio(audio) == [(0, len(audio))]
+
+        # Without a pause in time, a chunk runs past the chunk length
+        faster_whisper.speech = [(0, 45), (46, 50)]
+        assert transcriber.split_audio(audio) == [
+            (0, seconds(45.5)),
+            (seconds(45.5), len(audio)),
+        ]
+
+
+class TestIterSegments:
+    def test_segments_in_order(self, faster_whisper):
+        faster_whisper.audio = get_audio(80)
+        faster_whisper.speech = [(1, 12), (14, 25), (27, 40), (42, 58), (60, 79)]
+
+        class Model:
+            def transcribe(self, audio, beam_size, vad_filter):
+                duration = len(audio) / SAMPLING_RATE
+                # The first chunk finishes last
+                if len(audio) == seconds(26):
+                    time.sleep(0.1)
+                info = types.SimpleNamespace(language="en", language_probability=1)
+                segment = types.SimpleNamespace(start=1, end=duration, text="text")
+                return [segment], info
+
+        app = types.SimpleNamespace(
+            state=types.SimpleNamespace(
+                faster_whisper_model=Model(),
+                config=types.SimpleNamespace(WHISPER_VAD_FILTER=False),
+            )
+        )
+
+        transcriber = WhisperTranscriber(workers=3, chunk_duration=30)
+        segments = list(transcriber.iter_segments(app, "audio.mp3"))
+        # Timestamps are offset by the start of their chunk
+        assert segments == [
+            {"start": 1, "end": 26, "text": "text"},
+            {"start": 27, "end": 41, "text": "text"},
+            {"start": 42, "end": 59, "text": "text"},
+            {"start": 60, "end": 80, "text": "text"},
+        ]
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@contextmanager
+def mock_db(monkeypatch, tmp_path, modules: list, tables: list):
+    """
+    Points get_db of the given model modules to an empty SQLite database with
+    the given tables. Yields the session factory.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/webui.db", connect_args={"check_same_thread": False}
+    )
+    for table in tables:
+        table.create(engine)
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
+    )
+
+    @contextmanager
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    for module in modules:
+        monkeypatch.setattr(module, "get_db", get_db)
+    try:
+        yield SessionLocal
+    finally:
+        engine.dispose()
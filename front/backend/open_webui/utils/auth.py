@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 import jwt
@@ -20,6 +21,7 @@ from open_webui.env import (
     TRUSTED_SIGNATURE_KEY,
     STATIC_DIR,
     SRC_LOG_LEVELS,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -215,17 +217,16 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_cached_user_by_id(data["id"])
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ERROR_MESSAGES.INVALID_TOKEN,
             )
         else:
-            # Refresh the user's last active timestamp asynchronously
-            # to prevent blocking the request
-            if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            # The last active timestamp is written in batches by
+            # periodic_user_last_active_flush
+            Users.mark_user_active_by_id(user.id)
         return user
     else:
         raise HTTPException(
@@ -235,7 +236,7 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = Users.get_cached_user_by_api_key(api_key)
 
     if user is None:
         raise HTTPException(
@@ -243,11 +244,22 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        Users.mark_user_active_by_id(user.id)
 
     return user
 
 
+async def periodic_user_last_active_flush():
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        try:
+            count = await asyncio.to_thread(Users.flush_user_last_active)
+            if count:
+                log.debug(f"Updated last active timestamp of {count} users")
+        except Exception as e:
+            log.exception(e)
+
+
 def get_verified_user(user=Depends(get_current_user)):
     if user.role not in {"user", "admin"}:
         raise HTTPException(
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Seconds between two looks for expired entries that nobody requested since
+DISK_CACHE_SWEEP_INTERVAL = 60
+
+
+class DiskCache:
+    """
+    Base of the caches that keep their entries on disk under a byte budget.
+
+    Entries are indexed in memory in least recently used order, as
+    entries[key] = (data, created_at), rebuilt from the directory when first
+    used. Entries older than ttl seconds are created again, and are removed
+    from disk by a periodic sweep even if they are not requested again. Once
+    the entries exceed max_size bytes, the least recently used ones are
+    removed. Concurrent requests for the same missing entry wait for a single
+    call of create() in get_or_create().
+
+    Each process keeps its own index; entries written by other processes
+    are picked up from disk when requested. Subclasses lay out the files of
+    the entries and keep self.size in step in index_entry / unindex_entry.
+    """
+
+    def __init__(self, directory: Path, max_size: int, ttl: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.entries: Optional[OrderedDict[str, tuple[Any, float]]] = None
+        self.size = 0
+        self.pending: dict[str, asyncio.Future] = {}
+        self.swept_at = time.time()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    ####################
+    # Layout
+    ####################
+
+    def scan_entries(self) -> list[tuple[float, str, tuple[Any, float]]]:
+        """Returns (last used, key, entry) of each entry found on disk."""
+        raise NotImplementedError
+
+    def index_entry(self, key: str, entry: tuple[Any, float]):
+        """Adds an entry to the index and to self.size; the lock must be held."""
+        raise NotImplementedError
+
+    def unindex_entry(self, key: str) -> list[Path]:
+        """
+        Drops an entry from the index and from self.size; the lock must be
+        held. Returns the files to delete along with it.
+        """
+        raise NotImplementedError
+
+    ####################
+    # Index
+    ####################
+
+    def load_entries(self) -> OrderedDict[str, tuple[Any, float]]:
+        if self.entries is None:
+            self.entries = OrderedDict()
+            for _, key, entry in sorted(self.scan_entries(), key=lambda x: x[:2]):
+                self.index_entry(key, entry)
+        return self.entries
+
+    def write_file(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def touch(self, key: str):
+        with self.lock:
+            if self.entries is not None and key in self.entries:
+                self.entries.move_to_end(key)
+
+    def remove(self, key: str):
+        with self.lock:
+            self.load_entries()
+            paths = self.unindex_entry(key)
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"Error removing cached file {path}: {e}")
+
+    def is_expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def remove_expired(self):
+        if self.ttl <= 0:
+            return
+
+        with self.lock:
+            now = time.time()
+            if now - self.swept_at < DISK_CACHE_SWEEP_INTERVAL:
+                return
+            self.swept_at = now
+            expired = [
+                key
+                for key, (_, created_at) in self.load_entries().items()
+                if self.is_expired(created_at)
+            ]
+
+        for key in expired:
+            self.expirations += 1
+            self.remove(key)
+
+    def evict(self, keep: Optional[str] = None):
+        self.remove_expired()
+        if self.max_size <= 0:
+            return
+
+        while True:
+            with self.lock:
+                entries = self.load_entries()
+                if self.size <= self.max_size:
+                    return
+                key = next((key for key in entries if key != keep), None)
+                if key is None:
+                    return
+
+            self.evictions += 1
+            self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            keys = list(self.load_entries().keys())
+        for key in keys:
+            self.remove(key)
+
+    ####################
+    # Access
+    ####################
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, *args) -> Any:
+        raise NotImplementedError
+
+    async def get_or_create(
+        self, key: str, create: Callable[[], Awaitable[tuple]]
+    ) -> Any:
+        """
+        Returns get(key), calling create() on a miss and storing what it
+        returns with set(key, *result). Concurrent misses for a key share one
+        call.
+        """
+        result = await asyncio.to_thread(self.get, key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        future = self.pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            result = await asyncio.to_thread(self.set, key, *await create())
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved by the waiters, if there are any
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self.pending.pop(key, None)
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            entries = len(self.load_entries())
+            size = self.size
+
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "entries": entries,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": ((self.hits + self.coalesced) / requests if requests else None),
+        }
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Optional
+
+from fastapi import FastAPI, Request
+
+from open_webui.env import (
+    FILE_PROCESSING_LEASE_TIMEOUT,
+    FILE_PROCESSING_MAX_ATTEMPTS,
+    FILE_PROCESSING_MAX_JOBS_PER_USER,
+    FILE_PROCESSING_WORKERS,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.file_jobs import (
+    FILE_JOB_COMPLETED,
+    FILE_JOB_FAILED,
+    FILE_JOB_PENDING,
+    FileJobModel,
+    FileJobs,
+    FileJobStatusResponse,
+)
+from open_webui.models.files import Files
+from open_webui.models.users import Users
+from open_webui.routers.audio import transcribe
+from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.socket.main import USER_POOL, sio
+from open_webui.storage.provider import Storage
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+AUDIO_CONTENT_TYPES = ["audio/mpeg", "audio/wav", "audio/ogg", "audio/x-m4a"]
+IMAGE_CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif"]
+
+# Seconds between looks at the table when no wakeup arrives (jobs queued by
+# other instances without Redis, retries coming due, expired leases)
+FILE_JOB_POLL_INTERVAL = 5
+# A failed attempt is retried after 10s, 20s, 40s, ...
+FILE_JOB_RETRY_BACKOFF = 10
+
+
+def get_file_job_status(job: FileJobModel) -> FileJobStatusResponse:
+    return FileJobStatusResponse(
+        job_id=job.id,
+        file_id=job.file_id,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+def process_file_job(request: Request, job: FileJobModel):
+    """Extracts (or transcribes) and embeds the file of the job."""
+    file = Files.get_file_by_id(job.file_id)
+    if file is None:
+        # Deleted while queued
+        return
+
+    user = Users.get_user_by_id(job.user_id)
+    content_type = (file.meta or {}).get("content_type")
+
+    if content_type in AUDIO_CONTENT_TYPES:
+        content = None
+        if job.hash:
+            # The same recording was transcribed before: reuse its text.
+            # Other files share their extraction through their blob.
+            previous = FileJobs.get_completed_job_by_hash(
+                job.user_id, job.hash, file.id
+            )
+            source = Files.get_file_by_id(previous.file_id) if previous else None
+            if source and (source.data or {}).get("content"):
+                log.info(f"Reusing the transcript of file {source.id} for {file.id}")
+                content = source.data["content"]
+
+        if content is None:
+            file_path = Storage.get_file(file.path)
+            content = transcribe(request, file_path).get("text", "")
+
+        process_file(
+            request,
+            ProcessFileForm(file_id=file.id, content=content),
+            user=user,
+        )
+    elif content_type not in IMAGE_CONTENT_TYPES:
+        process_file(request, ProcessFileForm(file_id=file.id), user=user)
+
+
+class FileProcessingQueue:
+    """
+    Processes uploaded files in the background.
+
+    Jobs live in the file_job table, so they survive restarts and are shared
+    by every worker process and instance. Each process runs
+    FILE_PROCESSING_WORKERS workers that lease jobs, heartbeat while they
+    process them and retry failed attempts with a backoff; a job whose
+    worker died is taken over once its lease expires. With Redis configured,
+    enqueued jobs wake up the idle workers of every instance right away
+    instead of on their next poll.
+
+    Progress is sent to the user's sessions as "file-events" and can be
+    polled from /files/{id}/process/status.
+    """
+
+    REDIS_CHANNEL = "open-webui:file_jobs"
+
+    def __init__(
+        self,
+        workers: int = FILE_PROCESSING_WORKERS,
+        lease_timeout: int = FILE_PROCESSING_LEASE_TIMEOUT,
+        max_attempts: int = FILE_PROCESSING_MAX_ATTEMPTS,
+        max_jobs_per_user: int = FILE_PROCESSING_MAX_JOBS_PER_USER,
+        redis_url: str = REDIS_URL,
+        redis_sentinels: list = get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+    ):
+        self.workers = workers
+        self.lease_timeout = max(lease_timeout, 3)
+        self.max_attempts = max(max_attempts, 1)
+        self.max_jobs_per_user = max(max_jobs_per_user, 1)
+        self.instance_id = str(uuid.uuid4())
+
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+
+        self.app: Optional[FastAPI] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tasks: list[asyncio.Task] = []
+        self.wakeups: list[asyncio.Event] = []
+        # Events of the jobs an upload request is waiting on
+        self.waiters: dict[str, asyncio.Event] = {}
+
+    def start(self, app: FastAPI):
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+
+        for index in range(self.workers):
+            wakeup = asyncio.Event()
+            self.wakeups.append(wakeup)
+            self.tasks.append(
+                asyncio.create_task(
+                    self.run_worker(f"{self.instance_id}:{index}", wakeup)
+                )
+            )
+
+        if self.redis is not None and self.workers > 0:
+            threading.Thread(
+                target=self.listen, name="file-jobs-subscriber", daemon=True
+            ).start()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.wakeups = []
+
+    def wake_up(self):
+        for wakeup in self.wakeups:
+            wakeup.set()
+
+    def listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.REDIS_CHANNEL)
+                # Jobs queued while not subscribed are found by polling
+
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.loop.call_soon_threadsafe(self.wake_up)
+            except Exception as e:
+                log.warning(f"File job subscription to Redis lost: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
+
+    async def enqueue(
+        self, file_id: str, user_id: str, hash: Optional[str] = None
+    ) -> Optional[FileJobModel]:
+        job = await asyncio.to_thread(FileJobs.insert_new_job, file_id, user_id, hash)
+        if job is None:
+            return None
+
+        self.wake_up()
+        if self.redis is not None:
+            try:
+                await asyncio.to_thread(
+                    self.redis.publish, self.REDIS_CHANNEL, json.dumps({"id": job.id})
+                )
+            except Exception as e:
+                log.warning(f"Could not announce file job {job.id}: {e}")
+
+        await self.emit(job)
+        return job
+
+    async def wait_for_job(
+        self, job_id: str, retries: bool = True
+    ) -> Optional[FileJobModel]:
+        """
+        Waits until the job is completed or has failed for good. With
+        retries=False, a failed attempt returns the job (pending its retry)
+        instead of waiting for the retries.
+        """
+        try:
+            while True:
+                event = self.waiters.setdefault(job_id, asyncio.Event())
+                job = await asyncio.to_thread(FileJobs.get_job_by_id, job_id)
+                if job is None or job.status in [FILE_JOB_COMPLETED, FILE_JOB_FAILED]:
+                    return job
+                if not retries and job.status == FILE_JOB_PENDING and job.error:
+                    return job
+
+                try:
+                    # The job may be processed by another instance, which does
+                    # not set the event
+                    await asyncio.wait_for(event.wait(), FILE_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Only the instance that ran the job pops the event in run_job
+            self.waiters.pop(job_id, None)
+
+    async def emit(self, job: FileJobModel):
+        data = get_file_job_status(job).model_dump()
+        for session_id in USER_POOL.get(job.user_id, []):
+            try:
+                await sio.emit(
+                    "file-events",
+                    {
+                        "file_id": job.file_id,
+                        "data": {"type": "file:process", "data": data},
+                    },
+                    to=session_id,
+                )
+            except Exception as e:
+                log.debug(f"Could not send file job status: {e}")
+
+    async def run_worker(self, worker_id: str, wakeup: asyncio.Event):
+        while True:
+            wakeup.clear()
+            try:
+                job = await asyncio.to_thread(
+                    FileJobs.claim_next_job,
+                    worker_id,
+                    self.lease_timeout,
+                    self.max_jobs_per_user,
+                    self.max_attempts,
+                )
+            except Exception as e:
+                log.exception(f"Error claiming a file job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), FILE_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.run_job(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error running file job {job.id}: {e}")
+
+    async def run_job(self, job: FileJobModel, worker_id: str):
+        log.info(f"Processing file {job.file_id} (attempt {job.attempts})")
+        await self.emit(job)
+
+        request = Request({"type": "http", "app": self.app})
+        task = asyncio.create_task(asyncio.to_thread(process_file_job, request, job))
+
+        # The thread cannot be interrupted, so a lost lease is only logged;
+        # the result of this attempt is then discarded
+        while not task.done():
+            await asyncio.wait({task}, timeout=self.lease_timeout / 3)
+            if not task.done() and not await asyncio.to_thread(
+                FileJobs.heartbeat_job, job.id, worker_id, self.lease_timeout
+            ):
+                log.warning(f"Lost the lease of file job {job.id}")
+
+        try:
+            task.result()
+            await asyncio.to_thread(FileJobs.complete_job, job.id, worker_id)
+        except Exception as e:
+            error = str(e.detail) if hasattr(e, "detail") else str(e)
+            log.error(f"Error processing file {job.file_id}: {error}")
+
+            retry_at = None
+            if job.attempts < self.max_attempts:
+                retry_at = int(time.time()) + FILE_JOB_RETRY_BACKOFF * 2 ** (
+                    job.attempts - 1
+                )
+            await asyncio.to_thread(
+                FileJobs.fail_job, job.id, worker_id, error, retry_at
+            )
+
+        job = await asyncio.to_thread(FileJobs.get_job_by_id, job.id)
+        if job is None:
+            return
+
+        # Waiters for the final result go on waiting through the retries
+        event = self.waiters.pop(job.id, None)
+        if event is not None:
+            event.set()
+        await self.emit(job)
+
+
+FILE_PROCESSING_QUEUE = FileProcessingQueue()
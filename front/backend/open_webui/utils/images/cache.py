@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from open_webui.config import IMAGE_GENERATION_CACHE_TTL
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.disk_cache import DiskCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["IMAGES"])
+
+# (image bytes, content type) of each generated image
+GeneratedImages = list[tuple[bytes, str]]
+
+
+def get_image_generation_cache_key(params: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ImageGenerationCache(DiskCache):
+    """
+    Generated images on disk, keyed by the hash of the normalized parameters
+    of the request that generated them.
+
+    Each result is a manifest, <directory>/results/<key[:2]>/<key>.json,
+    listing its images and the metadata they are uploaded with. The images
+    are stored once by the hash of their bytes, in
+    <directory>/objects/<hash[:2]>/<hash>, however many results share them.
+
+    Results are indexed as (image hashes, created_at), rebuilt from the
+    directory when first used (the modification time of a manifest is its
+    last use). Removing a result removes the images no other result uses,
+    and concurrent requests for the same result wait for a single
+    generation.
+    """
+
+    def __init__(self, directory: Path, max_size: int, ttl: int):
+        super().__init__(directory, max_size, ttl)
+        # image hash -> size, and the number of results using it
+        self.objects: dict[str, int] = {}
+        self.refs: dict[str, int] = {}
+
+    def get_manifest_path(self, key: str) -> Path:
+        return self.directory / "results" / key[:2] / f"{key}.json"
+
+    def get_object_path(self, hash: str) -> Path:
+        return self.directory / "objects" / hash[:2] / hash
+
+    def read_manifest(self, key: str) -> Optional[dict]:
+        try:
+            with open(self.get_manifest_path(key), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning(f"Error reading cached image generation {key}: {e}")
+            return None
+
+    def scan_entries(self) -> list[tuple[float, str, tuple[Any, float]]]:
+        entries = []
+        for path in self.directory.glob("results/*/*.json"):
+            manifest = self.read_manifest(path.stem)
+            if manifest is None:
+                continue
+            try:
+                last_used = path.stat().st_mtime
+            except OSError:
+                continue
+            hashes = tuple(image["hash"] for image in manifest["images"])
+            entries.append((last_used, path.stem, (hashes, manifest["created_at"])))
+        return entries
+
+    def index_entry(self, key: str, entry: tuple[tuple[str, ...], float]):
+        self.entries[key] = entry
+        for hash in entry[0]:
+            if hash not in self.refs:
+                try:
+                    size = os.path.getsize(self.get_object_path(hash))
+                except OSError:
+                    size = 0
+                self.objects[hash] = size
+                self.size += size
+            self.refs[hash] = self.refs.get(hash, 0) + 1
+
+    def unindex_entry(self, key: str) -> list[Path]:
+        """
+        Drops a result from the index; the lock must be held. Returns its
+        manifest and the images no other result uses.
+        """
+        paths = [self.get_manifest_path(key)]
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return paths
+
+        for hash in entry[0]:
+            self.refs[hash] -= 1
+            if self.refs[hash] <= 0:
+                del self.refs[hash]
+                self.size -= self.objects.pop(hash, 0)
+                paths.append(self.get_object_path(hash))
+        return paths
+
+    def get(self, key: str) -> Optional[tuple[GeneratedImages, dict]]:
+        """Returns the cached images for key and their metadata, if any."""
+        manifest = self.read_manifest(key)
+        if manifest is None:
+            # Evicted by another process, if it was indexed
+            self.remove(key)
+            return None
+
+        with self.lock:
+            if key not in self.load_entries():
+                # Possibly written by another process
+                hashes = tuple(image["hash"] for image in manifest["images"])
+                self.index_entry(key, (hashes, manifest["created_at"]))
+
+        if self.is_expired(manifest["created_at"]):
+            self.expirations += 1
+            self.remove(key)
+            return None
+
+        try:
+            images = [
+                (
+                    self.get_object_path(image["hash"]).read_bytes(),
+                    image["content_type"],
+                )
+                for image in manifest["images"]
+            ]
+            os.utime(self.get_manifest_path(key))
+        except OSError:
+            # Evicted by another process
+            self.remove(key)
+            return None
+
+        self.touch(key)
+        return images, manifest.get("metadata", {})
+
+    def set(
+        self, key: str, images: GeneratedImages, metadata: dict
+    ) -> tuple[GeneratedImages, dict]:
+        hashes = []
+        records = []
+        for data, content_type in images:
+            hash = hashlib.sha256(data).hexdigest()
+            path = self.get_object_path(hash)
+            if not path.exists():
+                self.write_file(path, data)
+            hashes.append(hash)
+            records.append({"hash": hash, "content_type": content_type})
+
+        manifest = {
+            "images": records,
+            "metadata": metadata,
+            "created_at": time.time(),
+        }
+        manifest_path = self.get_manifest_path(key)
+        self.write_file(manifest_path, json.dumps(manifest, default=str).encode())
+
+        with self.lock:
+            self.load_entries()
+            paths = self.unindex_entry(key)
+            self.index_entry(key, (tuple(hashes), manifest["created_at"]))
+            # Images the previous result of this key had on its own
+            paths = [
+                path
+                for path in paths
+                if path != manifest_path and path.name not in self.refs
+            ]
+
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+        self.evict(keep=key)
+        return images, metadata
+
+    def get_metrics(self) -> dict:
+        metrics = super().get_metrics()
+        with self.lock:
+            metrics["images"] = len(self.objects)
+        return metrics
+
+
+####################
+# Image Prompt Cache
+####################
+
+IMAGE_PROMPT_CACHE_MAX_SIZE = 1024
+
+# Image prompts written by the task model, by the hash of the model, the
+# prompt template and the chat
+IMAGE_PROMPT_CACHE: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+
+def get_image_prompt_cache_key(model: str, template: str, messages: list) -> str:
+    return get_image_generation_cache_key(
+        {"model": model, "template": template, "messages": messages}
+    )
+
+
+def get_cached_image_prompt(key: str) -> Optional[str]:
+    entry = IMAGE_PROMPT_CACHE.get(key)
+    if entry is None:
+        return None
+
+    cached_at, prompt = entry
+    if IMAGE_GENERATION_CACHE_TTL > 0 and (
+        time.time() - cached_at > IMAGE_GENERATION_CACHE_TTL
+    ):
+        IMAGE_PROMPT_CACHE.pop(key, None)
+        return None
+
+    IMAGE_PROMPT_CACHE.move_to_end(key)
+    return prompt
+
+
+def set_cached_image_prompt(key: str, prompt: str):
+    IMAGE_PROMPT_CACHE[key] = (time.time(), prompt)
+    IMAGE_PROMPT_CACHE.move_to_end(key)
+
+    while len(IMAGE_PROMPT_CACHE) > IMAGE_PROMPT_CACHE_MAX_SIZE:
+        IMAGE_PROMPT_CACHE.popitem(last=False)
@@ -1,49 +1,49 @@
 import asyncio
 import json
 import logging
+import mimetypes
 import random
+import threading
+import time
 import urllib.parse
-import urllib.request
-from typing import Optional
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
 
+import requests
 import websocket  # NOTE: websocket-client (https://github.com/websocket-client/websocket-client)
+from open_webui.config import COMFYUI_MAX_CONCURRENT_PROMPTS
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["COMFYUI"])
 
 default_headers = {"User-Agent": "Mozilla/5.0"}
 
+# Seconds to wait for the websocket before giving up on a request
+COMFYUI_CONNECT_TIMEOUT = 10
+# Seconds between reconnection attempts once the websocket dropped
+COMFYUI_RECONNECT_DELAY = 5
+# Seconds without any prompt after which the websocket is closed
+COMFYUI_IDLE_TIMEOUT = 300
+# Seconds without events after which a prompt looks itself up in the history,
+# in case its events were lost
+COMFYUI_POLL_INTERVAL = 30
+# Prompts whose events are kept until someone waits on them
+COMFYUI_BACKLOG_SIZE = 256
 
-def queue_prompt(prompt, client_id, base_url, api_key):
-    log.info("queue_prompt")
-    p = {"prompt": prompt, "client_id": client_id}
-    data = json.dumps(p).encode("utf-8")
-    log.debug(f"queue_prompt data: {data}")
-    try:
-        req = urllib.request.Request(
-            f"{base_url}/prompt",
-            data=data,
-            headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-        )
-        response = urllib.request.urlopen(req).read()
-        return json.loads(response)
-    except Exception as e:
-        log.exception(f"Error while queuing prompt: {e}")
-        raise e
-
-
-def get_image(filename, subfolder, folder_type, base_url, api_key):
-    log.info("get_image")
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    req = urllib.request.Request(
-        f"{base_url}/view?{url_values}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return response.read()
+# Input each node type sets when the node does not name one
+DEFAULT_INPUT_KEYS = {
+    "prompt": "text",
+    "negative_prompt": "text",
+    "width": "width",
+    "height": "height",
+    "n": "batch_size",
+    "steps": "steps",
+}
 
 
 def get_image_url(filename, subfolder, folder_type, base_url):
@@ -53,44 +53,6 @@ def get_image_url(filename, subfolder, folder_type, base_url):
     return f"{base_url}/view?{url_values}"
 
 
-def get_history(prompt_id, base_url, api_key):
-    log.info("get_history")
-
-    req = urllib.request.Request(
-        f"{base_url}/history/{prompt_id}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read())
-
-
-def get_images(ws, prompt, client_id, base_url, api_key):
-    prompt_id = queue_prompt(prompt, client_id, base_url, api_key)["prompt_id"]
-    output_images = []
-    while True:
-        out = ws.recv()
-        if isinstance(out, str):
-            message = json.loads(out)
-            if message["type"] == "executing":
-                data = message["data"]
-                if data["node"] is None and data["prompt_id"] == prompt_id:
-                    break  # Execution is done
-        else:
-            continue  # previews are binary data
-
-    history = get_history(prompt_id, base_url, api_key)[prompt_id]
-    for o in history["outputs"]:
-        for node_id in history["outputs"]:
-            node_output = history["outputs"][node_id]
-            if "images" in node_output:
-                for image in node_output["images"]:
-                    url = get_image_url(
-                        image["filename"], image["subfolder"], image["type"], base_url
-                    )
-                    output_images.append({"url": url})
-    return {"data": output_images}
-
-
 class ComfyUINodeInput(BaseModel):
     type: Optional[str] = None
     node_ids: list[str] = []
@@ -116,78 +78,368 @@ class ComfyUIGenerateImageForm(BaseModel):
     seed: Optional[int] = None
 
 
-async def comfyui_generate_image(
-    model: str, payload: ComfyUIGenerateImageForm, client_id, base_url, api_key
-):
-    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
-    workflow = json.loads(payload.workflow.workflow)
-
-    for node in payload.workflow.nodes:
-        if node.type:
-            if node.type == "model":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][node.key] = model
-            elif node.type == "prompt":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "text"
-                    ] = payload.prompt
-            elif node.type == "negative_prompt":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "text"
-                    ] = payload.negative_prompt
-            elif node.type == "width":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "width"
-                    ] = payload.width
-            elif node.type == "height":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "height"
-                    ] = payload.height
-            elif node.type == "n":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "batch_size"
-                    ] = payload.n
-            elif node.type == "steps":
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][
-                        node.key if node.key else "steps"
-                    ] = payload.steps
-            elif node.type == "seed":
-                seed = (
-                    payload.seed
-                    if payload.seed
-                    else random.randint(0, 1125899906842624)
+@lru_cache(maxsize=16)
+def get_workflow_template(
+    workflow: str, nodes: str
+) -> tuple[dict, tuple[tuple[str, str, Optional[str], Any], ...]]:
+    """
+    Parses a workflow and the list of nodes its inputs are set on, once per
+    workflow. Returns the workflow and the (node id, input key, node type,
+    value) of each input to set: typed nodes take the value of the request
+    field named by their type, the others their fixed value.
+    """
+    template = json.loads(workflow)
+
+    inputs = []
+    for node in json.loads(nodes):
+        node = ComfyUINodeInput(**node)
+        if node.type and node.type not in [*DEFAULT_INPUT_KEYS, "model", "seed"]:
+            continue
+
+        key = node.key or DEFAULT_INPUT_KEYS.get(node.type)
+        for node_id in node.node_ids:
+            if node_id not in template:
+                log.warning(f"Node {node_id} is not part of the ComfyUI workflow")
+                continue
+            inputs.append((node_id, key, node.type, node.value))
+
+    return template, tuple(inputs)
+
+
+def get_workflow(model: str, payload: ComfyUIGenerateImageForm) -> dict:
+    """The workflow of the payload, with the inputs of its nodes set."""
+    template, inputs = get_workflow_template(
+        payload.workflow.workflow,
+        json.dumps([node.model_dump() for node in payload.workflow.nodes]),
+    )
+
+    values = {
+        "model": model,
+        "prompt": payload.prompt,
+        "negative_prompt": payload.negative_prompt,
+        "width": payload.width,
+        "height": payload.height,
+        "n": payload.n,
+        "steps": payload.steps,
+        "seed": payload.seed if payload.seed else random.randint(0, 1125899906842624),
+    }
+
+    # Only the nodes whose inputs change are copied from the template
+    workflow = dict(template)
+    for node_id, key, type, value in inputs:
+        node = workflow[node_id]
+        if node is template[node_id]:
+            node = workflow[node_id] = {**node, "inputs": dict(node.get("inputs", {}))}
+        node["inputs"][key] = values[type] if type else value
+    return workflow
+
+
+class ComfyUIClient:
+    """
+    A connection to a ComfyUI server shared by every image request.
+
+    A single websocket carries the events of all the prompts this instance
+    queues, and a reader thread hands them to the request waiting on each
+    prompt, reconnecting when the websocket drops and closing it once idle.
+    Prompts are queued and their images downloaded over a pooled HTTP
+    session, at most max_concurrency prompts at a time; further requests
+    wait for a slot instead of piling up on the server.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_concurrency: int = COMFYUI_MAX_CONCURRENT_PROMPTS,
+    ):
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
+        self.headers = {**default_headers, "Authorization": f"Bearer {api_key}"}
+        # The server sends the events of a prompt to the client that queued it
+        self.client_id = str(uuid.uuid4())
+
+        max_concurrency = max(max_concurrency, 1)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_concurrency, pool_maxsize=max_concurrency
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.last_used = time.monotonic()
+        # prompt id -> callback receiving its events
+        self.listeners: dict[str, Callable[[dict], None]] = {}
+        # Events of the prompts nobody waits on yet, by prompt id
+        self.backlog: OrderedDict[str, list[dict]] = OrderedDict()
+
+    ####################
+    # Websocket
+    ####################
+
+    def connect(self):
+        """Starts the reader thread if needed and waits for its websocket."""
+        with self.lock:
+            self.last_used = time.monotonic()
+            if self.thread is None:
+                self.connected.clear()
+                self.thread = threading.Thread(
+                    target=self.run, name="comfyui-client", daemon=True
+                )
+                self.thread.start()
+
+        if not self.connected.wait(COMFYUI_CONNECT_TIMEOUT):
+            raise Exception(f"Could not connect to ComfyUI at {self.ws_url}")
+
+    def stop_if_idle(self) -> bool:
+        with self.lock:
+            if self.listeners or (
+                time.monotonic() - self.last_used < COMFYUI_IDLE_TIMEOUT
+            ):
+                return False
+            self.thread = None
+            self.connected.clear()
+            return True
+
+    def run(self):
+        while True:
+            ws = websocket.WebSocket()
+            try:
+                ws.connect(
+                    f"{self.ws_url}/ws?clientId={self.client_id}",
+                    header=self.headers,
+                    timeout=COMFYUI_CONNECT_TIMEOUT,
                 )
-                for node_id in node.node_ids:
-                    workflow[node_id]["inputs"][node.key] = seed
-        else:
-            for node_id in node.node_ids:
-                workflow[node_id]["inputs"][node.key] = node.value
-
-    try:
-        ws = websocket.WebSocket()
-        headers = {"Authorization": f"Bearer {api_key}"}
-        ws.connect(f"{ws_url}/ws?clientId={client_id}", header=headers)
-        log.info("WebSocket connection established.")
-    except Exception as e:
-        log.exception(f"Failed to connect to WebSocket server: {e}")
-        return None
-
-    try:
-        log.info("Sending workflow to WebSocket server.")
-        log.info(f"Workflow: {workflow}")
-        images = await asyncio.to_thread(
-            get_images, ws, workflow, client_id, base_url, api_key
+                ws.settimeout(COMFYUI_POLL_INTERVAL)
+            except Exception as e:
+                log.warning(f"Failed to connect to the ComfyUI websocket: {e}")
+                if self.stop_if_idle():
+                    return
+                time.sleep(COMFYUI_RECONNECT_DELAY)
+                continue
+
+            log.info("WebSocket connection established.")
+            self.connected.set()
+            # Events sent while disconnected are lost; the prompts waiting on
+            # them look themselves up in the history
+            self.dispatch_all({"type": "reconnected", "data": {}})
+
+            try:
+                while True:
+                    try:
+                        out = ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        if self.stop_if_idle():
+                            log.info("Closing the idle ComfyUI websocket.")
+                            return
+                        continue
+
+                    if isinstance(out, str):
+                        self.dispatch(json.loads(out))
+                    # previews are binary data
+            except Exception as e:
+                log.warning(f"ComfyUI websocket connection lost: {e}")
+            finally:
+                with self.lock:
+                    if self.thread is threading.current_thread():
+                        self.connected.clear()
+                ws.close()
+
+            time.sleep(COMFYUI_RECONNECT_DELAY)
+
+    def dispatch(self, message: dict):
+        data = message.get("data")
+        prompt_id = data.get("prompt_id") if isinstance(data, dict) else None
+        if prompt_id is None:
+            # Queue status
+            return
+
+        with self.lock:
+            listener = self.listeners.get(prompt_id)
+            if listener is None:
+                # Sent before the request learnt the id of its prompt
+                self.backlog.setdefault(prompt_id, []).append(message)
+                self.backlog.move_to_end(prompt_id)
+                while len(self.backlog) > COMFYUI_BACKLOG_SIZE:
+                    self.backlog.popitem(last=False)
+                return
+        listener(message)
+
+    def dispatch_all(self, message: dict):
+        with self.lock:
+            listeners = list(self.listeners.values())
+        for listener in listeners:
+            listener(message)
+
+    def listen(self, prompt_id: str, listener: Callable[[dict], None]):
+        with self.lock:
+            self.listeners[prompt_id] = listener
+            messages = self.backlog.pop(prompt_id, [])
+        for message in messages:
+            listener(message)
+
+    def unlisten(self, prompt_id: str):
+        with self.lock:
+            self.listeners.pop(prompt_id, None)
+            self.last_used = time.monotonic()
+
+    ####################
+    # HTTP
+    ####################
+
+    def queue_prompt(self, prompt: dict) -> str:
+        log.info("queue_prompt")
+        r = self.session.post(
+            f"{self.base_url}/prompt",
+            json={"prompt": prompt, "client_id": self.client_id},
+            headers=self.headers,
+        )
+        if not r.ok:
+            raise Exception(f"Error while queuing prompt: {r.text}")
+        return r.json()["prompt_id"]
+
+    def get_history(self, prompt_id: str) -> Optional[dict]:
+        log.info("get_history")
+        r = self.session.get(
+            f"{self.base_url}/history/{prompt_id}", headers=self.headers
         )
-    except Exception as e:
-        log.exception(f"Error while receiving images: {e}")
-        images = None
+        r.raise_for_status()
+        return r.json().get(prompt_id)
+
+    def get_image(self, image: dict) -> tuple[bytes, str]:
+        log.info("get_image")
+        r = self.session.get(
+            get_image_url(
+                image["filename"], image["subfolder"], image["type"], self.base_url
+            ),
+            headers=self.headers,
+        )
+        r.raise_for_status()
+        content_type = r.headers.get("content-type") or (
+            mimetypes.guess_type(image["filename"])[0] or "image/png"
+        )
+        return r.content, content_type
+
+    ####################
+    # Generation
+    ####################
 
-    ws.close()
+    async def wait_for_outputs(
+        self,
+        prompt_id: str,
+        queue: asyncio.Queue,
+        event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+    ) -> dict:
+        """Returns the outputs of the prompt by node id once it has run."""
+        outputs = {}
+        cached = False
+        percent = None
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), COMFYUI_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                message = {"type": "reconnected", "data": {}}
+
+            type, data = message["type"], message.get("data") or {}
+            if type == "reconnected":
+                history = await asyncio.to_thread(self.get_history, prompt_id)
+                if history is None:
+                    # Still queued or running
+                    continue
+                if history.get("status", {}).get("status_str") == "error":
+                    raise Exception(f"ComfyUI failed to run prompt {prompt_id}")
+                return history.get("outputs", {})
+            elif type == "progress":
+                if event_emitter and data.get("max"):
+                    value = int(data["value"] * 100 / data["max"])
+                    if value != percent:
+                        percent = value
+                        try:
+                            await event_emitter(
+                                {
+                                    "type": "status",
+                                    "data": {
+                                        "description": f"Generating an image ({percent}%)",
+                                        "done": False,
+                                    },
+                                }
+                            )
+                        except Exception as e:
+                            log.debug(f"Could not send image generation progress: {e}")
+            elif type == "executed":
+                outputs[data["node"]] = data.get("output") or {}
+            elif type == "execution_cached":
+                cached = cached or bool(data.get("nodes"))
+            elif type == "execution_error":
+                raise Exception(
+                    data.get("exception_message") or "ComfyUI failed to run the prompt"
+                )
+            elif type == "execution_interrupted":
+                raise Exception("The ComfyUI prompt was interrupted")
+            elif type == "execution_success" or (
+                type == "executing" and data.get("node") is None
+            ):
+                if cached or not outputs:
+                    # The outputs of cached nodes are only in the history
+                    history = await asyncio.to_thread(self.get_history, prompt_id)
+                    outputs = (history or {}).get("outputs", outputs)
+                return outputs
+
+    async def generate(
+        self,
+        workflow: dict,
+        event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+    ) -> list[tuple[bytes, str]]:
+        """Runs the workflow and returns its images and their content types."""
+        async with self.semaphore:
+            await asyncio.to_thread(self.connect)
+
+            loop = asyncio.get_running_loop()
+            queue = asyncio.Queue()
+
+            def listener(message: dict):
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+
+            prompt_id = await asyncio.to_thread(self.queue_prompt, workflow)
+            self.listen(prompt_id, listener)
+            try:
+                outputs = await self.wait_for_outputs(prompt_id, queue, event_emitter)
+            finally:
+                self.unlisten(prompt_id)
+
+        images = [
+            image
+            for output in outputs.values()
+            for image in (output.get("images") or [])
+        ]
+        return await asyncio.gather(
+            *[asyncio.to_thread(self.get_image, image) for image in images]
+        )
+
+
+COMFYUI_CLIENTS: dict[tuple[str, str], ComfyUIClient] = {}
+
+
+def get_comfyui_client(base_url: str, api_key: str) -> ComfyUIClient:
+    client = COMFYUI_CLIENTS.get((base_url, api_key))
+    if client is None:
+        client = COMFYUI_CLIENTS[(base_url, api_key)] = ComfyUIClient(base_url, api_key)
+    return client
+
+
+async def comfyui_generate_image(
+    model: str,
+    payload: ComfyUIGenerateImageForm,
+    base_url: str,
+    api_key: str,
+    event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+) -> list[tuple[bytes, str]]:
+    workflow = get_workflow(model, payload)
 
-    return images
+    log.info("Sending workflow to ComfyUI.")
+    log.debug(f"Workflow: {workflow}")
+    return await get_comfyui_client(base_url, api_key).generate(workflow, event_emitter)
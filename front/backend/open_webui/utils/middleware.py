@@ -12,6 +12,7 @@ import html
 import inspect
 import re
 import ast
+import copy
 
 from uuid import uuid4
 from concurrent.futures import ThreadPoolExecutor
@@ -34,8 +35,17 @@ from open_webui.routers.tasks import (
     generate_image_prompt,
     generate_chat_tags,
 )
-from open_webui.routers.retrieval import process_web_search, SearchForm
-from open_webui.routers.images import image_generations, GenerateImageForm
+from open_webui.routers.retrieval import (
+    get_reranking_function,
+    process_web_search,
+    SearchForm,
+)
+from open_webui.routers.images import generate_image_files, GenerateImageForm
+from open_webui.utils.images.cache import (
+    get_cached_image_prompt,
+    get_image_prompt_cache_key,
+    set_cached_image_prompt,
+)
 from open_webui.routers.pipelines import (
     process_pipeline_inlet_filter,
     process_pipeline_outlet_filter,
@@ -48,7 +58,7 @@ from open_webui.models.users import UserModel
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
-from open_webui.retrieval.utils import get_sources_from_files
+from open_webui.retrieval.utils import get_sources_from_files, merge_sources
 
 
 from open_webui.utils.chat import generate_chat_completion
@@ -81,6 +91,10 @@ from open_webui.config import (
     CACHE_DIR,
     DEFAULT_TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     DEFAULT_CODE_INTERPRETER_PROMPT,
+    ENABLE_IMAGE_GENERATION_CACHE,
+    ENABLE_RAG_SPECULATIVE_RETRIEVAL,
+    RAG_RETRIEVAL_MAX_WORKERS,
+    RAG_SPECULATIVE_RETRIEVAL_DEADLINE,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -95,6 +109,11 @@ logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Shared by all chat requests so concurrent retrievals cannot exhaust threads
+RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RAG_RETRIEVAL_MAX_WORKERS, thread_name_prefix="retrieval"
+)
+
 
 async def chat_completion_tools_handler(
     request: Request, body: dict, extra_params: dict, user: UserModel, models, tools
@@ -386,6 +405,13 @@ async def chat_web_search_handler(
                     for col_idx, collection_name in enumerate(
                         results.get("collection_names")
                     ):
+                        # Pages found by an earlier query share the collection
+                        if any(
+                            file.get("collection_name") == collection_name
+                            for file in files
+                        ):
+                            continue
+
                         files.append(
                             {
                                 "collection_name": collection_name,
@@ -487,7 +513,29 @@ async def chat_image_generation_handler(
     prompt = user_message
     negative_prompt = ""
 
-    if request.app.state.config.ENABLE_IMAGE_PROMPT_GENERATION:
+    # A seed fixed in the chat parameters makes the image reproducible, so
+    # asking again reuses the prompt written for the chat and, through the
+    # image cache, its images. Without one, or with seed 0 that engines read
+    # as a random seed, every request (regenerating included) gets a new
+    # prompt and new images.
+    seed = form_data.get("seed", (form_data.get("options") or {}).get("seed"))
+
+    prompt_cache_key = None
+    if ENABLE_IMAGE_GENERATION_CACHE and seed:
+        prompt_cache_key = get_image_prompt_cache_key(
+            form_data["model"],
+            request.app.state.config.IMAGE_PROMPT_GENERATION_PROMPT_TEMPLATE,
+            messages,
+        )
+
+    cached_prompt = (
+        get_cached_image_prompt(prompt_cache_key) if prompt_cache_key else None
+    )
+    if cached_prompt is not None:
+        # The same chat was turned into a prompt before, which keeps the
+        # request identical and its images cached
+        prompt = cached_prompt
+    elif request.app.state.config.ENABLE_IMAGE_PROMPT_GENERATION:
         try:
             res = await generate_image_prompt(
                 request,
@@ -510,6 +558,8 @@ async def chat_image_generation_handler(
                 response = response[bracket_start:bracket_end]
                 response = json.loads(response)
                 prompt = response.get("prompt", [])
+                if prompt_cache_key and isinstance(prompt, str) and prompt:
+                    set_cached_image_prompt(prompt_cache_key, prompt)
             except Exception as e:
                 prompt = user_message
 
@@ -520,10 +570,11 @@ async def chat_image_generation_handler(
     system_message_content = ""
 
     try:
-        images = await image_generations(
+        images = await generate_image_files(
             request=request,
-            form_data=GenerateImageForm(**{"prompt": prompt}),
+            form_data=GenerateImageForm(**{"prompt": prompt, "seed": seed}),
             user=user,
+            event_emitter=__event_emitter__,
         )
 
         await __event_emitter__(
@@ -577,58 +628,71 @@ async def chat_completion_files_handler(
     sources = []
 
     if files := body.get("metadata", {}).get("files", None):
-        queries = []
-        try:
-            queries_response = await generate_queries(
-                request,
-                {
-                    "model": body["model"],
-                    "messages": body["messages"],
-                    "type": "retrieval",
-                },
-                user,
-            )
-            queries_response = queries_response["choices"][0]["message"]["content"]
+        loop = asyncio.get_running_loop()
+        user_message = get_last_user_message(body["messages"])
 
+        async def get_queries() -> list[str]:
+            queries = []
             try:
-                bracket_start = queries_response.find("{")
-                bracket_end = queries_response.rfind("}") + 1
+                queries_response = await generate_queries(
+                    request,
+                    {
+                        "model": body["model"],
+                        "messages": body["messages"],
+                        "type": "retrieval",
+                    },
+                    user,
+                )
+                queries_response = queries_response["choices"][0]["message"]["content"]
 
-                if bracket_start == -1 or bracket_end == -1:
-                    raise Exception("No JSON object found in the response")
+                try:
+                    bracket_start = queries_response.find("{")
+                    bracket_end = queries_response.rfind("}") + 1
 
-                queries_response = queries_response[bracket_start:bracket_end]
-                queries_response = json.loads(queries_response)
-            except Exception as e:
-                queries_response = {"queries": [queries_response]}
+                    if bracket_start == -1 or bracket_end == -1:
+                        raise Exception("No JSON object found in the response")
 
-            queries = queries_response.get("queries", [])
-        except:
-            pass
+                    queries_response = queries_response[bracket_start:bracket_end]
+                    queries_response = json.loads(queries_response)
+                except Exception as e:
+                    queries_response = {"queries": [queries_response]}
+
+                queries = queries_response.get("queries", [])
+            except:
+                pass
 
-        if len(queries) == 0:
-            queries = [get_last_user_message(body["messages"])]
+            if len(queries) == 0:
+                queries = [user_message]
+
+            return queries
+
+        def get_sources(files: list[dict], queries: list[str]) -> list[dict]:
+            return get_sources_from_files(
+                request=request,
+                files=files,
+                queries=queries,
+                embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
+                    query, prefix=prefix, user=user
+                ),
+                k=request.app.state.config.TOP_K,
+                reranking_function=get_reranking_function(request),
+                k_reranker=request.app.state.config.TOP_K_RERANKER,
+                r=request.app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+                full_context=request.app.state.config.RAG_FULL_CONTEXT,
+            )
 
         try:
-            # Offload get_sources_from_files to a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
+            if ENABLE_RAG_SPECULATIVE_RETRIEVAL:
+                sources = await get_speculative_sources(
+                    request, files, user_message, get_queries, get_sources
+                )
+            else:
+                queries = await get_queries()
+
+                # Offload get_sources_from_files to the shared retrieval threads
                 sources = await loop.run_in_executor(
-                    executor,
-                    lambda: get_sources_from_files(
-                        request=request,
-                        files=files,
-                        queries=queries,
-                        embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
-                        ),
-                        k=request.app.state.config.TOP_K,
-                        reranking_function=request.app.state.rf,
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=request.app.state.config.RAG_FULL_CONTEXT,
-                    ),
+                    RETRIEVAL_EXECUTOR, get_sources, files, queries
                 )
         except Exception as e:
             log.exception(e)
@@ -638,6 +702,54 @@ async def chat_completion_files_handler(
     return body, {"sources": sources}
 
 
+async def get_speculative_sources(
+    request: Request, files: list[dict], user_message: str, get_queries, get_sources
+) -> list[dict]:
+    """
+    Retrieves for the last user message while the retrieval queries are being
+    generated, then merges in the results of the generated queries if they
+    arrive before RAG_SPECULATIVE_RETRIEVAL_DEADLINE.
+    """
+    loop = asyncio.get_running_loop()
+
+    # get_sources_from_files mutates the files, so each retrieval gets a copy
+    speculative_sources = loop.run_in_executor(
+        RETRIEVAL_EXECUTOR, get_sources, copy.deepcopy(files), [user_message]
+    )
+
+    async def get_generated_sources() -> Optional[list[dict]]:
+        queries = await get_queries()
+        if queries == [user_message]:
+            return None
+
+        return await loop.run_in_executor(
+            RETRIEVAL_EXECUTOR, get_sources, files, queries
+        )
+
+    generated_sources = None
+    try:
+        generated_sources = await asyncio.wait_for(
+            get_generated_sources(), timeout=RAG_SPECULATIVE_RETRIEVAL_DEADLINE
+        )
+    except asyncio.TimeoutError:
+        log.debug("Retrieval queries missed the deadline, using speculative sources")
+    except Exception as e:
+        log.exception(e)
+
+    try:
+        sources = await speculative_sources
+    except Exception as e:
+        if generated_sources is None:
+            raise e
+        log.exception(e)
+        return generated_sources
+
+    if generated_sources is None:
+        return sources
+
+    return merge_sources(sources, generated_sources, k=request.app.state.config.TOP_K)
+
+
 def apply_params_to_form_data(form_data, model):
     params = form_data.pop("params", {})
     if model.get("ollama"):
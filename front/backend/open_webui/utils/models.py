@@ -1,42 +1,56 @@
+import asyncio
+import copy
+import json
 import time
 import logging
 import sys
+import threading
+from typing import Optional
 
 from fastapi import Request
 
 from open_webui.routers import openai, ollama
-from open_webui.functions import get_function_models
+from open_webui.functions import get_function_models, get_function_module_by_id
 
 
-from open_webui.models.functions import Functions
-from open_webui.models.models import Models
+from open_webui.models.functions import FunctionModel, Functions
+from open_webui.models.models import ModelModel, Models
 
 
-from open_webui.utils.plugin import load_function_module_by_id
+from open_webui.models.groups import Groups
 from open_webui.utils.access_control import has_access
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 
 from open_webui.config import (
     DEFAULT_ARENA_MODEL,
 )
 
-from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
+from open_webui.env import (
+    MODEL_CATALOG_TTL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+    GLOBAL_LOG_LEVEL,
+)
 from open_webui.models.users import UserModel
 
-
 logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
-async def get_all_base_models(request: Request, user: UserModel = None):
-    function_models = []
+async def get_all_provider_models(request: Request, user: UserModel = None):
     openai_models = []
     ollama_models = []
 
     if request.app.state.config.ENABLE_OPENAI_API:
         openai_models = await openai.get_all_models(request, user=user)
-        openai_models = openai_models["data"]
+        # A2A agents are added to the catalog from the database directly
+        openai_models = [
+            model for model in openai_models["data"] if model.get("owned_by") != "a2a"
+        ]
 
     if request.app.state.config.ENABLE_OLLAMA_API:
         ollama_models = await ollama.get_all_models(request, user=user)
@@ -53,224 +67,590 @@ async def get_all_base_models(request: Request, user: UserModel = None):
             for model in ollama_models["models"]
         ]
 
+    return openai_models + ollama_models
+
+
+async def get_all_base_models(request: Request, user: UserModel = None):
     function_models = await get_function_models(request)
-    models = function_models + openai_models + ollama_models
+    provider_models = await get_all_provider_models(request, user=user)
+    return function_models + provider_models
+
+
+def get_arena_models(request: Request) -> list[dict]:
+    if not request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
+        return []
+
+    arena_models = request.app.state.config.EVALUATION_ARENA_MODELS
+    if len(arena_models) == 0:
+        # Add default arena model
+        arena_models = [DEFAULT_ARENA_MODEL]
+
+    return [
+        {
+            "id": model["id"],
+            "name": model["name"],
+            "info": {
+                "meta": model["meta"],
+            },
+            "object": "model",
+            "created": int(time.time()),
+            "owned_by": "arena",
+            "arena": True,
+        }
+        for model in arena_models
+    ]
 
-    return models
 
+def get_agent_models(request: Request) -> list[dict]:
+    enable_a2a = getattr(request.app.state.config, "ENABLE_A2A_AGENTS", True)
+    if not enable_a2a:
+        return []
 
-async def get_all_models(request, user: UserModel = None):
-    models = await get_all_base_models(request, user=user)
-    log.info(f"[MODELS] get_all_base_models returned {len(models)} models")
-
-    # Don't return early if no base models - we still need to add A2A agents
-    # if len(models) == 0:
-    #     return []
-
-    # Add arena models
-    if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
-        arena_models = []
-        if len(request.app.state.config.EVALUATION_ARENA_MODELS) > 0:
-            arena_models = [
-                {
-                    "id": model["id"],
-                    "name": model["name"],
-                    "info": {
-                        "meta": model["meta"],
-                    },
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "arena",
-                    "arena": True,
-                }
-                for model in request.app.state.config.EVALUATION_ARENA_MODELS
-            ]
-        else:
-            # Add default arena model
-            arena_models = [
-                {
-                    "id": DEFAULT_ARENA_MODEL["id"],
-                    "name": DEFAULT_ARENA_MODEL["name"],
-                    "info": {
-                        "meta": DEFAULT_ARENA_MODEL["meta"],
-                    },
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "arena",
-                    "arena": True,
-                }
-            ]
-        models = models + arena_models
+    try:
+        from open_webui.models.agents import Agents
 
-    global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
-    ]
-    enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
+        agents = Agents.get_agents()
+    except Exception as e:
+        log.error(f"[MODELS] Error loading A2A agents: {e}")
+        return []
+
+    return [
+        {
+            "id": f"agent:{agent.id}",
+            "name": agent.name,
+            "object": "model",
+            "created": agent.created_at,
+            "owned_by": "a2a-agent",
+            "agent": {
+                "id": agent.id,
+                "description": agent.description,
+                "endpoint": agent.endpoint or agent.url,
+                "capabilities": agent.capabilities,
+                "skills": agent.skills,
+            },
+            "info": {
+                "meta": {
+                    "description": agent.description,
+                    "capabilities": agent.capabilities,
+                    "profile_image_url": agent.profile_image_url,
+                }
+            },
+            "tags": [{"name": "agent"}],  # Add AGENT tag
+            "actions": [],  # Agents don't have actions like regular models
+        }
+        for agent in agents
     ]
 
-    custom_models = Models.get_all_models()
-    for custom_model in custom_models:
-        if custom_model.base_model_id is None:
-            for model in models:
-                if custom_model.id == model["id"] or (
-                    model.get("owned_by") == "ollama"
-                    and custom_model.id
-                    == model["id"].split(":")[
-                        0
-                    ]  # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
-                ):
-                    if custom_model.is_active:
-                        model["name"] = custom_model.name
-                        model["info"] = custom_model.model_dump()
-
-                        action_ids = []
-                        if "info" in model and "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-
-                        model["action_ids"] = action_ids
-                    else:
-                        models.remove(model)
-
-        elif custom_model.is_active and (
-            custom_model.id not in [model["id"] for model in models]
-        ):
-            owned_by = "openai"
-            pipe = None
-            action_ids = []
-
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model.get("owned_by", "unknown owner")
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-                    break
-
-            if custom_model.meta:
-                meta = custom_model.meta.model_dump()
-                if "actionIds" in meta:
-                    action_ids.extend(meta["actionIds"])
-
-            models.append(
-                {
-                    "id": f"{custom_model.id}",
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
-                    "tags": [{"name": "model"}], # Add MODEL tag
-                }
-            )
 
-    # Process action_ids to get the actions
-    def get_action_items_from_module(function, module):
-        actions = []
-        if hasattr(module, "actions"):
-            actions = module.actions
-            return [
-                {
-                    "id": f"{function.id}.{action['id']}",
-                    "name": action.get("name", f"{function.name} ({action['id']})"),
-                    "description": function.meta.description,
-                    "icon_url": action.get(
-                        "icon_url", function.meta.manifest.get("icon_url", None)
-                    ),
-                }
-                for action in actions
-            ]
-        else:
-            return [
-                {
-                    "id": function.id,
-                    "name": function.name,
-                    "description": function.meta.description,
-                    "icon_url": function.meta.manifest.get("icon_url", None),
-                }
-            ]
-
-    def get_function_module_by_id(function_id):
-        if function_id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[function_id]
-        else:
-            function_module, _, _ = load_function_module_by_id(function_id)
-            request.app.state.FUNCTIONS[function_id] = function_module
-
-    for model in models:
-        action_ids = [
-            action_id
-            for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
+def get_custom_model_for_base_model(
+    model: dict, custom_models: dict[str, ModelModel]
+) -> Optional[ModelModel]:
+    custom_model = custom_models.get(model["id"])
+    if custom_model is None and model.get("owned_by") == "ollama":
+        # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
+        custom_model = custom_models.get(model["id"].split(":")[0])
+
+    if custom_model is not None and custom_model.base_model_id is None:
+        return custom_model
+    return None
+
+
+def apply_custom_model(model: dict, custom_model: ModelModel) -> Optional[dict]:
+    """
+    Applies a custom model that overrides a base model. Returns None when the
+    custom model hides the base model.
+    """
+    if not custom_model.is_active:
+        return None
+
+    model["name"] = custom_model.name
+    model["info"] = custom_model.model_dump()
+    model["action_ids"] = (model["info"].get("meta") or {}).get("actionIds", [])
+    return model
+
+
+def get_preset_model(custom_model: ModelModel, base_models: list[dict]) -> dict:
+    owned_by = "openai"
+    pipe = None
+    action_ids = []
+
+    for model in base_models:
+        if (
+            custom_model.base_model_id == model["id"]
+            or custom_model.base_model_id == model["id"].split(":")[0]
+        ):
+            owned_by = model.get("owned_by", "unknown owner")
+            if "pipe" in model:
+                pipe = model["pipe"]
+            break
+
+    if custom_model.meta:
+        meta = custom_model.meta.model_dump()
+        if "actionIds" in meta:
+            action_ids.extend(meta["actionIds"])
+
+    return {
+        "id": f"{custom_model.id}",
+        "name": custom_model.name,
+        "object": "model",
+        "created": custom_model.created_at,
+        "owned_by": owned_by,
+        "info": custom_model.model_dump(),
+        "preset": True,
+        **({"pipe": pipe} if pipe is not None else {}),
+        "action_ids": action_ids,
+        "tags": [{"name": "model"}],  # Add MODEL tag
+    }
+
+
+def get_action_items(request: Request, function: FunctionModel) -> list[dict]:
+    module = get_function_module_by_id(request, function.id)
+    if hasattr(module, "actions"):
+        return [
+            {
+                "id": f"{function.id}.{action['id']}",
+                "name": action.get("name", f"{function.name} ({action['id']})"),
+                "description": function.meta.description,
+                "icon_url": action.get(
+                    "icon_url", function.meta.manifest.get("icon_url", None)
+                ),
+            }
+            for action in module.actions
+        ]
+    else:
+        return [
+            {
+                "id": function.id,
+                "name": function.name,
+                "description": function.meta.description,
+                "icon_url": function.meta.manifest.get("icon_url", None),
+            }
         ]
 
-        model["actions"] = []
-        for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
 
-            function_module = get_function_module_by_id(action_id)
-            model["actions"].extend(
-                get_action_items_from_module(action_function, function_module)
+####################
+# Model Catalog
+####################
+
+
+class ModelCatalog:
+    """
+    Versioned snapshot of every model offered to the users.
+
+    Provider model lists (OpenAI, Ollama and function pipes) are the only part
+    that needs upstream calls; they are refreshed in the background once they
+    are older than MODEL_CATALOG_TTL, and readers keep being served the
+    previous snapshot meanwhile. Custom model, function and agent changes are
+    applied on top of the cached provider lists without calling upstream.
+
+    With Redis configured the snapshot is shared by all workers: every change
+    bumps a version counter in Redis and announces it on the catalog channel.
+    Each worker subscribes to that channel and reloads the snapshot on the
+    next read after a newer version is announced, so reads need no Redis
+    call. While the subscription is not established, reads fall back to
+    checking the version in Redis.
+    """
+
+    REDIS_KEY = "open-webui:model_catalog"
+    REDIS_VERSION_KEY = "open-webui:model_catalog:version"
+    REDIS_REFRESH_LOCK_KEY = "open-webui:model_catalog:refresh"
+    REDIS_CHANNEL = "open-webui:model_catalog"
+
+    VISIBLE_MODEL_IDS_MAX_SIZE = 10000
+
+    def __init__(self, ttl: int, redis_url: str = "", redis_sentinels: list = []):
+        self.ttl = ttl
+        self.version = 0
+
+        self.provider_models: list[dict] = []
+        self.function_models: list[dict] = []
+        self.refreshed_at = 0.0
+
+        self.models: dict[str, dict] = {}
+        # user id -> (catalog version, group ids, ids of the models they can read)
+        self.visible_model_ids: dict[str, tuple[int, frozenset, set[str]]] = {}
+
+        self.lock = asyncio.Lock()
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.redis = (
+            get_redis_connection(redis_url, redis_sentinels, decode_responses=True)
+            if redis_url
+            else None
+        )
+
+        # Latest version announced by any worker
+        self.published_version = 0
+        self.subscribed = threading.Event()
+        if self.redis is not None:
+            threading.Thread(
+                target=self.listen, name="model-catalog-subscriber", daemon=True
+            ).start()
+
+    def listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.REDIS_CHANNEL)
+                # Versions announced while not subscribed were missed
+                self.published_version = int(
+                    self.redis.get(self.REDIS_VERSION_KEY) or 0
+                )
+                self.subscribed.set()
+
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self.published_version = max(
+                            self.published_version, int(message["data"])
+                        )
+                    except (KeyError, TypeError, ValueError):
+                        log.error(f"Invalid model catalog message: {message['data']}")
+            except Exception as e:
+                log.warning(f"Model catalog subscription to Redis lost: {e}")
+            finally:
+                self.subscribed.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
+
+    ####################
+    # Snapshot
+    ####################
+
+    def load(self, request: Request):
+        """Loads a newer snapshot published by another worker, if any."""
+        if self.redis is None:
+            return
+
+        if self.subscribed.is_set() and self.published_version <= self.version:
+            return
+
+        try:
+            if not self.subscribed.is_set():
+                version = int(self.redis.get(self.REDIS_VERSION_KEY) or 0)
+                if version <= self.version:
+                    return
+
+            snapshot = self.redis.get(self.REDIS_KEY)
+            if snapshot is None:
+                return
+            snapshot = json.loads(snapshot)
+        except Exception as e:
+            log.warning(f"Error loading the model catalog from Redis: {e}")
+            return
+
+        self.version = snapshot["version"]
+        self.provider_models = snapshot["provider_models"]
+        self.function_models = snapshot["function_models"]
+        self.refreshed_at = snapshot["refreshed_at"]
+        self.models = snapshot["models"]
+        request.app.state.MODELS = self.models
+
+    def publish(self, request: Request):
+        request.app.state.MODELS = self.models
+
+        if self.redis is None:
+            self.version += 1
+            return
+
+        try:
+            self.version = self.redis.incr(self.REDIS_VERSION_KEY)
+            self.redis.set(
+                self.REDIS_KEY,
+                json.dumps(
+                    {
+                        "version": self.version,
+                        "provider_models": self.provider_models,
+                        "function_models": self.function_models,
+                        "refreshed_at": self.refreshed_at,
+                        "models": self.models,
+                    },
+                    default=str,
+                ),
+            )
+            self.redis.publish(self.REDIS_CHANNEL, self.version)
+        except Exception as e:
+            log.warning(f"Error publishing the model catalog to Redis: {e}")
+            self.version += 1
+
+    def is_stale(self) -> bool:
+        return time.time() - self.refreshed_at > self.ttl
+
+    ####################
+    # Build
+    ####################
+
+    def get_base_models(self, request: Request) -> list[dict]:
+        return copy.deepcopy(
+            self.function_models + self.provider_models + get_arena_models(request)
+        )
+
+    def set_actions(self, request: Request, models: list[dict]):
+        global_action_ids = [
+            function.id for function in Functions.get_global_action_functions()
+        ]
+        action_items = {
+            function.id: get_action_items(request, function)
+            for function in Functions.get_functions_by_type("action", active_only=True)
+        }
+
+        for model in models:
+            action_ids = set(model.pop("action_ids", []) + global_action_ids)
+            model["actions"] = []
+            for action_id in action_ids:
+                model["actions"].extend(action_items.get(action_id, []))
+
+    def build(self, request: Request) -> dict[str, dict]:
+        base_models = self.get_base_models(request)
+        custom_models = {model.id: model for model in Models.get_all_models()}
+
+        models = []
+        for model in base_models:
+            custom_model = get_custom_model_for_base_model(model, custom_models)
+            if custom_model is not None:
+                model = apply_custom_model(model, custom_model)
+            if model is not None:
+                models.append(model)
+
+        model_ids = {model["id"] for model in models}
+        for custom_model in custom_models.values():
+            if (
+                custom_model.base_model_id is not None
+                and custom_model.is_active
+                and custom_model.id not in model_ids
+            ):
+                models.append(get_preset_model(custom_model, base_models))
+
+        self.set_actions(request, models)
+        models.extend(get_agent_models(request))
+        return {model["id"]: model for model in models}
+
+    ####################
+    # Refresh
+    ####################
+
+    async def refresh(self, request: Request, user: UserModel = None):
+        """Fetches the provider model lists and rebuilds the catalog."""
+        try:
+            # The upstream calls run outside of the lock so that patches are
+            # never held up by a slow provider
+            start = time.time()
+            function_models = await get_function_models(request)
+            provider_models = await get_all_provider_models(request, user=user)
+
+            async with self.lock:
+                self.function_models = function_models
+                self.provider_models = provider_models
+                self.refreshed_at = time.time()
+
+                self.models = self.build(request)
+                self.publish(request)
+
+            log.info(
+                f"[MODELS] Model catalog v{self.version} refreshed with "
+                f"{len(self.models)} models in {time.time() - start:.2f}s"
             )
+        except Exception as e:
+            log.exception(f"Error refreshing the model catalog: {e}")
+            # Serve the previous snapshot until the next refresh is due
+            self.refreshed_at = time.time()
+
+    async def refresh_in_background(self, request: Request):
+        lock_acquired = True
+        if self.redis is not None:
+            try:
+                lock_acquired = self.redis.set(
+                    self.REDIS_REFRESH_LOCK_KEY, "1", nx=True, ex=60
+                )
+            except Exception as e:
+                log.warning(f"Error locking the model catalog refresh: {e}")
+
+        if not lock_acquired and self.models:
+            # Another worker is refreshing; its snapshot is picked up on read
+            return
+
+        try:
+            await self.refresh(request)
+        finally:
+            if self.redis is not None and lock_acquired:
+                try:
+                    self.redis.delete(self.REDIS_REFRESH_LOCK_KEY)
+                except Exception:
+                    pass
+
+    def schedule_refresh(self, request: Request):
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self.refresh_in_background(request))
+
+    async def get_models(self, request: Request) -> list[dict]:
+        self.load(request)
+
+        if not self.models and self.refreshed_at == 0:
+            # Nothing to serve yet, so the very first read has to wait
+            self.schedule_refresh(request)
+            await asyncio.shield(self.refresh_task)
+            self.load(request)
+        elif self.is_stale():
+            self.schedule_refresh(request)
+
+        request.app.state.MODELS = self.models
+        return list(self.models.values())
+
+    ####################
+    # Patches
+    ####################
+
+    async def patch_model(self, request: Request, id: str):
+        """Applies the creation, update or deletion of a custom model."""
+        async with self.lock:
+            self.load(request)
+
+            base_models = self.get_base_models(request)
+            custom_model = Models.get_model_by_id(id)
+            custom_models = {id: custom_model} if custom_model else {}
+
+            models = {
+                model_id: model
+                for model_id, model in self.models.items()
+                if model_id != id
+            }
+            patched_models = []
 
-    # Add A2A agent models if enabled
-    try:
-        enable_a2a = getattr(request.app.state.config, "ENABLE_A2A_AGENTS", True)
-        log.info(f"[MODELS] A2A agents enabled: {enable_a2a}")
-        if enable_a2a:
-            from open_webui.models.agents import Agents
-
-            agents = Agents.get_agents()
-            log.info(f"[MODELS] Found {len(agents)} agents in database")
-            for agent in agents:
-                model_id = f"agent:{agent.id}"
-                log.info(f"[MODELS] Processing agent: {agent.name} (id: {agent.id}, endpoint: {agent.endpoint or agent.url})")
-                agent_model = {
-                    "id": model_id,
-                    "name": agent.name,
-                    "object": "model",
-                    "created": agent.created_at,
-                    "owned_by": "a2a-agent",
-                    "agent": {
-                        "id": agent.id,
-                        "description": agent.description,
-                        "endpoint": agent.endpoint or agent.url,
-                        "capabilities": agent.capabilities,
-                        "skills": agent.skills,
-                    },
-                    "info": {
-                        "meta": {
-                            "description": agent.description,
-                            "capabilities": agent.capabilities,
-                            "profile_image_url": agent.profile_image_url,
-                        }
-                    },
-                    "tags": [{"name": "agent"}],  # Add AGENT tag
-                    "actions": []  # Agents don't have actions like regular models
-                }
-                models.append(agent_model)
-                log.info(f"[MODELS] Added A2A agent model: {agent.name} ({model_id})")
-    except Exception as e:
-        log.error(f"[MODELS] Error loading A2A agents: {e}")
-        import traceback
-        traceback.print_exc()
+            # Base models the custom model may override
+            for model in base_models:
+                if model["id"] == id or (
+                    model.get("owned_by") == "ollama"
+                    and model["id"].split(":")[0] == id
+                ):
+                    models.pop(model["id"], None)
+                    override = get_custom_model_for_base_model(model, custom_models)
+                    if override is not None:
+                        model = apply_custom_model(model, override)
+                    if model is not None:
+                        patched_models.append(model)
+
+            if (
+                not patched_models
+                and custom_model is not None
+                and custom_model.base_model_id is not None
+                and custom_model.is_active
+            ):
+                patched_models.append(get_preset_model(custom_model, base_models))
+
+            self.set_actions(request, patched_models)
+            for model in patched_models:
+                models[model["id"]] = model
+
+            self.models = models
+            self.publish(request)
+
+    async def patch_agents(self, request: Request):
+        """Applies A2A agent registrations, updates and removals."""
+        async with self.lock:
+            self.load(request)
+
+            models = {
+                model_id: model
+                for model_id, model in self.models.items()
+                if model.get("owned_by") != "a2a-agent"
+            }
+            for model in get_agent_models(request):
+                models[model["id"]] = model
+
+            self.models = models
+            self.publish(request)
+
+    async def patch_functions(self, request: Request):
+        """Applies function changes, which can add pipes or change actions."""
+        async with self.lock:
+            self.load(request)
+
+            try:
+                self.function_models = await get_function_models(request)
+                self.models = self.build(request)
+            except Exception as e:
+                # Functions run user code; the next refresh retries the rebuild
+                log.exception(f"Error applying function changes to the catalog: {e}")
+                return
+            self.publish(request)
+
+    async def rebuild(self, request: Request):
+        """Rebuilds the catalog from the cached provider model lists."""
+        async with self.lock:
+            self.load(request)
+
+            self.models = self.build(request)
+            self.publish(request)
+
+
+    ####################
+    # Access
+    ####################
+
+    def get_visible_model_ids(self, user) -> set[str]:
+        """
+        Returns the ids of the catalog models the user can read. The set is
+        memoized per user and recomputed whenever the catalog version or the
+        user's groups change.
+        """
+        group_ids = frozenset(Groups.get_group_ids_by_member_id(user.id))
+
+        entry = self.visible_model_ids.get(user.id)
+        if entry is not None and entry[0] == self.version and entry[1] == group_ids:
+            return entry[2]
+
+        models = list(self.models.values())
+        model_infos = {
+            model_info.id: model_info
+            for model_info in Models.get_models_by_ids(
+                [model["id"] for model in models]
+            )
+        }
+
+        model_ids = set()
+        for model in models:
+            # A2A agents are always accessible if enabled
+            if model.get("owned_by") == "a2a-agent":
+                model_ids.add(model["id"])
+            elif model.get("arena"):
+                if has_access(
+                    user.id,
+                    type="read",
+                    access_control=model.get("info", {})
+                    .get("meta", {})
+                    .get("access_control", {}),
+                ):
+                    model_ids.add(model["id"])
+            else:
+                model_info = model_infos.get(model["id"])
+                if model_info and (
+                    user.id == model_info.user_id
+                    or has_access(
+                        user.id, type="read", access_control=model_info.access_control
+                    )
+                ):
+                    model_ids.add(model["id"])
 
-    log.debug(f"get_all_models() returned {len(models)} models")
+        if len(self.visible_model_ids) >= self.VISIBLE_MODEL_IDS_MAX_SIZE:
+            self.visible_model_ids.clear()
+        self.visible_model_ids[user.id] = (self.version, group_ids, model_ids)
+        return model_ids
 
-    request.app.state.MODELS = {model["id"]: model for model in models}
-    log.info(f"[MODELS] Set request.app.state.MODELS with {len(request.app.state.MODELS)} models")
-    log.info(f"[MODELS] Model IDs in cache: {list(request.app.state.MODELS.keys())}")
-    return models
+
+MODEL_CATALOG = ModelCatalog(
+    MODEL_CATALOG_TTL,
+    REDIS_URL,
+    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+
+
+async def get_all_models(request, user: UserModel = None):
+    return await MODEL_CATALOG.get_models(request)
 
 
 def check_model_access(user, model):
@@ -278,6 +658,11 @@ def check_model_access(user, model):
     if model.get("owned_by") == "a2a-agent":
         return True
 
+    if model.get("id") in MODEL_CATALOG.models:
+        if model["id"] not in MODEL_CATALOG.get_visible_model_ids(user):
+            raise Exception("Model not found")
+        return
+
     if model.get("arena"):
         if not has_access(
             user.id,
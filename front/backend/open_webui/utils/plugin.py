@@ -1,19 +1,144 @@
+import hashlib
+import json
 import os
 import re
 import subprocess
 import sys
+import threading
+import time
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+####################
+# Plugin Caches
+####################
+
+# Compiled plugin code, keyed by (module name, sha256 of the source)
+PLUGIN_CODE_CACHE: OrderedDict[tuple[str, str], types.CodeType] = OrderedDict()
+PLUGIN_CODE_CACHE_MAX_SIZE = 256
+PLUGIN_CODE_CACHE_LOCK = threading.Lock()
+
+
+def get_plugin_code(module_name: str, content: str) -> types.CodeType:
+    key = (module_name, hashlib.sha256(content.encode()).hexdigest())
+    with PLUGIN_CODE_CACHE_LOCK:
+        code = PLUGIN_CODE_CACHE.get(key)
+        if code is not None:
+            PLUGIN_CODE_CACHE.move_to_end(key)
+            return code
+
+    code = compile(content, f"<{module_name}>", "exec")
+    with PLUGIN_CODE_CACHE_LOCK:
+        PLUGIN_CODE_CACHE[key] = code
+        while len(PLUGIN_CODE_CACHE) > PLUGIN_CODE_CACHE_MAX_SIZE:
+            PLUGIN_CODE_CACHE.popitem(last=False)
+    return code
+
+
+class PluginModuleCache(dict):
+    """
+    Loaded plugin instances by id (app.state.FUNCTIONS and app.state.TOOLS).
+
+    Each worker keeps its own instances. When a plugin is updated or deleted,
+    invalidate(id) drops it here and, with Redis configured, announces the id
+    so that every other worker drops its copy and reloads it on next use.
+    """
+
+    REDIS_CHANNEL = "open-webui:plugins"
+
+    def __init__(
+        self,
+        kind: str,
+        redis_url: str = REDIS_URL,
+        redis_sentinels: list = get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+    ):
+        super().__init__()
+        self.kind = kind
+        self.instance_id = str(uuid.uuid4())
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+            threading.Thread(
+                target=self.listen, name=f"{kind}-plugin-subscriber", daemon=True
+            ).start()
+
+    def invalidate(self, id: str, module=None):
+        """Drops (or replaces with module) the plugin in every worker."""
+        if module is None:
+            self.pop(id, None)
+        else:
+            self[id] = module
+
+        if self.redis is None:
+            return
+
+        try:
+            self.redis.publish(
+                self.REDIS_CHANNEL,
+                json.dumps(
+                    {"kind": self.kind, "id": id, "instance_id": self.instance_id}
+                ),
+            )
+        except Exception as e:
+            log.warning(f"Could not announce {self.kind} {id} invalidation: {e}")
+
+    def listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.REDIS_CHANNEL)
+                # Invalidations sent while not subscribed were missed
+                self.clear()
+
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                        if (
+                            data["kind"] == self.kind
+                            and data["instance_id"] != self.instance_id
+                        ):
+                            self.pop(data["id"], None)
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        log.error(f"Invalid plugin message: {message['data']}")
+            except Exception as e:
+                log.warning(f"Plugin subscription to Redis lost: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
+
+
 def extract_frontmatter(content):
     """
     Extract frontmatter as a dictionary from the provided content string.
@@ -67,6 +192,21 @@ def replace_imports(content):
     return content
 
 
+def exec_plugin_code(
+    module: types.ModuleType, content: str, install: Optional[Future] = None
+):
+    code = get_plugin_code(module.__name__, content)
+    try:
+        exec(code, module.__dict__)
+    except ImportError:
+        # The requirements are installed in the background; only wait for
+        # them when the module actually needs a package that is missing
+        if install is None:
+            raise
+        install.result()
+        exec(code, module.__dict__)
+
+
 def load_tool_module_by_id(tool_id, content=None):
 
     if content is None:
@@ -74,14 +214,17 @@ def load_tool_module_by_id(tool_id, content=None):
         if not tool:
             raise Exception(f"Toolkit not found: {tool_id}")
 
-        content = tool.content
+        content = replace_imports(tool.content)
+        if content != tool.content:
+            Tools.update_tool_by_id(tool_id, {"content": content})
 
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        install = None
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
-        install_frontmatter_requirements(frontmatter.get("requirements", ""))
+        install = install_frontmatter_requirements_in_background(
+            frontmatter.get("requirements", "")
+        )
 
     module_name = f"tool_{tool_id}"
     module = types.ModuleType(module_name)
@@ -97,7 +240,7 @@ def load_tool_module_by_id(tool_id, content=None):
         module.__dict__["__file__"] = temp_file.name
 
         # Executing the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec_plugin_code(module, content, install)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -119,13 +262,16 @@ def load_function_module_by_id(function_id, content=None):
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
+        content = replace_imports(function.content)
+        if content != function.content:
+            Functions.update_function_by_id(function_id, {"content": content})
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        install = None
     else:
         frontmatter = extract_frontmatter(content)
-        install_frontmatter_requirements(frontmatter.get("requirements", ""))
+        install = install_frontmatter_requirements_in_background(
+            frontmatter.get("requirements", "")
+        )
 
     module_name = f"function_{function_id}"
     module = types.ModuleType(module_name)
@@ -141,7 +287,7 @@ def load_function_module_by_id(function_id, content=None):
         module.__dict__["__file__"] = temp_file.name
 
         # Execute the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec_plugin_code(module, content, install)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -164,6 +310,38 @@ def load_function_module_by_id(function_id, content=None):
         os.unlink(temp_file.name)
 
 
+# Requirements already installed by this process, by hash of the package list
+INSTALLED_REQUIREMENTS: dict[str, Future] = {}
+INSTALLED_REQUIREMENTS_LOCK = threading.Lock()
+REQUIREMENTS_EXECUTOR = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="plugin-requirements"
+)
+
+
+def install_frontmatter_requirements_in_background(
+    requirements: str,
+) -> Optional[Future]:
+    """
+    Installs the requirements in a background thread, once per distinct set
+    of packages. Returns the install future, or None if there is nothing to
+    install.
+    """
+    req_list = sorted({req.strip() for req in requirements.split(",") if req.strip()})
+    if not req_list:
+        return None
+
+    key = hashlib.sha256(",".join(req_list).encode()).hexdigest()
+    with INSTALLED_REQUIREMENTS_LOCK:
+        future = INSTALLED_REQUIREMENTS.get(key)
+        # A failed install is retried the next time the plugin is saved
+        if future is None or (future.done() and future.exception() is not None):
+            future = REQUIREMENTS_EXECUTOR.submit(
+                install_frontmatter_requirements, ", ".join(req_list)
+            )
+            INSTALLED_REQUIREMENTS[key] = future
+    return future
+
+
 def install_frontmatter_requirements(requirements: str):
     if requirements:
         try:
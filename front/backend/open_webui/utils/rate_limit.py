@@ -0,0 +1,153 @@
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+# Sliding window over a sorted set of request timestamps (in milliseconds).
+# Runs atomically on the Redis server, using its clock so that every worker
+# agrees on the window. Returns {allowed, retry_after_ms}.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+
+redis.call('ZADD', key, now, member)
+redis.call('PEXPIRE', key, window)
+return {1, 0}
+"""
+
+# Upper bound on the clients tracked by the in-memory fallback
+RATE_LIMIT_MEMORY_MAX_KEYS = 10000
+
+
+def parse_rate_limit(rate: str, default: tuple[int, int]) -> tuple[int, int]:
+    """Parses "<requests>/<seconds>", e.g. "5/3600"."""
+    try:
+        limit, window = rate.split("/")
+        return int(limit), int(window)
+    except (AttributeError, ValueError):
+        log.warning(f"Invalid rate limit '{rate}', using {default[0]}/{default[1]}")
+        return default
+
+
+def get_client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter, usable as a FastAPI dependency:
+
+        @router.post("/submit", dependencies=[Depends(SUBMIT_RATE_LIMITER)])
+
+    Requests are counted per client IP. With Redis configured the window is
+    shared by all workers and instances; otherwise, or while Redis is
+    unreachable, each worker keeps its own window in a bounded LRU map.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: str,
+        default: tuple[int, int] = (60, 60),
+        redis_url: str = REDIS_URL,
+        redis_sentinels: list = get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+    ):
+        self.name = name
+        self.limit, self.window = parse_rate_limit(rate, default)
+
+        self.redis = None
+        self.script = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url, redis_sentinels, decode_responses=True
+            )
+            self.script = self.redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+        self.lock = threading.Lock()
+        self.hits: OrderedDict[str, deque] = OrderedDict()
+
+    def hit_redis(self, key: str) -> tuple[bool, float]:
+        allowed, retry_after_ms = self.script(
+            keys=[f"open-webui:rate_limit:{self.name}:{key}"],
+            args=[self.limit, self.window * 1000, str(uuid.uuid4())],
+        )
+        return bool(allowed), int(retry_after_ms) / 1000
+
+    def hit_memory(self, key: str) -> tuple[bool, float]:
+        now = time.monotonic()
+        with self.lock:
+            hits = self.hits.get(key)
+            if hits is None:
+                hits = deque(maxlen=self.limit)
+                self.hits[key] = hits
+                while len(self.hits) > RATE_LIMIT_MEMORY_MAX_KEYS:
+                    self.hits.popitem(last=False)
+            else:
+                self.hits.move_to_end(key)
+
+            while hits and now - hits[0] >= self.window:
+                hits.popleft()
+
+            if len(hits) >= self.limit:
+                return False, hits[0] + self.window - now
+
+            hits.append(now)
+            return True, 0
+
+    def hit(self, key: str) -> tuple[bool, float]:
+        """Records a request for key; returns (allowed, seconds to retry after)."""
+        if self.limit <= 0:
+            return True, 0
+
+        if self.redis is not None:
+            try:
+                return self.hit_redis(key)
+            except Exception as e:
+                log.warning(f"Rate limiter {self.name} falling back to memory: {e}")
+
+        return self.hit_memory(key)
+
+    async def __call__(self, request: Request):
+        key = get_client_ip(request)
+        if self.redis is not None:
+            # The Redis round trip would block the event loop
+            allowed, retry_after = await run_in_threadpool(self.hit, key)
+        else:
+            allowed, retry_after = self.hit(key)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES.RATE_LIMIT_EXCEEDED,
+                headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+            )
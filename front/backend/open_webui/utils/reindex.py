@@ -0,0 +1,385 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from open_webui.config import RAG_REINDEX_CHECKPOINT_DIR, RAG_REINDEX_CONCURRENCY
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.files import FileModel, Files
+from open_webui.models.knowledge import Knowledges
+from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.routers.retrieval import (
+    get_current_embedding_config,
+    get_docs_texts_and_metadatas,
+    get_processed_file_docs,
+    get_vector_items,
+)
+from open_webui.tasks import create_task
+from open_webui.utils.misc import calculate_sha256_string
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+####################
+# Reindex Job State
+####################
+
+
+class ReindexFailedFile(BaseModel):
+    knowledge_id: str
+    file_id: str
+    error: str
+
+
+class ReindexJobModel(BaseModel):
+    id: str
+    user_id: str
+    status: str  # pending, running, completed, failed, cancelled, interrupted
+    force: bool = False
+
+    knowledge_ids: list[str] = []
+    completed_knowledge_ids: list[str] = []
+    current_knowledge_id: Optional[str] = None
+    # Files of the current knowledge base already reindexed or up to date
+    completed_file_ids: list[str] = []
+
+    total_files: int = 0
+    processed_files: int = 0
+    indexed_files: int = 0
+    skipped_files: int = 0
+    failed_files: list[ReindexFailedFile] = []
+
+    error: Optional[str] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+REINDEX_JOBS: dict[str, ReindexJobModel] = {}
+REINDEX_TASKS: dict[str, asyncio.Task] = {}
+
+
+def get_checkpoint_path(job_id: str) -> Path:
+    return Path(RAG_REINDEX_CHECKPOINT_DIR) / f"{job_id}.json"
+
+
+def save_checkpoint(job: ReindexJobModel):
+    job.updated_at = int(time.time())
+    path = get_checkpoint_path(job.id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so a crash never leaves a torn checkpoint
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(job.model_dump_json())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(job_id: str) -> Optional[ReindexJobModel]:
+    path = get_checkpoint_path(job_id)
+    if not path.is_file():
+        return None
+
+    try:
+        with open(path, "r") as f:
+            job = ReindexJobModel(**json.load(f))
+    except Exception as e:
+        log.error(f"Error loading reindex checkpoint {path}: {e}")
+        return None
+
+    # A job that was running when the process stopped cannot still be running
+    if job.status in ["pending", "running"] and job.id not in REINDEX_TASKS:
+        job.status = "interrupted"
+
+    return job
+
+
+def get_reindex_job(job_id: str) -> Optional[ReindexJobModel]:
+    job = REINDEX_JOBS.get(job_id)
+    if job is None:
+        job = load_checkpoint(job_id)
+        if job is not None:
+            REINDEX_JOBS[job_id] = job
+    return job
+
+
+def get_reindex_jobs() -> list[ReindexJobModel]:
+    checkpoint_dir = Path(RAG_REINDEX_CHECKPOINT_DIR)
+    if checkpoint_dir.is_dir():
+        for path in checkpoint_dir.glob("*.json"):
+            get_reindex_job(path.stem)
+
+    return sorted(REINDEX_JOBS.values(), key=lambda job: job.created_at, reverse=True)
+
+
+def get_running_reindex_job() -> Optional[ReindexJobModel]:
+    for job_id, task in REINDEX_TASKS.items():
+        if not task.done():
+            return REINDEX_JOBS.get(job_id)
+    return None
+
+
+####################
+# Reindex Worker
+####################
+
+
+def is_file_up_to_date(
+    request: Request, file: FileModel, metadata: Optional[dict]
+) -> bool:
+    if not metadata or not file.hash or metadata.get("hash") != file.hash:
+        return False
+
+    try:
+        embedding_config = json.loads(metadata.get("embedding_config", "{}"))
+    except (TypeError, json.JSONDecodeError):
+        return False
+
+    return embedding_config == get_current_embedding_config(request)
+
+
+def reindex_knowledge_file(
+    request: Request,
+    file: FileModel,
+    collection_name: str,
+    force: bool = False,
+    user=None,
+) -> bool:
+    """
+    Re-embeds a single file into a knowledge collection.
+
+    The new chunks are upserted next to the existing ones and the old chunks
+    are removed afterwards, so the file never disappears from search while it
+    is being reindexed. Returns False if the file was already up to date.
+    """
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=collection_name, filter={"file_id": file.id}
+    )
+    existing_ids = result.ids[0] if result is not None and result.ids else []
+
+    if existing_ids and not force:
+        if is_file_up_to_date(request, file, result.metadatas[0][0]):
+            return False
+
+    docs = get_processed_file_docs(file)
+    text_content = file.data.get("content", "") if file.data else ""
+    hash = file.hash or calculate_sha256_string(text_content)
+
+    texts, metadatas = get_docs_texts_and_metadatas(
+        request,
+        docs,
+        metadata={
+            "file_id": file.id,
+            "name": file.filename,
+            "hash": hash,
+        },
+    )
+    items = get_vector_items(request, texts, metadatas, user=user)
+
+    VECTOR_DB_CLIENT.upsert(collection_name=collection_name, items=items)
+    if existing_ids:
+        VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=existing_ids)
+
+    if not file.hash:
+        Files.update_file_hash_by_id(file.id, hash)
+
+    return True
+
+
+def remove_stale_chunks(collection_name: str, file_ids: list[str]) -> int:
+    """
+    Deletes the chunks of files that are no longer part of the knowledge
+    base. Returns the number of chunks deleted.
+    """
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        return 0
+
+    result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    if result is None or not result.ids:
+        return 0
+
+    file_ids = set(file_ids)
+    stale_ids = [
+        id
+        for id, metadata in zip(result.ids[0], result.metadatas[0])
+        if (metadata or {}).get("file_id") not in file_ids
+    ]
+    if stale_ids:
+        VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=stale_ids)
+    return len(stale_ids)
+
+
+async def run_reindex_job(request: Request, job: ReindexJobModel, user):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(RAG_REINDEX_CONCURRENCY, 1))
+
+    job.status = "running"
+    save_checkpoint(job)
+
+    try:
+        for knowledge_id in job.knowledge_ids:
+            if knowledge_id in job.completed_knowledge_ids:
+                continue
+
+            knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+            if knowledge is None:
+                job.completed_knowledge_ids.append(knowledge_id)
+                continue
+
+            job.current_knowledge_id = knowledge_id
+            save_checkpoint(job)
+
+            file_ids = knowledge.data.get("file_ids", []) if knowledge.data else []
+            files = [
+                file
+                for file in Files.get_files_by_ids(file_ids)
+                if file.id not in job.completed_file_ids
+            ]
+
+            async def reindex_file(file: FileModel):
+                try:
+                    indexed = await loop.run_in_executor(
+                        executor,
+                        reindex_knowledge_file,
+                        request,
+                        file,
+                        knowledge.id,
+                        job.force,
+                        user,
+                    )
+                    return file, indexed, None
+                except Exception as e:
+                    return file, False, e
+
+            for result in asyncio.as_completed([reindex_file(file) for file in files]):
+                file, indexed, error = await result
+
+                if error:
+                    log.error(
+                        f"Error reindexing file {file.filename} (ID: {file.id}): {error}"
+                    )
+                    job.failed_files.append(
+                        ReindexFailedFile(
+                            knowledge_id=knowledge.id, file_id=file.id, error=str(error)
+                        )
+                    )
+                else:
+                    if indexed:
+                        job.indexed_files += 1
+                    else:
+                        job.skipped_files += 1
+                    job.completed_file_ids.append(file.id)
+
+                job.processed_files += 1
+                save_checkpoint(job)
+
+            # The collection is updated in place, so the chunks of files
+            # removed from the knowledge base have to be dropped explicitly
+            removed = await loop.run_in_executor(
+                executor, remove_stale_chunks, knowledge.id, file_ids
+            )
+            if removed:
+                log.info(f"Removed {removed} stale chunks from {knowledge.id}")
+
+            job.completed_knowledge_ids.append(knowledge_id)
+            job.current_knowledge_id = None
+            job.completed_file_ids = []
+            save_checkpoint(job)
+
+        job.status = "completed"
+        log.info(
+            f"Reindex job {job.id} completed: {job.indexed_files} indexed, "
+            f"{job.skipped_files} skipped, {len(job.failed_files)} failed"
+        )
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        log.info(f"Reindex job {job.id} cancelled")
+        raise
+    except Exception as e:
+        log.exception(f"Reindex job {job.id} failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        save_checkpoint(job)
+        REINDEX_TASKS.pop(job.id, None)
+
+
+def start_reindex_job(request: Request, job: ReindexJobModel, user) -> ReindexJobModel:
+    REINDEX_JOBS[job.id] = job
+
+    _, task = create_task(run_reindex_job(request, job, user))
+    REINDEX_TASKS[job.id] = task
+    return job
+
+
+def create_reindex_job(request: Request, user, force: bool = False) -> ReindexJobModel:
+    knowledge_bases = Knowledges.get_knowledge_bases()
+
+    job = ReindexJobModel(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        status="pending",
+        force=force,
+        knowledge_ids=[knowledge_base.id for knowledge_base in knowledge_bases],
+        total_files=sum(
+            len(knowledge_base.data.get("file_ids", []))
+            for knowledge_base in knowledge_bases
+            if knowledge_base.data
+        ),
+        created_at=int(time.time()),
+        updated_at=int(time.time()),
+    )
+
+    log.info(
+        f"Starting reindex job {job.id} for {len(knowledge_bases)} knowledge bases"
+    )
+    save_checkpoint(job)
+    return start_reindex_job(request, job, user)
+
+
+def resume_reindex_job(request: Request, job: ReindexJobModel, user) -> ReindexJobModel:
+    # Completed knowledge bases and the files of the current one finished
+    # before the interruption are skipped, force or not; the progress counters
+    # only cover what is left.
+    job.status = "pending"
+    job.error = None
+    job.current_knowledge_id = None
+    job.processed_files = len(job.completed_file_ids)
+    job.indexed_files = 0
+    job.skipped_files = 0
+    job.failed_files = []
+    job.total_files = 0
+    for knowledge_id in job.knowledge_ids:
+        if knowledge_id in job.completed_knowledge_ids:
+            continue
+        knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+        if knowledge and knowledge.data:
+            job.total_files += len(knowledge.data.get("file_ids", []))
+
+    log.info(f"Resuming reindex job {job.id}")
+    save_checkpoint(job)
+    return start_reindex_job(request, job, user)
+
+
+async def cancel_reindex_job(job: ReindexJobModel) -> ReindexJobModel:
+    task = REINDEX_TASKS.get(job.id)
+    if task is None or task.done():
+        return job
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    return job
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from open_webui.utils.disk_cache import DiskCache
+
+
+class SpeechCache(DiskCache):
+    """
+    Synthesized speech on disk, stored as <directory>/<key[:2]>/<key>.mp3
+    with the request payload next to it in <key>.json.
+
+    Entries are indexed as (size, created_at), rebuilt from the directory
+    when first used (the modification time of the audio is its last use,
+    that of the payload its creation). Concurrent requests for the same
+    speech wait for a single synthesis.
+    """
+
+    def get_audio_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def get_payload_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def stat_entry(self, key: str) -> Optional[tuple[float, int, float]]:
+        """Returns (last used, size, created at) of an entry on disk."""
+        try:
+            audio = os.stat(self.get_audio_path(key))
+        except OSError:
+            return None
+        try:
+            created_at = os.stat(self.get_payload_path(key)).st_mtime
+        except OSError:
+            created_at = audio.st_mtime
+        return audio.st_mtime, audio.st_size, created_at
+
+    def scan_entries(self) -> list[tuple[float, str, tuple[Any, float]]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Move the entries of the former flat layout into their shard
+        for path in self.directory.glob("*.*"):
+            if path.suffix in [".mp3", ".json"] and path.is_file():
+                shard = self.directory / path.stem[:2]
+                shard.mkdir(exist_ok=True)
+                os.replace(path, shard / path.name)
+
+        entries = []
+        for path in self.directory.glob("*/*.mp3"):
+            stat = self.stat_entry(path.stem)
+            if stat is not None:
+                entries.append((stat[0], path.stem, (stat[1], stat[2])))
+        return entries
+
+    def index_entry(self, key: str, entry: tuple[int, float]):
+        self.entries[key] = entry
+        self.size += entry[0]
+
+    def unindex_entry(self, key: str) -> list[Path]:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[0]
+        return [self.get_audio_path(key), self.get_payload_path(key)]
+
+    def get(self, key: str) -> Optional[Path]:
+        """Returns the cached audio for key, if any."""
+        with self.lock:
+            entry = self.load_entries().get(key)
+
+        if entry is None:
+            # Possibly written by another process
+            stat = self.stat_entry(key)
+            if stat is None:
+                return None
+            entry = (stat[1], stat[2])
+            with self.lock:
+                if key not in self.entries:
+                    self.index_entry(key, entry)
+
+        if self.is_expired(entry[1]):
+            self.expirations += 1
+            self.remove(key)
+            return None
+
+        path = self.get_audio_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted by another process
+            self.remove(key)
+            return None
+
+        self.touch(key)
+        return path
+
+    def set(self, key: str, audio: bytes, payload: dict) -> Path:
+        # The payload first, so the audio never goes without it
+        self.write_file(self.get_payload_path(key), json.dumps(payload).encode())
+        self.write_file(self.get_audio_path(key), audio)
+
+        with self.lock:
+            self.load_entries()
+            # Overwritten in place, so there are no files to remove
+            self.unindex_entry(key)
+            self.index_entry(key, (len(audio), time.time()))
+
+        self.evict(keep=key)
+        return self.get_audio_path(key)
@@ -0,0 +1,137 @@
+import importlib.abc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+# Read directly from the environment: this module is imported before
+# open_webui.env so that the imports of env itself are profiled too
+ENABLE_STARTUP_PROFILING = (
+    os.environ.get("ENABLE_STARTUP_PROFILING", "False").lower() == "true"
+)
+STARTUP_PROFILING_TOP_N = 30
+
+PROCESS_START_TIME = time.perf_counter()
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Records how long every module takes to import, both cumulative (with the
+    modules it imports) and self (its own top-level code only), by wrapping
+    the loaders found by the rest of sys.meta_path.
+    """
+
+    def __init__(self):
+        self.timings: dict[str, tuple[float, float]] = {}
+        self.stack = threading.local()
+        self.finding = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self.finding, "active", False):
+            return None
+
+        self.finding.active = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self.finding.active = False
+
+        loader = spec.loader
+        # Built-in and frozen importers are shared classes, not per-module
+        # loaders, and are cheap anyway
+        if (
+            loader is None
+            or isinstance(loader, type)
+            or not hasattr(loader, "exec_module")
+        ):
+            return spec
+
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            stack = self.stack.__dict__.setdefault("frames", [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.timings[fullname] = (elapsed, elapsed - children)
+
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+
+IMPORT_PROFILER: Optional[ImportProfiler] = None
+
+
+def start_import_profiling():
+    global IMPORT_PROFILER
+    if ENABLE_STARTUP_PROFILING and IMPORT_PROFILER is None:
+        IMPORT_PROFILER = ImportProfiler()
+        sys.meta_path.insert(0, IMPORT_PROFILER)
+
+
+def stop_import_profiling():
+    if IMPORT_PROFILER is not None and IMPORT_PROFILER in sys.meta_path:
+        sys.meta_path.remove(IMPORT_PROFILER)
+
+
+def get_startup_report(top_n: int = STARTUP_PROFILING_TOP_N) -> str:
+    lines = [
+        f"Startup took {time.perf_counter() - PROCESS_START_TIME:.2f}s "
+        "since the profiler was imported"
+    ]
+    if IMPORT_PROFILER is None:
+        return lines[0]
+
+    timings = IMPORT_PROFILER.timings
+
+    # Group third-party modules by their top-level package
+    packages: dict[str, float] = {}
+    for name, (_, self_time) in timings.items():
+        package = name if name.startswith("open_webui") else name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_time
+
+    lines.append(f"Slowest imports by cumulative time (of {len(timings)} modules):")
+    for name, (total, self_time) in sorted(
+        timings.items(), key=lambda item: item[1][0], reverse=True
+    )[:top_n]:
+        lines.append(f"  {total:8.3f}s  (self {self_time:7.3f}s)  {name}")
+
+    lines.append("Import time by package (self time summed):")
+    for package, self_time in sorted(
+        packages.items(), key=lambda item: item[1], reverse=True
+    )[:top_n]:
+        lines.append(f"  {self_time:8.3f}s  {package}")
+
+    return "\n".join(lines)
+
+
+def log_startup_report():
+    if not ENABLE_STARTUP_PROFILING:
+        return
+
+    from open_webui.env import SRC_LOG_LEVELS
+
+    log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+    stop_import_profiling()
+    log.info(get_startup_report())
@@ -1,6 +1,8 @@
+import hashlib
 import inspect
 import logging
 import re
+import time
 import aiohttp
 import asyncio
 import yaml
@@ -16,6 +18,7 @@ from typing import (
     Union,
     Optional,
 )
+from collections import OrderedDict
 from functools import update_wrapper, partial
 
 
@@ -30,7 +33,10 @@ from langchain_core.utils.function_calling import (
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
 from open_webui.utils.plugin import load_tool_module_by_id
-from open_webui.env import AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
+    TOOL_SERVER_SPEC_CACHE_TTL,
+)
 
 import copy
 
@@ -414,19 +420,66 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
-async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+class ToolServerSpecCache:
+    """
+    Caches the parsed OpenAPI spec and tool payload of each tool server, keyed
+    by (url, auth identity) since a server may expose different specs to
+    different credentials. Entries older than the TTL are still served while
+    they are revalidated in the background with ETag/Last-Modified, so only
+    the very first fetch of a spec is awaited. All fetches share one pooled
+    session.
+    """
+
+    MAX_ENTRIES = 1000
+
+    def __init__(self, ttl: int = TOOL_SERVER_SPEC_CACHE_TTL):
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self.pending: dict[tuple[str, str], asyncio.Task] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get_key(self, token: Optional[str], url: str) -> tuple[str, str]:
+        identity = hashlib.sha256(token.encode()).hexdigest() if token else ""
+        return url, identity
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.session_loop != loop:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA
+                )
+            )
+            self.session_loop = loop
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def fetch(self, key: tuple[str, str], token: Optional[str], url: str):
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            async with self.get_session().get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    entry["fetched_at"] = time.monotonic()
+                    return entry["data"]
 
-    error = None
-    try:
-        timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as response:
                 if response.status != 200:
                     error_body = await response.json()
                     raise Exception(error_body)
@@ -437,26 +490,84 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
                     res = yaml.safe_load(text_content)
                 else:
                     res = await response.json()
-    except Exception as err:
-        log.exception(f"Could not fetch tool server spec from {url}")
-        if isinstance(err, dict) and "detail" in err:
-            error = err["detail"]
-        else:
-            error = str(err)
-        raise Exception(error)
 
-    data = {
-        "openapi": res,
-        "info": res.get("info", {}),
-        "specs": convert_openapi_to_tool_payload(res),
-    }
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except Exception as err:
+            log.exception(f"Could not fetch tool server spec from {url}")
+            if isinstance(err, dict) and "detail" in err:
+                error = err["detail"]
+            else:
+                error = str(err)
+            raise Exception(error)
 
-    print("Fetched data:", data)
-    return data
+        data = {
+            "openapi": res,
+            "info": res.get("info", {}),
+            "specs": convert_openapi_to_tool_payload(res),
+        }
+
+        self.entries[key] = {
+            "data": data,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.monotonic(),
+        }
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+
+        return data
+
+    def refresh(
+        self, key: tuple[str, str], token: Optional[str], url: str
+    ) -> asyncio.Task:
+        # Concurrent requests for the same spec share a single fetch
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self.fetch(key, token, url))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        return task
+
+    def refresh_in_background(
+        self, key: tuple[str, str], token: Optional[str], url: str
+    ):
+        def log_error(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                log.warning(f"Keeping cached tool server spec for {url}")
+
+        self.refresh(key, token, url).add_done_callback(log_error)
+
+    async def get(
+        self, token: Optional[str], url: str, force: bool = False
+    ) -> Dict[str, Any]:
+        key = self.get_key(token, url)
+        entry = self.entries.get(key)
+
+        if entry is None or force:
+            return await asyncio.shield(self.refresh(key, token, url))
+
+        if time.monotonic() - entry["fetched_at"] >= self.ttl:
+            self.refresh_in_background(key, token, url)
+
+        self.entries.move_to_end(key)
+        return entry["data"]
+
+
+TOOL_SERVER_SPEC_CACHE = ToolServerSpecCache()
+
+
+async def get_tool_server_data(
+    token: str, url: str, force: bool = False
+) -> Dict[str, Any]:
+    return await TOOL_SERVER_SPEC_CACHE.get(token, url, force=force)
 
 
 async def get_tool_servers_data(
-    servers: List[Dict[str, Any]], session_token: Optional[str] = None
+    servers: List[Dict[str, Any]],
+    session_token: Optional[str] = None,
+    force: bool = False,
 ) -> List[Dict[str, Any]]:
     # Prepare list of enabled servers along with their original index
     server_entries = []
@@ -475,7 +586,10 @@ async def get_tool_servers_data(
             server_entries.append((idx, server, full_url, token))
 
     # Create async tasks to fetch data
-    tasks = [get_tool_server_data(token, url) for (_, _, url, token) in server_entries]
+    tasks = [
+        get_tool_server_data(token, url, force=force)
+        for (_, _, url, token) in server_entries
+    ]
 
     # Execute tasks concurrently
     responses = await asyncio.gather(*tasks, return_exceptions=True)
@@ -484,7 +598,7 @@ async def get_tool_servers_data(
     results = []
     for (idx, server, url, _), response in zip(server_entries, responses):
         if isinstance(response, Exception):
-            print(f"Failed to connect to {url} OpenAPI tool server")
+            log.warning(f"Failed to connect to {url} OpenAPI tool server")
             continue
 
         results.append(
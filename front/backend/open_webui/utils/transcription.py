@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+from fastapi import FastAPI
+
+from open_webui.config import (
+    CACHE_DIR,
+    WHISPER_CHUNK_DURATION,
+    WHISPER_MODEL_DIR,
+    WHISPER_WORKERS,
+)
+from open_webui.env import DEVICE_TYPE, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+# Audio is decoded to 16kHz mono, the rate whisper and its VAD work at
+SAMPLING_RATE = 16000
+
+TRANSCRIPT_CACHE_DIR = CACHE_DIR / "audio" / "transcripts"
+
+
+def set_faster_whisper_model(model: str, auto_update: bool = False):
+    whisper_model = None
+    if model:
+        from faster_whisper import WhisperModel
+
+        faster_whisper_kwargs = {
+            "model_size_or_path": model,
+            "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
+            "compute_type": "int8",
+            "download_root": WHISPER_MODEL_DIR,
+            "local_files_only": not auto_update,
+            # One model replica per worker, sharing the cores between them
+            "num_workers": max(WHISPER_WORKERS, 1),
+            "cpu_threads": max((os.cpu_count() or 1) // max(WHISPER_WORKERS, 1), 1),
+        }
+
+        try:
+            whisper_model = WhisperModel(**faster_whisper_kwargs)
+        except Exception:
+            log.warning(
+                "WhisperModel initialization failed, attempting download with local_files_only=False"
+            )
+            faster_whisper_kwargs["local_files_only"] = False
+            whisper_model = WhisperModel(**faster_whisper_kwargs)
+    return whisper_model
+
+
+####################
+# Transcript Cache
+####################
+
+
+def get_transcript_cache_key(file_path: str, settings: dict) -> str:
+    """Hash of the audio and of the settings that change its transcript."""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    sha256.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return sha256.hexdigest()
+
+
+def get_transcript_cache_path(key: str) -> Path:
+    return TRANSCRIPT_CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def get_cached_transcript(key: str) -> Optional[dict]:
+    try:
+        with open(get_transcript_cache_path(key), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Error reading cached transcript {key}: {e}")
+        return None
+
+
+def set_cached_transcript(key: str, data: dict):
+    path = get_transcript_cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = path.with_suffix(f".{uuid.uuid4()}.tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning(f"Error caching transcript {key}: {e}")
+
+
+####################
+# Local Whisper
+####################
+
+
+class WhisperTranscriber:
+    """
+    Transcribes audio with the local faster-whisper model.
+
+    Recordings longer than chunk_duration seconds are split at the pauses
+    found by the VAD, and their chunks are transcribed in parallel on a pool
+    of `workers` threads shared by every request (the model is loaded with
+    one replica per worker). Each request keeps at most `workers` chunks
+    queued, so concurrent requests take turns on the pool instead of
+    waiting for a long recording to finish, and its segments are yielded in
+    order as soon as the chunk they belong to is done.
+    """
+
+    def __init__(
+        self,
+        workers: int = WHISPER_WORKERS,
+        chunk_duration: int = WHISPER_CHUNK_DURATION,
+    ):
+        self.workers = max(workers, 1)
+        self.chunk_duration = max(chunk_duration, 1)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="whisper"
+        )
+        self.lock = threading.Lock()
+
+    def get_model(self, app: FastAPI):
+        with self.lock:
+            if app.state.faster_whisper_model is None:
+                app.state.faster_whisper_model = set_faster_whisper_model(
+                    app.state.config.WHISPER_MODEL
+                )
+            return app.state.faster_whisper_model
+
+    def split_audio(self, audio) -> list[tuple[int, int]]:
+        """Returns the (start, end) samples of the chunks to transcribe."""
+        chunk_samples = self.chunk_duration * SAMPLING_RATE
+        if len(audio) <= chunk_samples:
+            return [(0, len(audio))]
+
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        speech = get_speech_timestamps(
+            audio,
+            VadOptions(
+                min_silence_duration_ms=300,
+                max_speech_duration_s=self.chunk_duration,
+            ),
+            sampling_rate=SAMPLING_RATE,
+        )
+
+        # Cut in the middle of the pauses, as late as the chunk length allows;
+        # the chunks cover the whole recording, silence included
+        cuts = [(a["end"] + b["start"]) // 2 for a, b in zip(speech, speech[1:])]
+
+        chunks = []
+        start = previous = 0
+        for cut in cuts + [len(audio)]:
+            if cut - start > chunk_samples and start < previous:
+                chunks.append((start, previous))
+                start = previous
+            previous = cut
+        chunks.append((start, len(audio)))
+        return chunks
+
+    def transcribe_chunk(
+        self, model, audio, offset: float, vad_filter: bool
+    ) -> list[dict]:
+        segments, info = model.transcribe(audio, beam_size=5, vad_filter=vad_filter)
+        log.debug(
+            "Detected language '%s' with probability %f"
+            % (info.language, info.language_probability)
+        )
+        return [
+            {
+                "start": round(offset + segment.start, 2),
+                "end": round(offset + segment.end, 2),
+                "text": segment.text,
+            }
+            for segment in segments
+        ]
+
+    def iter_segments(self, app: FastAPI, file_path: str) -> Iterator[dict]:
+        """Yields the segments of the recording, in order, as they are transcribed."""
+        from faster_whisper.audio import decode_audio
+
+        model = self.get_model(app)
+        vad_filter = app.state.config.WHISPER_VAD_FILTER
+
+        audio = decode_audio(file_path, sampling_rate=SAMPLING_RATE)
+        chunks = iter(self.split_audio(audio))
+        log.info(f"Transcribing {len(audio) / SAMPLING_RATE:.1f}s of {file_path}")
+
+        pending: deque[Future] = deque()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            start, end = chunk
+            pending.append(
+                self.executor.submit(
+                    self.transcribe_chunk,
+                    model,
+                    audio[start:end],
+                    start / SAMPLING_RATE,
+                    vad_filter,
+                )
+            )
+            return True
+
+        try:
+            while len(pending) < self.workers and submit_next():
+                pass
+
+            while pending:
+                segments = pending.popleft().result()
+                submit_next()
+                yield from segments
+        finally:
+            # The client went away or a chunk failed
+            for future in pending:
+                future.cancel()
+
+
+WHISPER_TRANSCRIBER = WhisperTranscriber()